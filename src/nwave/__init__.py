@@ -2,8 +2,19 @@ from __future__ import annotations
 
 __version__ = "0.1.3"
 
+from .async_core import AsyncWaveCore
 from .batch import Batch
 from .core import WaveCore
-from .task import Task, TaskException, TaskResult
+from .task import ArrayResult, ArrayTask, Task, TaskException, TaskResult, TaskStats
 
-__all__ = ["Batch", "WaveCore", "Task", "TaskResult", "TaskException"]
+__all__ = [
+    "AsyncWaveCore",
+    "Batch",
+    "WaveCore",
+    "Task",
+    "ArrayTask",
+    "ArrayResult",
+    "TaskResult",
+    "TaskStats",
+    "TaskException",
+]
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import asyncio
+import typing as t
+from concurrent.futures import CancelledError, Future
+
+from nwave.core import WaveCore, _Backlog
+from nwave.hooks import Hook
+from nwave.stats import Report
+from nwave.task import ArrayTask, Task, TaskResult
+
+if t.TYPE_CHECKING:
+    from .batch import Batch  # pragma: no cover
+
+
+class AsyncWaveCore:
+    def __init__(
+        self,
+        threads: int = None,
+        backend: str = "thread",
+        max_pending: int | None = None,
+        hooks: t.Iterable[Hook] = (),
+        policy: str = "fifo",
+        estimate: str = "size",
+    ):
+        """
+        asyncio front-end of WaveCore.
+        Executor futures are awaited directly with asyncio.wrap_future, so no
+        thread blocks per call, and cancelling an awaiting coroutine cancels
+        the executor future of its task.
+
+        Args:
+            threads: Number of threads (or processes) to use.
+            backend: Execution backend, one of 'thread', 'process' or 'auto'.
+            max_pending: Maximum number of tasks submitted to the executor at
+                once by results, and of concurrent submit calls.
+                None for no limit.
+            hooks: Hooks notified of task events, see nwave.hooks.Hook.
+            policy: Submission order of scheduled batches, see WaveCore.
+            estimate: Cost of tasks for ordering, see WaveCore.
+        """
+        self.core = WaveCore(
+            threads, backend=backend, hooks=hooks, policy=policy, estimate=estimate
+        )
+        self.max_pending = max_pending
+        self._backlog = _Backlog()
+        # Created on enter, asyncio primitives bind to the running loop
+        self._slots: asyncio.Semaphore | None = None
+
+    async def __aenter__(self) -> AsyncWaveCore:
+        self.core.__enter__()
+        if self.max_pending is not None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        self._backlog.clear()
+        # Waits for tasks still running after their callers were cancelled,
+        # so the executor is shut down off the event loop
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._close, exc_type, exc_value, traceback)
+
+    def _close(self, exc_type, exc_value, traceback) -> None:
+        self.core.sync()
+        self.core.__exit__(exc_type, exc_value, traceback)
+
+    def report(self) -> Report:
+        """
+        Aggregate statistics of all results so far.
+
+        Returns:
+            Report
+        """
+        return self.core.report()
+
+    async def submit(self, task: Task) -> TaskResult:
+        """
+        Process a task.
+
+        Args:
+            task: Task to process.
+
+        Returns:
+            TaskResult, failures are reported in its error.
+        """
+        if self._slots is None:
+            return await self._run(task)
+        async with self._slots:
+            return await self._run(task)
+
+    async def _run(self, task: Task) -> TaskResult:
+        future = self.core._submit(task)
+        try:
+            # Cancelling this coroutine cancels the executor future
+            await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            raise
+        except Exception:  # pylint: disable=broad-except
+            # Reported in the result
+            pass
+        return self._collect(future, task)
+
+    def _collect(self, future: Future, task: Task | ArrayTask) -> TaskResult:
+        exception = CancelledError() if future.cancelled() else future.exception(0)
+        return self.core._collect(future, task, exception)
+
+    def schedule(self, batch: Batch) -> None:
+        """
+        Add a batch of tasks for results.
+
+        Args:
+            batch: Batch to schedule for running.
+        """
+        if batch.plan_paths:
+            batch.prepare()
+        if batch.manifest is not None and batch.manifest not in self.core.hooks.hooks:
+            self.core.add_hook(batch.manifest)
+        self._backlog.push(*self.core._order(batch))
+
+    async def results(self) -> t.AsyncGenerator[TaskResult, None]:
+        """
+        Process all scheduled tasks, yielding results as tasks finish.
+        Closing the generator early cancels the remaining tasks.
+
+        Returns:
+            Async generator of TaskResult
+        """
+        limit = self.max_pending
+        pending: dict[asyncio.Future, tuple[Future, Task | ArrayTask]] = {}
+        try:
+            while True:
+                while limit is None or len(pending) < limit:
+                    task = self._backlog.pop()
+                    if task is None:
+                        break
+                    future = self.core._submit(task)
+                    pending[asyncio.wrap_future(future)] = (future, task)
+                if not pending:
+                    return
+
+                done, _ = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for wrapped in done:
+                    future, task = pending.pop(wrapped)
+                    yield self._collect(future, task)
+        finally:
+            # Propagates to the executor futures
+            for wrapped in pending:
+                wrapped.cancel()
+            self.core.sync()
+
+    async def wait_all(self) -> list[TaskResult]:
+        """
+        Process all scheduled tasks.
+
+        Returns:
+            List of TaskResult in completion order.
+        """
+        return [result async for result in self.results()]
@@ -1,28 +1,520 @@
 from __future__ import annotations
 
-from scipy.io import wavfile
+import io
+import os
+import shutil
+import typing as t
+from contextlib import ExitStack
+from time import perf_counter
 
-from nwave import interlocked
-from nwave.task import Task, TaskException
+import numpy as np
+import soundfile as sf
+from numpy.typing import NDArray
 
+from nwave import audio_io, interlocked
+from nwave.base import BaseEffect, EffectStream
+from nwave.hooks import Hook
+from nwave.probe import AudioInfo, load_dtype, probe
+from nwave.task import ArrayTask, Task, TaskException, TaskStats
 
-def process(task: Task):
+
+def process(task: Task, hook: Hook | None = None) -> TaskStats:
     """
     Processes a single file
+
+    Args:
+        task: Task to process
+        hook: Hook notified of the start and the end of each stage
+
+    Returns:
+        TaskStats of the stage timings and sizes
+    """
+    if hook is not None:
+        hook.on_start(task)
+    stats = TaskStats()
+    try:
+        fingerprint_source(task, stats)
+    except Exception as ex:
+        raise TaskException(ex, "File Loading") from ex
+    if task.passthrough is not None and pass_through(task, stats, hook):
+        return stats
+    cache = task.cache
+    if cache is None:
+        _process(task, stats, hook)
+        return stats
+
+    # Restore the output if cached
+    start = perf_counter()
+    try:
+        key = cache.key(task)
+    except Exception as ex:
+        raise TaskException(ex, "File Loading") from ex
+    if key is None:
+        _process(task, stats, hook)
+        return stats
+    try:
+        restored = cache.restore(key, task)
+    except Exception as ex:
+        raise TaskException(ex, "File Writing") from ex
+    if restored is not None:
+        stats.cache_hit = True
+        stats.bytes_written = restored
+        stats.write = perf_counter() - start
+        if hook is not None:
+            hook.on_stage_end(task, "write", stats.write)
+        return stats
+
+    _process(task, stats, hook)
+    try:
+        cache.store(key, task.file_output)
+    except OSError:
+        # The output was written, caching it is best effort
+        pass
+    return stats
+
+
+def fingerprint_source(task: Task, stats: TaskStats) -> None:
+    """
+    Fingerprints the source of a task with a manifest before it is
+    processed, so the manifest records the content the output was built from.
+
+    Args:
+        task: Task to fingerprint
+        stats: TaskStats to record the fingerprint in
     """
+    if task.manifest is not None:
+        stats.source_fp = task.manifest.source_fingerprint(task.file_source)
+
+
+def is_unchanged(task: Task, info: AudioInfo) -> bool:
+    """
+    Whether processing a task would rewrite its source with the same audio,
+    decided from the header of the source before loading it.
+
+    Args:
+        task: Task to check
+        info: Header of the source of the task
+
+    Returns:
+        True if every effect leaves the source unchanged, and the source
+        is in the format and subtype its output would be written in.
+    """
+    dtype = info.dtype
+    options = task.io_options or audio_io.DEFAULT_IO
+    out_format = audio_io.output_format(task.file_output)
+    if info.file_format.replace("WAVEX", "WAV") != out_format:
+        return False
+    if audio_io.output_subtype(dtype, out_format, options.subtype) != info.subtype:
+        # For example 24-bit PCM, which is written back as 32-bit
+        return False
+    return all(
+        effect.unchanged_for(info.sample_rate, info.channels, dtype)
+        for effect in task.effects
+    )
+
+
+def pass_through(task: Task, stats: TaskStats, hook: Hook | None = None) -> bool:
+    """
+    Satisfies a task without loading its source if the effect chain would
+    leave it unchanged, by the passthrough mode of the task.
+
+    Args:
+        task: Task with a passthrough mode
+        stats: TaskStats to record timings and sizes in
+        hook: Hook notified of the end of each stage
+
+    Returns:
+        True if passed through, False if the task must be processed,
+        in which case nothing is written.
+    """
+    start = perf_counter()
+    try:
+        info = probe(task.file_source)
+    except Exception:  # pylint: disable=broad-except
+        # Reported by the load of the processing
+        return False
+    if not is_unchanged(task, info):
+        return False
+    stats.passthrough = True
+    stats.samples_in = stats.samples_out = info.frames
+    stats.load = perf_counter() - start
+
+    if task.passthrough != "skip":
+        start = perf_counter()
+        try:
+            try:
+                stats.bytes_written = _copy_source(task, task.passthrough == "link")
+            except FileExistsError:
+                raise
+            except OSError:
+                if task.passthrough != "link":
+                    raise
+                # Across filesystems or without hard links
+                stats.bytes_written = _copy_source(task, False)
+        except Exception as ex:
+            raise TaskException(ex, "File Writing") from ex
+        stats.write = perf_counter() - start
+    if hook is not None:
+        for stage, elapsed in stats.stages():
+            hook.on_stage_end(task, stage, elapsed)
+    return True
+
+
+def _copy_source(task: Task, link: bool) -> int:
+    """Writes the source of a task as its output, returning its size."""
+    with open(task.file_source, "rb") as source:
+        writer = _writer(task)
+        with writer as file:
+            if link:
+                writer.link(task.file_source)
+            else:
+                shutil.copyfileobj(source, file)
+        return os.fstat(source.fileno()).st_size
+
+
+def _process(task: Task, stats: TaskStats, hook: Hook | None) -> None:
+    """Runs the stages of a task, recording them in stats."""
+    # Stream in blocks if requested and the effect chain supports it
+    if task.block_size and process_stream(task, stats):
+        if hook is not None:
+            for stage, elapsed in stats.stages():
+                hook.on_stage_end(task, stage, elapsed)
+        return
+
     # Load
+    sample_rate: float
+    start = perf_counter()
     try:
-        sample_rate, data = wavfile.read(task.file_source)
+        sample_rate, data = load(task, stats)
     except Exception as ex:
         raise TaskException(ex, "File Loading") from ex
+    stats.samples_in = len(data)
+    stats.load = perf_counter() - start
+    if hook is not None:
+        hook.on_stage_end(task, "load", stats.load)
 
-    # Run all effects
-    for effect in task.effects:
-        data, sample_rate = effect.apply_trace(data, sample_rate)
+    data, sample_rate = _apply_effects(task, data, sample_rate, stats, hook)
+    _write(task, data, sample_rate, stats, hook)
+
+
+def _writer(task: Task) -> interlocked.Writer:
+    """Atomic writer of the output of a task."""
+    return interlocked.Writer(task.file_output, task.overwrite, task.write_options)
 
-    # Normal write
+
+def _write(
+    task: Task, data: NDArray, sample_rate: float, stats: TaskStats, hook: Hook | None
+) -> None:
+    """Writes the output of a task, recording the timing in stats."""
+    start = perf_counter()
     try:
-        with interlocked.Writer(task.file_output, overwrite=task.overwrite) as file:
-            wavfile.write(file, sample_rate, data)
+        with _writer(task) as file:
+            out_format = audio_io.output_format(task.file_output)
+            audio_io.write(file, sample_rate, data, out_format, task.io_options)
+            stats.bytes_written = file.seek(0, os.SEEK_END)
     except Exception as ex:
         raise TaskException(ex, "File Writing") from ex
+    stats.write = perf_counter() - start
+    if hook is not None:
+        hook.on_stage_end(task, "write", stats.write)
+
+
+def process_group(
+    tasks: list[Task], hook: Hook | None = None
+) -> list[TaskStats | BaseException]:
+    """
+    Processes the files of several tasks together. Clips with the same
+    sample rate, shape and dtype are stacked, and each effect runs once
+    per stack with BaseEffect.apply_batch. All tasks must share one
+    effect chain.
+
+    Args:
+        tasks: Tasks to process
+        hook: Hook notified of the start and the end of each stage
+
+    Returns:
+        TaskStats of each task, or the exception it failed with
+    """
+    outcomes: list[TaskStats | BaseException] = [TaskStats() for _ in tasks]
+    # Indices and data of loaded clips, by (sample rate, shape, dtype)
+    groups: dict[tuple, list[tuple[int, NDArray]]] = {}
+    for i, task in enumerate(tasks):
+        if task.cache is not None or task.block_size or task.passthrough:
+            # Cached, streamed and passed through tasks run on their own
+            try:
+                outcomes[i] = process(task, hook)
+            except Exception as ex:
+                outcomes[i] = ex
+            continue
+        if hook is not None:
+            hook.on_start(task)
+        stats = t.cast(TaskStats, outcomes[i])
+        start = perf_counter()
+        try:
+            fingerprint_source(task, stats)
+            sample_rate, data = load(task, stats)
+        except Exception as ex:
+            outcomes[i] = TaskException(ex, "File Loading")
+            continue
+        stats.samples_in = len(data)
+        stats.load = perf_counter() - start
+        if hook is not None:
+            hook.on_stage_end(task, "load", stats.load)
+        groups.setdefault((sample_rate, data.shape, data.dtype), []).append((i, data))
+
+    for (sample_rate, _, _), members in groups.items():
+        indices = [i for i, _ in members]
+        outputs: list[NDArray] | None = None
+        out_rate = sample_rate
+        if len(members) > 1:
+            stacked = np.stack([data for _, data in members])
+            effect_times: list[tuple[str, float]] = []
+            try:
+                for effect in tasks[indices[0]].effects:
+                    start = perf_counter()
+                    stacked, out_rate = effect.apply_batch_trace(stacked, out_rate)
+                    effect_times.append((effect.name, perf_counter() - start))
+            except TaskException:
+                # Fall back to each clip on its own, to report errors per task
+                out_rate = sample_rate
+            else:
+                outputs = list(stacked)
+                for i in indices:
+                    # Time of a stacked run is shared by its clips
+                    stats = t.cast(TaskStats, outcomes[i])
+                    for name, elapsed in effect_times:
+                        stats.effects.append((name, elapsed / len(indices)))
+                        if hook is not None:
+                            hook.on_stage_end(tasks[i], name, elapsed / len(indices))
+                    stats.samples_out = stacked.shape[1]
+
+        for n, (i, data) in enumerate(members):
+            task, stats = tasks[i], t.cast(TaskStats, outcomes[i])
+            try:
+                if outputs is None:
+                    data, rate = _apply_effects(task, data, sample_rate, stats, hook)
+                else:
+                    data, rate = outputs[n], out_rate
+                _write(task, data, rate, stats, hook)
+            except Exception as ex:
+                outcomes[i] = ex
+    return outcomes
+
+
+def _apply_effects(
+    task: Task | ArrayTask,
+    data: NDArray,
+    sample_rate: float,
+    stats: TaskStats,
+    hook: Hook | None,
+) -> tuple[NDArray, float]:
+    """Runs the effect chain of a task, recording timings in stats."""
+    for effect in task.effects:
+        start = perf_counter()
+        data, sample_rate = effect.apply_trace(data, sample_rate)
+        elapsed = perf_counter() - start
+        stats.effects.append((effect.name, elapsed))
+        if hook is not None:
+            hook.on_stage_end(task, effect.name, elapsed)
+    stats.samples_out = len(data)
+    return data, sample_rate
+
+
+def process_array(
+    task: ArrayTask, hook: Hook | None = None
+) -> tuple[NDArray | bytes, float, TaskStats]:
+    """
+    Processes an in-memory task, without touching the filesystem.
+
+    Args:
+        task: Task to process
+        hook: Hook notified of the start and the end of each stage
+
+    Returns:
+        (output data, sample rate, TaskStats), output data is wav bytes
+        if the input was bytes.
+    """
+    if hook is not None:
+        hook.on_start(task)
+    stats = TaskStats()
+    encoded = isinstance(task.data, (bytes, bytearray, memoryview))
+
+    sample_rate: float
+    start = perf_counter()
+    if encoded:
+        try:
+            sample_rate, data = audio_io.read(io.BytesIO(t.cast(bytes, task.data)))
+        except Exception as ex:
+            raise TaskException(ex, "File Loading") from ex
+        stats.bytes_read = len(task.data)
+    else:
+        if task.sample_rate is None:
+            raise TaskException(
+                ValueError("sample_rate is required for array input"), "File Loading"
+            )
+        sample_rate, data = task.sample_rate, np.asarray(task.data)
+        stats.bytes_read = data.nbytes
+    stats.samples_in = len(data)
+    stats.load = perf_counter() - start
+    if hook is not None:
+        hook.on_stage_end(task, "load", stats.load)
+
+    data, sample_rate = _apply_effects(task, data, sample_rate, stats, hook)
+
+    start = perf_counter()
+    if encoded:
+        try:
+            buffer = io.BytesIO()
+            audio_io.write(buffer, sample_rate, data)
+        except Exception as ex:
+            raise TaskException(ex, "File Writing") from ex
+        output: NDArray | bytes = buffer.getvalue()
+        stats.bytes_written = len(output)
+    else:
+        output = data
+        stats.bytes_written = data.nbytes
+    stats.write = perf_counter() - start
+    if hook is not None:
+        hook.on_stage_end(task, "write", stats.write)
+    return output, sample_rate, stats
+
+
+def load(task: Task, stats: TaskStats | None = None) -> tuple[int, NDArray]:
+    """
+    Loads the source file of a task with the backend of its IOOptions.
+    If task.mmap is set, PCM data is memory-mapped as a read-only array,
+    falling back to a normal read for formats that cannot be mapped.
+
+    Args:
+        task: Task to load the source of
+        stats: TaskStats to record the bytes read in
+
+    Returns:
+        (sample rate, data)
+    """
+    backend = (task.io_options or audio_io.DEFAULT_IO).backend
+    result = None
+    if task.mmap and backend != "soundfile":
+        try:
+            sample_rate, data = audio_io.read(task.file_source, backend, mmap=True)
+        except ValueError:
+            # Formats such as 24-bit PCM cannot be mapped
+            pass
+        else:
+            # Copy-on-write mapping, mark read-only so effects never write to it
+            data.flags.writeable = False
+            result = sample_rate, data
+    if result is None:
+        result = audio_io.read(task.file_source, backend)
+    if stats is not None:
+        stats.bytes_read = os.stat(task.file_source).st_size
+    return result
+
+
+def process_stream(task: Task, stats: TaskStats | None = None) -> bool:
+    """
+    Processes a single file in blocks of task.block_size frames,
+    with memory bounded by the block size.
+
+    Args:
+        task: Task to process
+        stats: TaskStats to record timings and sizes in
+
+    Returns:
+        True if processed, False if the file format or an effect
+        cannot stream, in which case nothing is written.
+    """
+    stats = stats if stats is not None else TaskStats()
+    options = task.io_options or audio_io.DEFAULT_IO
+    if options.backend == "scipy":
+        # Blocks are read and written with soundfile
+        return False
+    start = perf_counter()
+    with ExitStack() as stack:
+        try:
+            file_source = stack.enter_context(open(task.file_source, "rb"))
+            source = stack.enter_context(sf.SoundFile(file_source))
+        except Exception as ex:
+            raise TaskException(ex, "File Loading") from ex
+
+        read_dtype = load_dtype(source.subtype)
+        # Open a stream for each effect, tracking the output format
+        streams: list[tuple[BaseEffect, EffectStream]] = []
+        sample_rate, dtype = source.samplerate, read_dtype
+        channels = source.channels
+        for effect in task.effects:
+            stream = effect.stream(sample_rate, channels, dtype)
+            if stream is None:
+                return False
+            streams.append((effect, stream))
+            sample_rate = stream.sample_rate
+            dtype = stream.dtype or dtype
+            channels = stream.channels or channels
+
+        if dtype not in audio_io.DTYPE_SUBTYPES:
+            return False
+        out_format = audio_io.output_format(task.file_output)
+        subtype = audio_io.output_subtype(dtype, out_format, options.subtype)
+        if not sf.check_format(out_format, subtype):
+            return False
+        stats.load = perf_counter() - start
+
+        try:
+            with _writer(task) as file:
+                with sf.SoundFile(
+                    file,
+                    "w",
+                    int(sample_rate),
+                    channels,
+                    subtype,
+                    format=out_format,
+                ) as target:
+                    _stream_blocks(source, target, read_dtype, streams, task, stats)
+                stats.bytes_written = file.seek(0, os.SEEK_END)
+        except TaskException:
+            raise
+        except Exception as ex:
+            raise TaskException(ex, "File Writing") from ex
+        stats.bytes_read = file_source.tell()
+    return True
+
+
+def _stream_blocks(
+    source: sf.SoundFile,
+    target: sf.SoundFile,
+    dtype: np.dtype,
+    streams: list[tuple[BaseEffect, EffectStream]],
+    task: Task,
+    stats: TaskStats,
+) -> None:
+    """Reads, transforms and writes blocks until the source is exhausted."""
+    block_size = task.block_size or source.frames
+    effect_times = [0.0] * len(streams)
+    last = False
+    while not last:
+        start = perf_counter()
+        try:
+            block: NDArray = source.read(block_size, dtype=dtype.name)
+        except Exception as ex:
+            raise TaskException(ex, "File Loading") from ex
+        last = len(block) < block_size or source.tell() >= source.frames
+        stats.samples_in += len(block)
+        stats.load += perf_counter() - start
+
+        for i, (effect, stream) in enumerate(streams):
+            start = perf_counter()
+            try:
+                block = stream.process(block, last)
+            except Exception as ex:
+                raise TaskException(ex, effect.name) from ex
+            effect_times[i] += perf_counter() - start
+
+        if len(block):
+            start = perf_counter()
+            target.write(block)
+            stats.samples_out += len(block)
+            stats.write += perf_counter() - start
+
+    stats.effects.extend(
+        (effect.name, elapsed) for (effect, _), elapsed in zip(streams, effect_times)
+    )
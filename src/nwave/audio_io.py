@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+import os
+import typing as t
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from os import PathLike
+
+import numpy as np
+import soundfile as sf
+from numpy.typing import NDArray
+from scipy.io import wavfile
+
+from nwave.probe import load_dtype
+
+IO_BACKENDS = ("auto", "scipy", "soundfile")
+# Write subtypes of output dtypes, matching scipy.io.wavfile
+DTYPE_SUBTYPES = {
+    np.dtype("int16"): "PCM_16",
+    np.dtype("int32"): "PCM_32",
+    np.dtype("float32"): "FLOAT",
+    np.dtype("float64"): "DOUBLE",
+}
+# Output formats of file suffixes, other suffixes are written as WAV
+SUFFIX_FORMATS = {
+    ".aif": "AIFF",
+    ".aiff": "AIFF",
+    ".flac": "FLAC",
+    ".ogg": "OGG",
+    ".wav": "WAV",
+}
+_WAV_SUFFIXES = (".wav", ".wave")
+
+AudioFile = t.Union[str, PathLike, t.BinaryIO]
+
+
+@dataclass(frozen=True)
+class IOOptions:
+    """Options of how audio files are read and written."""
+
+    # 'scipy' for scipy.io.wavfile, fastest for wav files and the only backend
+    # that can memory-map, 'soundfile' for any format libsndfile supports,
+    # or 'auto' to pick the fastest backend for each file.
+    backend: str = "auto"
+    # Subtype of outputs, e.g. 'PCM_16', converted by the writer without
+    # an extra copy. None to write the dtype of the effect output.
+    subtype: str | None = None
+
+    def __post_init__(self):
+        if self.backend not in IO_BACKENDS:
+            raise ValueError(
+                f"Invalid backend: {self.backend}. Must be one of {IO_BACKENDS}"
+            )
+        if self.subtype is not None and self.subtype not in sf.available_subtypes():
+            raise ValueError(f"Invalid subtype: {self.subtype}")
+
+
+DEFAULT_IO = IOOptions()
+
+
+def output_format(path: str | PathLike) -> str:
+    """
+    Format of an output file from its suffix.
+
+    Args:
+        path: Path of the output.
+
+    Returns:
+        soundfile format name, 'WAV' for unknown suffixes
+    """
+    suffix = os.path.splitext(path)[1].lower()
+    return SUFFIX_FORMATS.get(suffix, "WAV")
+
+
+def output_subtype(
+    dtype: np.dtype, file_format: str, subtype: str | None = None
+) -> str:
+    """
+    Subtype data of a dtype is written as.
+
+    Args:
+        dtype: Data type of the output.
+        file_format: Format of the output.
+        subtype: Requested subtype, None to match the dtype.
+
+    Returns:
+        Requested subtype, the subtype of the dtype if the format supports it,
+        otherwise the default subtype of the format.
+    """
+    if subtype is not None:
+        return subtype
+    native = DTYPE_SUBTYPES.get(np.dtype(dtype))
+    if native is not None and sf.check_format(file_format, native):
+        return native
+    return sf.default_subtype(file_format)
+
+
+def _is_wav(file: AudioFile) -> bool:
+    # Encoded file objects are wav files unless read otherwise
+    if isinstance(file, (str, PathLike)):
+        return os.fspath(file).lower().endswith(_WAV_SUFFIXES)
+    return True
+
+
+class AudioBackend(ABC):
+    """
+    Abstract Base Class for audio file readers and writers
+    """
+
+    name = ""
+
+    @abstractmethod
+    def read(self, file: AudioFile, mmap: bool = False) -> tuple[int, NDArray]:
+        """
+        Read an audio file.
+
+        Args:
+            file: Path or binary file object to read.
+            mmap: Whether to memory-map the samples, if supported.
+
+        Returns: (sample rate, data)
+        """
+        ...  # pragma: no cover
+
+    @abstractmethod
+    def write(
+        self,
+        file: AudioFile,
+        sample_rate: float,
+        data: NDArray,
+        file_format: str = "WAV",
+        subtype: str | None = None,
+    ) -> None:
+        """
+        Write an audio file.
+
+        Args:
+            file: Path or binary file object to write.
+            sample_rate: Sample Rate of the data.
+            data: NDArray of audio.
+            file_format: Format of the file.
+            subtype: Subtype of the samples, None to match the dtype.
+        """
+        ...  # pragma: no cover
+
+    def can_write(self, dtype: np.dtype, file_format: str, subtype: str | None) -> bool:
+        """Whether the backend can write data of a dtype in a format."""
+        return True
+
+
+class ScipyBackend(AudioBackend):
+    """Wav files with scipy.io.wavfile, samples are written in their dtype."""
+
+    name = "scipy"
+
+    def read(self, file: AudioFile, mmap: bool = False) -> tuple[int, NDArray]:
+        return wavfile.read(file, mmap=mmap)
+
+    def write(
+        self,
+        file: AudioFile,
+        sample_rate: float,
+        data: NDArray,
+        file_format: str = "WAV",
+        subtype: str | None = None,
+    ) -> None:
+        if not self.can_write(data.dtype, file_format, subtype):
+            raise ValueError(
+                f"scipy cannot write {data.dtype} data as {file_format} {subtype}"
+            )
+        wavfile.write(file, int(sample_rate), data)
+
+    def can_write(self, dtype: np.dtype, file_format: str, subtype: str | None) -> bool:
+        if file_format != "WAV":
+            return False
+        return subtype is None or DTYPE_SUBTYPES.get(np.dtype(dtype)) == subtype
+
+
+class SoundfileBackend(AudioBackend):
+    """
+    Any format of libsndfile. PCM is read in its native integer dtype,
+    other subtypes as float32.
+    """
+
+    name = "soundfile"
+
+    def read(self, file: AudioFile, mmap: bool = False) -> tuple[int, NDArray]:
+        if isinstance(file, PathLike):
+            file = os.fspath(file)
+        with sf.SoundFile(file) as source:
+            data = source.read(dtype=load_dtype(source.subtype).name)
+            return source.samplerate, data
+
+    def write(
+        self,
+        file: AudioFile,
+        sample_rate: float,
+        data: NDArray,
+        file_format: str = "WAV",
+        subtype: str | None = None,
+    ) -> None:
+        if isinstance(file, PathLike):
+            file = os.fspath(file)
+        subtype = output_subtype(data.dtype, file_format, subtype)
+        sf.write(file, data, int(sample_rate), subtype, format=file_format)
+
+
+_BACKENDS: dict[str, AudioBackend] = {
+    backend.name: backend for backend in (ScipyBackend(), SoundfileBackend())
+}
+
+
+def get_backend(name: str) -> AudioBackend:
+    """
+    Get an audio backend by name.
+
+    Args:
+        name: One of 'scipy' or 'soundfile'.
+
+    Returns:
+        AudioBackend
+    """
+    try:
+        return _BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Invalid backend: {name}") from None
+
+
+def read(
+    file: AudioFile, backend: str = "auto", mmap: bool = False
+) -> tuple[int, NDArray]:
+    """
+    Read an audio file. The auto backend reads wav files with scipy,
+    falling back to soundfile for formats scipy does not support.
+
+    Args:
+        file: Path or binary file object to read.
+        backend: One of 'auto', 'scipy' or 'soundfile'.
+        mmap: Whether to memory-map the samples, if supported.
+
+    Returns:
+        (sample rate, data)
+    """
+    if backend != "auto":
+        return get_backend(backend).read(file, mmap)
+    if not _is_wav(file):
+        return _BACKENDS["soundfile"].read(file)
+    position = None if isinstance(file, (str, PathLike)) else file.tell()
+    try:
+        return _BACKENDS["scipy"].read(file, mmap)
+    except ValueError:
+        if mmap:
+            raise
+        # For example A-law or u-law wav files
+        if position is not None:
+            t.cast(t.BinaryIO, file).seek(position)
+        return _BACKENDS["soundfile"].read(file)
+
+
+def write(
+    file: AudioFile,
+    sample_rate: float,
+    data: NDArray,
+    file_format: str = "WAV",
+    options: IOOptions | None = None,
+) -> None:
+    """
+    Write an audio file. The auto backend writes with scipy if it can
+    write the data as is, otherwise with soundfile.
+
+    Args:
+        file: Path or binary file object to write.
+        sample_rate: Sample Rate of the data.
+        data: NDArray of audio.
+        file_format: Format of the file, see output_format.
+        options: IOOptions of the backend and subtype.
+    """
+    options = options or DEFAULT_IO
+    name = options.backend
+    if name == "auto":
+        fits = _BACKENDS["scipy"].can_write(data.dtype, file_format, options.subtype)
+        name = "scipy" if fits else "soundfile"
+    get_backend(name).write(file, sample_rate, data, file_format, options.subtype)
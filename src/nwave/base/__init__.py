@@ -1,5 +1,5 @@
 from __future__ import annotations
 
-from .base_effect import BaseEffect
+from .base_effect import BaseEffect, EffectStream
 
-__all__ = ["BaseEffect"]
+__all__ = ["BaseEffect", "EffectStream"]
@@ -2,24 +2,127 @@ from __future__ import annotations
 
 from abc import ABC, abstractmethod
 
+import numpy as np
 from numpy.typing import NDArray
 
+from ..common.fingerprint import stable_repr
 from ..task import TaskException
 
 
+class EffectStream(ABC):
+    """
+    Abstract Base Class for stateful block processing of an effect
+    """
+
+    def __init__(
+        self,
+        sample_rate: float,
+        dtype: np.dtype | None = None,
+        channels: int | None = None,
+    ):
+        """
+        Args:
+            sample_rate: Output Sample Rate of the stream
+            dtype: Output data type of the stream, None if unchanged
+            channels: Output number of channels of the stream, None if unchanged
+        """
+        self.sample_rate = sample_rate
+        self.dtype = dtype
+        self.channels = channels
+
+    @abstractmethod
+    def process(self, block: NDArray, last: bool) -> NDArray:
+        """
+        Process the next block of audio
+
+        Args:
+            block: NDArray of audio frames, may be empty
+            last: True if this is the final block of the file
+
+        Returns: NDArray of processed audio, may be empty
+        """
+        ...  # pragma: no cover
+
+
 class BaseEffect(ABC):
     """
     Abstract Base Class for Effects
     """
 
+    # Whether apply releases the GIL for most of its run, so tasks of the
+    # effect scale on threads. The auto backend of WaveCore runs chains
+    # with effects that hold the GIL on processes.
+    releases_gil = False
+
     @property
     def name(self):
         return self.__class__.__name__
 
+    @property
+    def fingerprint(self) -> str:
+        """
+        Stable identity of the effect and its parameters, used to key
+        cached outputs and manifests. Effects with parameters that are not
+        attributes, or attributes that do not change the output, should
+        override this.
+
+        Raises:
+            FingerprintError: If a parameter has no stable representation,
+                the chain of the effect is then never cached.
+        """
+        params = stable_repr(vars(self))
+        return f"{type(self).__module__}.{type(self).__qualname__}{params}"
+
+    @property
+    def is_noop(self) -> bool:
+        """
+        Whether the effect statically leaves any input exactly unchanged,
+        so plan_chain can drop it. Effects that only approximate their
+        input, such as a phase vocoder at rate 1, must return False.
+        """
+        return False
+
+    def unchanged_for(self, sr: float, channels: int, dtype: np.dtype) -> bool:
+        """
+        Whether the effect leaves input of a format unchanged, so tasks can
+        be passed through from the header of their source before loading.
+
+        Args:
+            sr: Sample Rate of the input
+            channels: Number of channels of the input
+            dtype: Data type of the input
+
+        Returns: True if the output would equal the input
+        """
+        return self.is_noop
+
+    def fuse(self, other: BaseEffect) -> BaseEffect | None:
+        """
+        Fuse with the next effect of a chain into a single effect.
+
+        Args:
+            other: Effect applied directly after this one
+
+        Returns: Effect equivalent to both, or None if they cannot fuse
+        """
+        return None
+
+    def defers_past(self, other: BaseEffect) -> bool:
+        """
+        Whether the effect can run after the next effect of a chain
+        with the same result, and is cheaper to run there.
+
+        Args:
+            other: Effect applied directly after this one
+        """
+        return False
+
     @abstractmethod
     def apply(self, data: NDArray, sr: float) -> tuple[NDArray, float]:
         """
-        Apply the audio effect
+        Apply the audio effect.
+        The data may be read-only (e.g. memory-mapped input), effects
+        must check data.flags.writeable before modifying it in place.
 
         Args:
             data: NDArray of audio
@@ -29,6 +132,48 @@ class BaseEffect(ABC):
         """
         ...  # pragma: no cover
 
+    def apply_batch(self, data: NDArray, sr: float) -> tuple[NDArray, float]:
+        """
+        Apply the audio effect to a stack of clips of the same shape.
+        Effects can override this with a vectorized version, the default
+        applies the effect to each clip.
+
+        Args:
+            data: NDArray of clips stacked on the first axis
+            sr: Sample Rate as float
+
+        Returns: NDArray of processed clips stacked on the first axis
+        """
+        results = [self.apply(clip, sr) for clip in data]
+        # Raises if the output shapes of the clips differ
+        return np.stack([result for result, _ in results]), results[-1][1]
+
+    @staticmethod
+    def writable(data: NDArray) -> NDArray:
+        """
+        Get a writable array for in place processing.
+
+        Args:
+            data: NDArray of audio
+
+        Returns: data if writable, otherwise a copy of data
+        """
+        return data if data.flags.writeable else data.copy()
+
+    def stream(self, sr: float, channels: int, dtype: np.dtype) -> EffectStream | None:
+        """
+        Open a block stream of the effect, for effects that can process
+        audio in fixed-size blocks with bounded memory.
+
+        Args:
+            sr: Sample Rate of the input
+            channels: Number of channels of the input
+            dtype: Data type of the input
+
+        Returns: EffectStream, or None if the effect cannot stream
+        """
+        return None
+
     def apply_trace(self, data: NDArray, sr: float) -> tuple[NDArray, float]:
         """
         Apply the audio effect with exception tracing
@@ -44,3 +189,18 @@ class BaseEffect(ABC):
         except Exception as e:
             # Raise with current class name
             raise TaskException(e, self.__class__.__name__)
+
+    def apply_batch_trace(self, data: NDArray, sr: float) -> tuple[NDArray, float]:
+        """
+        Apply the audio effect to stacked clips with exception tracing
+
+        Args:
+            data: NDArray of clips stacked on the first axis
+            sr: Sample Rate as float
+
+        Returns: NDArray of processed clips stacked on the first axis
+        """
+        try:
+            return self.apply_batch(data, sr)
+        except Exception as e:
+            raise TaskException(e, self.__class__.__name__)
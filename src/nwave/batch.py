@@ -4,18 +4,25 @@ import os
 from glob import glob
 from os import PathLike
 from pathlib import Path
-from typing import Iterable, Iterator, NamedTuple
+from typing import Iterable, Iterator, Sized, Tuple
 
+from .audio_io import IOOptions
 from .base import BaseEffect
 from .core import WaveCore
-from .task import Task, TaskResult
-
-
-class Paths(NamedTuple):
-    """Paths for file processing pair."""
-
-    source: Path
-    target: Path
+from .interlocked import WriteOptions
+from .manifest import Manifest
+from .output_cache import OutputCache
+from .paths import (
+    PathCollisionError,
+    Paths,
+    find_collisions,
+    make_dirs,
+    making_dirs,
+    mirror,
+)
+from .plan import plan_chain
+from .scan import scan
+from .task import PASSTHROUGH_MODES, AnyPath, Task, TaskResult
 
 
 def parse_path(
@@ -54,6 +61,15 @@ class Batch:
         input_files: Iterable[str | PathLike] | str,
         output_files: Iterable[str | PathLike] | str,
         overwrite: bool = False,
+        block_size: int | None = None,
+        mmap: bool = False,
+        optimize: bool = True,
+        cache: OutputCache | None = None,
+        manifest: Manifest | None = None,
+        write_options: WriteOptions | None = None,
+        plan_paths: bool = True,
+        passthrough: str | None = None,
+        io_options: IOOptions | None = None,
     ):
         """
         Initialize a new batch.
@@ -62,41 +78,199 @@ class Batch:
             input_files: List of source files to process.
             output_files: List of target files to write.
             overwrite: Whether to overwrite the target files.
+            block_size: Frames per block to stream files with bounded memory.
+                None to process whole files.
+            mmap: Whether to memory-map PCM input files instead of copying them
+                into memory. Effects then receive read-only arrays.
+            optimize: Whether to simplify the effect chain once before running,
+                see nwave.plan.plan_chain.
+            cache: Cache of outputs to restore unchanged files from
+                instead of processing them.
+            manifest: Manifest of completed tasks. Tasks it records as done
+                with the same source and effect chain are not scheduled,
+                and completed tasks are recorded when run by WaveCore.
+            write_options: Temp directory and fsync policy of the output
+                writes, see interlocked.WriteOptions.
+            plan_paths: Whether to check outputs for collisions and create
+                output directories before scheduling, see prepare.
+            passthrough: How to satisfy tasks whose effects would leave the
+                source unchanged, decided from its header without loading.
+                'skip' to write nothing, 'link' to hard link the source as
+                the output, 'copy' to copy it, or None to always process.
+            io_options: Audio backend and output subtype of the files,
+                see audio_io.IOOptions. Outputs are written in the format
+                of their suffix, e.g. FLAC for '.flac'.
         """
+        if passthrough is not None and passthrough not in PASSTHROUGH_MODES:
+            raise ValueError(
+                f"Invalid passthrough: {passthrough}. "
+                f"Must be one of {PASSTHROUGH_MODES}"
+            )
         self.overwrite = overwrite
+        self.block_size = block_size
+        self.mmap = mmap
+        self.optimize = optimize
+        self.cache = cache
+        self.manifest = manifest
+        self.write_options = write_options
+        self.plan_paths = plan_paths
+        self.passthrough = passthrough
+        self.io_options = io_options
+        self._prepared = False
         self.effects: list[BaseEffect] = []
         # Get list of Path tuples
-        paths = parse_path(input_files, output_files)
-        # Create tasks
-        self.tasks = [
-            Task(src, dst, self.effects, self.overwrite) for src, dst in paths
-        ]
+        self.paths: Iterable[Paths] = parse_path(input_files, output_files)
+
+    @property
+    def size(self) -> int | None:
+        """
+        Number of tasks in the batch, or None if lazily generated
+        or filtered by a manifest.
+        """
+        if self.manifest is None and isinstance(self.paths, Sized):
+            return len(self.paths)
+        return None
+
+    @property
+    def tasks(self) -> list[Task]:
+        """
+        Tasks of the batch as a new list, built from the current effects
+        on each access. Lazy batches, such as from Batch.from_scan, can only
+        be consumed once by scheduling them or with iter_tasks.
+
+        Raises:
+            TypeError: If the batch is lazily generated.
+        """
+        if not isinstance(self.paths, Sized):
+            raise TypeError(
+                "Tasks of a lazy batch are generated once, use iter_tasks()"
+            )
+        return list(self.iter_tasks())
 
-    def run(self, threads: int | None = None) -> list[TaskResult]:
+    def plan(self) -> list[BaseEffect]:
+        """
+        Effect chain the tasks of the batch will run.
+
+        Returns:
+            Simplified effect chain if optimize is set, otherwise the effects.
+        """
+        if self.optimize:
+            return plan_chain(self.effects)
+        return self.effects
+
+    def prepare(self) -> None:
+        """
+        Plans the output paths of the batch before scheduling.
+        For batches of known paths, raises PathCollisionError if several
+        sources map to one output, and creates each output directory once.
+        Lazy batches create directories as paths are consumed, without
+        collision checks. Only the first call has an effect.
+
+        Raises:
+            PathCollisionError: If outputs collide.
+        """
+        if self._prepared:
+            return
+        self._prepared = True
+        if isinstance(self.paths, Sized):
+            collisions = find_collisions(self.paths)
+            if collisions:
+                raise PathCollisionError(collisions)
+            make_dirs(target for _, target in self.paths)
+        else:
+            self.paths = making_dirs(self.paths)
+
+    def iter_tasks(self) -> Iterator[Task]:
+        """
+        Lazily create the tasks of the batch.
+        The effect chain is planned once and shared by all tasks.
+        Tasks done according to the manifest are skipped.
+
+        Returns:
+            Iterator of Tasks.
+        """
+        effects = self.plan()
+        for src, dst in self.paths:
+            task = Task(
+                src,
+                dst,
+                effects,
+                self.overwrite,
+                self.block_size,
+                self.mmap,
+                self.cache,
+                self.write_options,
+                self.passthrough,
+                self.io_options,
+                self.manifest,
+            )
+            if self.manifest is not None and self.manifest.is_done(task):
+                continue
+            yield task
+
+    def run(
+        self,
+        threads: int | None = None,
+        backend: str = "thread",
+        max_pending: int | None = None,
+        micro_batch: int | None = None,
+        policy: str = "fifo",
+    ) -> list[TaskResult]:
         """
         Run the batch.
 
         Args:
             threads: Number of threads to use.
+            backend: Execution backend, one of 'thread', 'process' or 'auto'.
+            max_pending: Maximum number of tasks submitted at once.
+            micro_batch: Number of tasks to process together, for many
+                short clips, see WaveCore.
+            policy: Submission order of the tasks, one of 'fifo', 'lpt'
+                or 'spt', see WaveCore.
 
         Returns:
             A list of TaskResults.
         """
-        with WaveCore(threads) as core:
+        with WaveCore(
+            threads,
+            backend=backend,
+            max_pending=max_pending,
+            micro_batch=micro_batch,
+            policy=policy,
+        ) as core:
             core.schedule(self)
             return core.wait_all()
 
-    def run_yield(self, threads: int | None = None) -> Iterator[TaskResult]:
+    def run_yield(
+        self,
+        threads: int | None = None,
+        backend: str = "thread",
+        max_pending: int | None = None,
+        micro_batch: int | None = None,
+        policy: str = "fifo",
+    ) -> Iterator[TaskResult]:
         """
         Run the batch and yield results.
 
         Args:
             threads: Number of threads to use.
+            backend: Execution backend, one of 'thread', 'process' or 'auto'.
+            max_pending: Maximum number of tasks submitted at once.
+            micro_batch: Number of tasks to process together, for many
+                short clips, see WaveCore.
+            policy: Submission order of the tasks, one of 'fifo', 'lpt'
+                or 'spt', see WaveCore.
 
         Returns:
             A generator of TaskResults.
         """
-        with WaveCore(threads) as core:
+        with WaveCore(
+            threads,
+            backend=backend,
+            max_pending=max_pending,
+            micro_batch=micro_batch,
+            policy=policy,
+        ) as core:
             core.schedule(self)
             yield from core.yield_all()
 
@@ -108,16 +282,115 @@ class Batch:
         return self
 
     @classmethod
-    def from_glob(cls, pattern: str, dest_dir: str, overwrite: bool = False) -> Batch:
+    def from_pairs(
+        cls, pairs: Iterable[Tuple[AnyPath, AnyPath]], overwrite: bool = False
+    ) -> Batch:
+        """
+        Create a new batch from (source, target) pairs.
+        Iterators are consumed lazily as tasks are scheduled.
+
+        Args:
+            pairs: Iterable of (source, target) file pairs.
+            overwrite: Whether to overwrite the target files.
+        """
+        batch = cls([], [], overwrite)
+        if isinstance(pairs, Sized):
+            batch.paths = [Paths(Path(src), Path(dst)) for src, dst in pairs]
+        else:
+            batch.paths = (Paths(Path(src), Path(dst)) for src, dst in pairs)
+        return batch
+
+    @classmethod
+    def from_glob(
+        cls,
+        pattern: str,
+        dest_dir: str,
+        overwrite: bool = False,
+        manifest: Manifest | None = None,
+        root: str | None = None,
+    ) -> Batch:
         """
         Create a new batch from a glob pattern.
+        With a manifest, only new or changed files are processed.
+        Files are listed before the batch is created, in sorted order,
+        use from_scan to discover large trees while processing.
+
+        Args:
+            pattern: Glob pattern of source files. The glob is recursive,
+                so '**' matches any number of directories, including none.
+            dest_dir: Directory to write outputs to.
+            overwrite: Whether to overwrite the target files.
+            manifest: Manifest of completed tasks to skip.
+            root: Root directory of the sources to mirror under dest_dir.
+                None to write all outputs to dest_dir by file name.
         """
         # Search for files
-        files = glob(pattern)
+        files = sorted(glob(pattern, recursive=True))
         if not files:
             raise ValueError(f"No files found for pattern {pattern}")
-        return cls(
-            files,
-            [os.path.join(dest_dir, os.path.basename(f)) for f in files],
-            overwrite,
-        )
+        outputs: list[str | PathLike]
+        if root is None:
+            outputs = [os.path.join(dest_dir, os.path.basename(f)) for f in files]
+        else:
+            outputs = [target for _, target in mirror(files, root, dest_dir)]
+        return cls(files, outputs, overwrite, manifest=manifest)
+
+    @classmethod
+    def from_scan(
+        cls,
+        source_root: str | PathLike,
+        dest_root: str | PathLike,
+        pattern: str = "**/*.wav",
+        overwrite: bool = False,
+        suffix: str | None = None,
+        manifest: Manifest | None = None,
+        **scan_args,
+    ) -> Batch:
+        """
+        Create a lazy batch of the files under a directory, discovered by a
+        parallel scan while tasks run, see nwave.scan.scan. Outputs mirror
+        the source tree under a destination root. The batch has no size,
+        and output collisions are not checked up front.
+
+        Args:
+            source_root: Root directory of the sources.
+            dest_root: Root directory of the outputs.
+            pattern: Glob pattern of the sources relative to source_root.
+            overwrite: Whether to overwrite the target files.
+            suffix: Suffix to replace the suffix of outputs with.
+            manifest: Manifest of completed tasks to skip.
+            scan_args: Extension, size and thread options of nwave.scan.scan.
+        """
+        batch = cls([], [], overwrite, manifest=manifest)
+        files = scan(source_root, pattern, **scan_args)
+        batch.paths = mirror(files, source_root, dest_root, suffix)
+        return batch
+
+    @classmethod
+    def from_tree(
+        cls,
+        source_root: str | PathLike,
+        dest_root: str | PathLike,
+        pattern: str = "**/*.wav",
+        overwrite: bool = False,
+        suffix: str | None = None,
+        manifest: Manifest | None = None,
+    ) -> Batch:
+        """
+        Create a new batch of the files under a directory, with outputs
+        mirroring the source tree under a destination root.
+
+        Args:
+            source_root: Root directory of the sources.
+            dest_root: Root directory of the outputs.
+            pattern: Glob pattern of the sources relative to source_root.
+            overwrite: Whether to overwrite the target files.
+            suffix: Suffix to replace the suffix of outputs with.
+            manifest: Manifest of completed tasks to skip.
+        """
+        files = sorted(glob(os.path.join(source_root, pattern), recursive=True))
+        if not files:
+            raise ValueError(f"No files found for pattern {pattern} in {source_root}")
+        batch = cls([], [], overwrite, manifest=manifest)
+        batch.paths = list(mirror(files, source_root, dest_root, suffix))
+        return batch
@@ -0,0 +1,363 @@
+"""
+Benchmark suite for nwave.
+
+Generates synthetic corpora, measures throughput, per-task latency and
+peak memory of each backend and effect chain, and compares results against
+a baseline. Each run is measured in a fresh process, so peak memory is
+that of the run alone.
+
+Usage:
+    python -m nwave.bench --files 200 --duration 5 --output bench.json
+    python -m nwave.bench --baseline bench.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import typing as t
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+
+import numpy as np
+from scipy.io import wavfile
+
+from nwave import effects
+from nwave.base import BaseEffect
+from nwave.batch import Batch
+from nwave.core import BACKENDS, WaveCore, shutdown_process_pools
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None  # type: ignore
+
+# Named effect chains to benchmark
+CHAINS: dict[str, t.Callable[[], list[BaseEffect]]] = {
+    "resample": lambda: [effects.Resample(16000)],
+    "resample_pad": lambda: [effects.Resample(16000), effects.PadSilence(0.5, 0.5)],
+    "pad": lambda: [effects.PadSilence(0.5, 0.5)],
+}
+
+# Percentiles of the processing time of each task to report
+PERCENTILES = (50, 95, 99)
+
+
+@dataclass(frozen=True)
+class Corpus:
+    """Synthetic corpus of wav files."""
+
+    files: list[str]
+    duration: float
+    sample_rate: int
+    channels: int
+
+    @property
+    def audio_seconds(self) -> float:
+        """Total duration of the corpus in seconds."""
+        return len(self.files) * self.duration
+
+
+@dataclass
+class BenchResult:
+    """Result of one benchmark run."""
+
+    backend: str
+    chain: str
+    threads: int
+    files: int
+    failed: int
+    wall_s: float
+    files_per_s: float
+    audio_s_per_s: float
+    # Percentiles of the processing time of each successful task
+    latency_s: dict[str, float] = field(default_factory=dict)
+    # Peak RSS of the process of the run plus its largest worker process
+    peak_rss_mb: float | None = None
+
+    @property
+    def key(self) -> str:
+        """Identifier to match results against a baseline."""
+        return f"{self.backend}/{self.chain}"
+
+
+@dataclass(frozen=True)
+class Regression:
+    """Metric of a result that regressed against its baseline."""
+
+    key: str
+    metric: str
+    baseline: float
+    current: float
+
+    def __str__(self):
+        change = (self.current - self.baseline) / self.baseline * 100
+        return (
+            f"{self.key} {self.metric}: {self.baseline:.4g} -> "
+            f"{self.current:.4g} ({change:+.1f}%)"
+        )
+
+
+def generate_corpus(
+    directory: str,
+    n_files: int,
+    duration: float = 5.0,
+    sample_rate: int = 44100,
+    channels: int = 1,
+    seed: int = 0,
+) -> Corpus:
+    """
+    Writes a corpus of int16 wav files of noise and tones.
+
+    Args:
+        directory: Directory to write the files to.
+        n_files: Number of files.
+        duration: Duration of each file in seconds.
+        sample_rate: Sample rate in Hz.
+        channels: Number of channels.
+        seed: Random seed, so corpora are reproducible.
+
+    Returns:
+        Corpus
+    """
+    rng = np.random.default_rng(seed)
+    n_frames = int(duration * sample_rate)
+    times = np.arange(n_frames) / sample_rate
+    files = []
+    for i in range(n_files):
+        tone = np.sin(2 * np.pi * rng.uniform(100, 4000) * times)
+        shape = (n_frames,) if channels == 1 else (n_frames, channels)
+        noise = rng.normal(0, 0.1, shape)
+        data = (tone if channels == 1 else tone[:, None]) * 0.5 + noise
+        pcm = (np.clip(data, -1, 1) * 32767).astype(np.int16)
+        path = os.path.join(directory, f"bench_{i:06d}.wav")
+        wavfile.write(path, sample_rate, pcm)
+        files.append(path)
+    return Corpus(files, duration, sample_rate, channels)
+
+
+def peak_rss_mb() -> float | None:
+    """
+    Peak resident memory of this process so far, plus that of its largest
+    child process that has exited, in MB. Only meaningful in a fresh process,
+    as peaks are kept for the lifetime of the process.
+
+    Returns:
+        Peak RSS, or None if not available on this platform.
+    """
+    if resource is None:  # pragma: no cover
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak += resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    # Reported in bytes on macOS, kilobytes elsewhere
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return peak / scale
+
+
+def run_bench(
+    corpus: Corpus,
+    chain: str,
+    backend: str = "thread",
+    threads: int | None = None,
+    out_dir: str | None = None,
+    isolate: bool = True,
+) -> BenchResult:
+    """
+    Benchmarks one effect chain on one backend.
+
+    Args:
+        corpus: Corpus to process.
+        chain: Name of the effect chain in CHAINS.
+        backend: Execution backend of WaveCore.
+        threads: Number of threads or processes.
+        out_dir: Directory for outputs, defaults to a temporary directory.
+        isolate: True to run in a fresh process, measuring the peak RSS
+            of the run. False to run in this process, without peak RSS.
+
+    Returns:
+        BenchResult
+    """
+    if not isolate:
+        return _run_bench(corpus, chain, backend, threads, out_dir, False)
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(
+            _run_bench, corpus, chain, backend, threads, out_dir, True
+        ).result()
+
+
+def _run_bench(
+    corpus: Corpus,
+    chain: str,
+    backend: str,
+    threads: int | None,
+    out_dir: str | None,
+    measure_rss: bool,
+) -> BenchResult:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        out_dir = out_dir or tmp_dir
+        outputs = [os.path.join(out_dir, os.path.basename(f)) for f in corpus.files]
+        batch = Batch(corpus.files, outputs, overwrite=True).apply(*CHAINS[chain]())
+
+        latencies = []
+        failed = 0
+        with WaveCore(threads, backend=backend) as core:
+            start = time.perf_counter()
+            core.schedule(batch)
+            for result in core.yield_all(ordered=False):
+                if result.success and result.stats is not None:
+                    latencies.append(result.stats.total)
+                failed += not result.success
+            wall = time.perf_counter() - start
+
+    peak_rss = None
+    if measure_rss:
+        # Exit the workers of the process backend, so they are measured
+        shutdown_process_pools()
+        peak_rss = peak_rss_mb()
+
+    n_files = len(corpus.files)
+    return BenchResult(
+        backend=backend,
+        chain=chain,
+        threads=core.threads,
+        files=n_files,
+        failed=failed,
+        wall_s=wall,
+        files_per_s=n_files / wall,
+        audio_s_per_s=corpus.audio_seconds / wall,
+        latency_s={
+            f"p{p}": float(np.percentile(latencies, p)) if latencies else 0.0
+            for p in PERCENTILES
+        },
+        peak_rss_mb=peak_rss,
+    )
+
+
+def save_results(results: list[BenchResult], path: str) -> None:
+    """
+    Writes results as JSON.
+
+    Args:
+        results: Benchmark results.
+        path: Path of the JSON file.
+    """
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump([asdict(result) for result in results], file, indent=2)
+
+
+def load_results(path: str) -> list[BenchResult]:
+    """
+    Reads results written by save_results.
+
+    Args:
+        path: Path of the JSON file.
+
+    Returns:
+        List of BenchResult
+    """
+    with open(path, encoding="utf-8") as file:
+        return [BenchResult(**item) for item in json.load(file)]
+
+
+def compare(
+    results: list[BenchResult],
+    baseline: list[BenchResult],
+    tolerance: float = 0.1,
+) -> list[Regression]:
+    """
+    Compares results against a baseline.
+    Lower throughput, or higher p95 latency or peak RSS, beyond the
+    tolerance counts as a regression. Results without a baseline are skipped.
+
+    Args:
+        results: Current results.
+        baseline: Baseline results.
+        tolerance: Allowed relative change.
+
+    Returns:
+        List of Regression, empty if none.
+    """
+    base = {result.key: result for result in baseline}
+    regressions = []
+    for result in results:
+        ref = base.get(result.key)
+        if ref is None:
+            continue
+        # (metric, current, baseline, higher is better)
+        metrics = [
+            ("files_per_s", result.files_per_s, ref.files_per_s, True),
+            ("audio_s_per_s", result.audio_s_per_s, ref.audio_s_per_s, True),
+            (
+                "latency_p95",
+                result.latency_s.get("p95"),
+                ref.latency_s.get("p95"),
+                False,
+            ),
+            ("peak_rss_mb", result.peak_rss_mb, ref.peak_rss_mb, False),
+        ]
+        for metric, current, previous, higher_better in metrics:
+            if current is None or not previous:
+                continue
+            if higher_better:
+                regressed = current < previous * (1 - tolerance)
+            else:
+                regressed = current > previous * (1 + tolerance)
+            if regressed:
+                regressions.append(Regression(result.key, metric, previous, current))
+    return regressions
+
+
+def main(argv: t.Sequence[str] | None = None) -> int:
+    """
+    Command line entry point.
+
+    Returns:
+        Exit code, 1 if any regression was found.
+    """
+    parser = argparse.ArgumentParser(prog="nwave.bench", description=__doc__)
+    parser.add_argument("--files", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--rate", type=int, default=44100)
+    parser.add_argument("--channels", type=int, default=1)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--backend", nargs="+", default=["thread"], choices=BACKENDS)
+    parser.add_argument("--chain", nargs="+", default=list(CHAINS), choices=CHAINS)
+    parser.add_argument("--output", help="Path to write JSON results to")
+    parser.add_argument("--baseline", help="Path of JSON results to compare to")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory() as corpus_dir:
+        corpus = generate_corpus(
+            corpus_dir, args.files, args.duration, args.rate, args.channels
+        )
+        for backend in args.backend:
+            for chain in args.chain:
+                result = run_bench(corpus, chain, backend, args.threads)
+                results.append(result)
+                print(
+                    f"[{result.key}] {result.files_per_s:.1f} files/s, "
+                    f"{result.audio_s_per_s:.1f} audio s/s, "
+                    f"p95 {result.latency_s['p95'] * 1000:.1f} ms, "
+                    f"failed {result.failed}"
+                )
+
+    if args.output:
+        save_results(results, args.output)
+    if args.baseline:
+        regressions = compare(results, load_results(args.baseline), args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import typing as t
+from collections import OrderedDict
+
+K = t.TypeVar("K")
+V = t.TypeVar("V")
+
+
+class LRUCache(t.Generic[K, V]):
+    def __init__(self, maxsize: int):
+        """
+        Least recently used cache of fixed size. Not thread-safe.
+
+        Args:
+            maxsize: Maximum number of items before the oldest is evicted.
+        """
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1.")
+        self.maxsize = maxsize
+        self._items: OrderedDict[K, V] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._items
+
+    def get(self, key: K, factory: t.Callable[[], V]) -> V:
+        """
+        Get an item, creating it with factory if missing.
+
+        Args:
+            key: Key of the item.
+            factory: Callable creating the item on a miss.
+
+        Returns:
+            The cached or created item.
+        """
+        try:
+            self._items.move_to_end(key)
+            return self._items[key]
+        except KeyError:
+            pass
+        value = factory()
+        self._items[key] = value
+        if len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+        return value
+
+    def pop(self, key: K) -> V | None:
+        """
+        Remove an item.
+
+        Args:
+            key: Key of the item.
+
+        Returns:
+            The removed item, or None if missing.
+        """
+        return self._items.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove all items."""
+        self._items.clear()
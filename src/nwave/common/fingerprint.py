@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import functools
+import hashlib
+import os
+import threading
+import types
+import typing as t
+from os import PathLike
+
+import numpy as np
+
+from .cache import LRUCache
+
+if t.TYPE_CHECKING:  # pragma: no cover
+    from nwave.base import BaseEffect
+
+# Bytes read at a time when hashing file contents
+HASH_CHUNK = 1 << 20
+# Effect chain fingerprints memoized by ChainFingerprints
+CHAIN_CACHE_SIZE = 16
+
+
+class FingerprintError(TypeError):
+    """Raised for values that have no representation stable across runs."""
+
+
+def stable_repr(value: t.Any) -> str:
+    """
+    Representation of a value that is stable across processes and runs,
+    for use in fingerprints. Sets and dicts are sorted, and functions are
+    represented by their code, defaults and closure instead of their address.
+
+    Args:
+        value: Value to represent.
+
+    Returns:
+        String representation
+
+    Raises:
+        FingerprintError: If the value is represented by its address, such
+            as objects without a __repr__ of their own.
+    """
+    return _repr(value, frozenset())
+
+
+def _repr(value: t.Any, seen: frozenset[int]) -> str:
+    if id(value) in seen:
+        # Recursive closures and containers
+        return "<recursive>"
+    seen = seen | {id(value)}
+    if isinstance(value, (set, frozenset)):
+        return "{" + ", ".join(sorted(_repr(v, seen) for v in value)) + "}"
+    if isinstance(value, dict):
+        items = sorted((_repr(k, seen), _repr(v, seen)) for k, v in value.items())
+        return "{" + ", ".join(f"{k}: {v}" for k, v in items) + "}"
+    if isinstance(value, (list, tuple)):
+        return "[" + ", ".join(_repr(v, seen) for v in value) + "]"
+    if isinstance(value, np.ndarray):
+        # Equal bytes of another dtype or shape are another array
+        digest = hashlib.sha256(value.tobytes()).hexdigest()
+        return f"ndarray({value.dtype.str}, {value.shape}, {digest})"
+    if isinstance(value, np.dtype):
+        return value.str
+    if callable(value):
+        return _callable_repr(value, seen)
+    return _object_repr(value, seen)
+
+
+def _name(value: t.Any) -> str:
+    module = getattr(value, "__module__", None)
+    name = getattr(value, "__qualname__", None) or getattr(value, "__name__", None)
+    return f"{module}.{name or type(value).__qualname__}"
+
+
+def _callable_repr(value: t.Callable, seen: frozenset[int]) -> str:
+    if isinstance(value, functools.partial):
+        params = _repr((value.func, value.args, value.keywords), seen)
+        return f"functools.partial{params}"
+    if isinstance(value, types.MethodType):
+        return f"method{_repr((value.__self__, value.__func__), seen)}"
+    if isinstance(value, types.FunctionType):
+        cells = []
+        for cell in value.__closure__ or ():
+            try:
+                cells.append(cell.cell_contents)
+            except ValueError:
+                # Cell of a variable not assigned yet
+                cells.append(None)
+        params = _repr((value.__defaults__, value.__kwdefaults__, cells), seen)
+        return f"{_name(value)}({_code_digest(value.__code__)}){params}"
+    if isinstance(value, (type, types.BuiltinFunctionType, np.ufunc)):
+        # Compiled code is identified by name, methods of objects
+        # also by their object
+        owner = getattr(value, "__self__", None)
+        if owner is None or isinstance(owner, types.ModuleType):
+            return _name(value)
+        return f"{_name(value)}{_repr(owner, seen)}"
+    # Numba dispatchers and functions decorated with functools.wraps
+    inner = getattr(value, "py_func", None) or getattr(value, "__wrapped__", None)
+    if inner is not None:
+        return f"{_name(value)}({_repr(inner, seen)})"
+    return _object_repr(value, seen)
+
+
+def _object_repr(value: t.Any, seen: frozenset[int]) -> str:
+    if type(value).__repr__ is object.__repr__:
+        # Objects without a repr of their own by their attributes
+        attributes = getattr(value, "__dict__", None)
+        if attributes is None or hasattr(type(value), "__slots__"):
+            raise FingerprintError(f"Cannot fingerprint {type(value).__qualname__}")
+        return f"{_name(type(value))}{_repr(attributes, seen)}"
+    text = repr(value)
+    if " at 0x" in text:
+        raise FingerprintError(f"Cannot fingerprint {type(value).__qualname__}")
+    return text
+
+
+def _code_digest(code: types.CodeType) -> str:
+    """Hash of the bytecode, constants and names of a code object."""
+    digest = hashlib.sha256(code.co_code)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            # Nested functions and comprehensions
+            digest.update(_code_digest(const).encode("utf-8"))
+        else:
+            digest.update(stable_repr(const).encode("utf-8"))
+    digest.update(repr(code.co_names).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def chain_fingerprint(effects: t.Iterable[BaseEffect]) -> str:
+    """
+    Fingerprint of the parameters of an effect chain.
+
+    Args:
+        effects: Effect chain.
+
+    Returns:
+        Hex digest
+
+    Raises:
+        FingerprintError: If the parameters of an effect cannot be fingerprinted.
+    """
+    digest = hashlib.sha256()
+    for effect in effects:
+        digest.update(effect.fingerprint.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class ChainFingerprints:
+    def __init__(self, maxsize: int = CHAIN_CACHE_SIZE):
+        """
+        Thread-safe memo of chain_fingerprint, keyed by the identity of the
+        chain, as the tasks of a batch share one effect list.
+        Effect lists must not be modified after they are fingerprinted.
+        Chains that cannot be fingerprinted have the fingerprint None,
+        and are never cached or recorded as done.
+
+        Args:
+            maxsize: Number of chains to keep.
+        """
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._chains: LRUCache[int, tuple[list, str | None]] = LRUCache(maxsize)
+
+    def __getstate__(self):
+        # Chains are keyed by ids local to this process
+        return {"maxsize": self.maxsize}
+
+    def __setstate__(self, state):
+        self.__init__(state["maxsize"])
+
+    def __call__(self, effects: list[BaseEffect]) -> str | None:
+        with self._lock:
+            # Keep a reference to the chain so its id is not reused
+            _, fingerprint = self._chains.get(
+                id(effects), lambda: (effects, _try_fingerprint(effects))
+            )
+        return fingerprint
+
+
+def _try_fingerprint(effects: list[BaseEffect]) -> str | None:
+    try:
+        return chain_fingerprint(effects)
+    except FingerprintError:
+        return None
+
+
+def source_fingerprint(path: str | PathLike, fast: bool = False) -> str:
+    """
+    Fingerprint of a source file.
+
+    Args:
+        path: Path of the file.
+        fast: True to use the size and modification time instead of
+            hashing the contents.
+
+    Returns:
+        Fingerprint string
+    """
+    if fast:
+        stat = os.stat(path)
+        return f"{stat.st_size}:{stat.st_mtime_ns}"
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -1,34 +1,251 @@
 from __future__ import annotations
 
 import os
+import threading
 import time
 import typing as t
 from collections import deque
-from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from concurrent.futures import TimeoutError as FuturesTimeout
+from concurrent.futures import wait
+from functools import partial
+from pathlib import Path
+from queue import Empty, SimpleQueue
 
-from nwave.audio import process
+from nwave.audio import process, process_array, process_group
 from nwave.common.iter import SizedGenerator
-from nwave.task import Task, TaskResult
+from nwave.hooks import Hook, HookList
+from nwave.interlocked import sync_dirs
+from nwave.plan import plan_chain
+from nwave.probe import ESTIMATES, estimate_cost
+from nwave.stats import Report, StatsCollector
+from nwave.task import ArrayResult, ArrayTask, Task, TaskResult
 
-if t.TYPE_CHECKING:
-    from .batch import Batch  # pragma: no cover
+if t.TYPE_CHECKING:  # pragma: no cover
+    from numpy.typing import NDArray
+
+    from .base import BaseEffect
+    from .batch import Batch
+
+BACKENDS = ("thread", "process", "auto")
+# Submission orders of scheduled batches
+POLICIES = ("fifo", "lpt", "spt")
+
+# Process pools are shared between WaveCore instances so workers stay warm
+_process_pools: dict[int, ProcessPoolExecutor] = {}
+_process_pools_lock = threading.Lock()
+
+
+def _warm_worker() -> None:
+    """
+    Initializer for process pool workers.
+    Imports the effect stack once per worker instead of once per task.
+    """
+    import nwave.effects  # noqa: F401 pylint: disable=import-outside-toplevel
+
+
+def get_process_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Gets a warm process pool with the given number of workers,
+    creating it if it does not exist or has broken.
+
+    Args:
+        workers: Number of worker processes.
+
+    Returns:
+        ProcessPoolExecutor
+    """
+    with _process_pools_lock:
+        pool = _process_pools.get(workers)
+        if pool is None or getattr(pool, "_broken", False):
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=_warm_worker)
+            _process_pools[workers] = pool
+        return pool
+
+
+def shutdown_process_pools(wait_exit: bool = True) -> None:
+    """
+    Shuts down all shared process pools.
+
+    Args:
+        wait_exit: Whether to wait for running tasks to finish.
+    """
+    with _process_pools_lock:
+        for pool in _process_pools.values():
+            pool.shutdown(wait=wait_exit)
+        _process_pools.clear()
+
+
+def _put_done(done: SimpleQueue, task: Task | ArrayTask, future: Future) -> None:
+    """Done callback, queues a finished future with its task."""
+    done.put((future, task))
+
+
+def _cancel_group(group: Future, child: Future) -> None:
+    """Done callback of a grouped task, cancels the group with the task."""
+    if child.cancelled():
+        group.cancel()
+
+
+def _resolve_group(children: list[Future], group: Future) -> None:
+    """Done callback of a micro-batch, resolves the futures of its tasks."""
+    if group.cancelled():
+        for child in children:
+            child.cancel()
+        return
+    exception = group.exception()
+    outcomes = [exception] * len(children) if exception else group.result()
+    for child, outcome in zip(children, outcomes):
+        if not child.set_running_or_notify_cancel():
+            continue
+        if isinstance(outcome, BaseException):
+            child.set_exception(outcome)
+        else:
+            child.set_result(outcome)
+
+
+class _Backlog:
+    """Lazily consumed queue of task sources awaiting submission."""
+
+    def __init__(self) -> None:
+        # Pairs of [task iterator, remaining count or None if unknown]
+        self._sources: deque[list] = deque()
+
+    def __len__(self) -> int:
+        # Sources of unknown size count as one task until exhausted
+        return sum(1 if n is None else n for _, n in self._sources)
+
+    def push(
+        self, tasks: t.Iterable[Task | ArrayTask], size: int | None = None
+    ) -> None:
+        """
+        Add a source of tasks.
+
+        Args:
+            tasks: Iterable of tasks, consumed lazily.
+            size: Number of tasks, or None if unknown.
+        """
+        self._sources.append([iter(tasks), size])
+
+    def pop(self) -> Task | ArrayTask | None:
+        """
+        Take the next task.
+
+        Returns:
+            Next task, or None if the backlog is empty.
+        """
+        while self._sources:
+            source = self._sources[0]
+            task = next(source[0], None)
+            if task is None:
+                self._sources.popleft()
+                continue
+            if source[1] is not None:
+                source[1] = max(0, source[1] - 1)
+            return task
+        return None
+
+    def clear(self) -> None:
+        """Drop all remaining sources."""
+        self._sources.clear()
+
+
+class _Progress:
+    """Sized total for yield_all, grows as lazy sources are consumed."""
+
+    def __init__(self, core: WaveCore) -> None:
+        self.core = core
+        self.yielded = 0
+
+    def __len__(self) -> int:
+        return self.yielded + self.core.n_tasks
 
 
 class WaveCore:
-    def __init__(self, threads: int = None, exit_wait: bool = True):
+    def __init__(
+        self,
+        threads: int = None,
+        exit_wait: bool = True,
+        backend: str = "thread",
+        max_pending: int | None = None,
+        hooks: t.Iterable[Hook] = (),
+        micro_batch: int | None = None,
+        policy: str = "fifo",
+        estimate: str = "size",
+    ):
         """
         Processor for wave tasks.
 
         Args:
-            threads: Number of threads to use.
-                Defaults to min(32, os.cpu_count() + 4)
+            threads: Number of threads (or processes) to use.
+                Defaults to min(32, os.cpu_count() + 4) for threads,
+                and os.cpu_count() for processes.
             exit_wait: Whether to wait for all tasks to finish before exiting context.
+            backend: Execution backend, one of 'thread', 'process' or 'auto'.
+                The process backend requires picklable effects, and shares
+                warm worker processes between WaveCore instances. The auto
+                backend runs tasks whose effects all release the GIL on
+                threads, and other tasks on processes, see
+                BaseEffect.releases_gil.
+            max_pending: High-water mark of tasks submitted to the executor.
+                Further tasks are submitted as results are consumed, so memory
+                stays flat for large or lazily generated batches.
+                None to submit all tasks on schedule.
+            hooks: Hooks notified of task events, see nwave.hooks.Hook.
+            micro_batch: Number of file tasks to process together in one
+                executor call, running each effect once on stacked clips of
+                the same sample rate and shape, see audio.process_group.
+                Tasks must share one effect chain, as tasks of a Batch do.
+                Best for many short clips. None to process tasks one by one.
+            policy: Submission order of the tasks of each scheduled batch.
+                'fifo' in batch order, 'lpt' longest first to shorten the
+                total time of batches mixing short and long files, or 'spt'
+                shortest first for the lowest latency of most results.
+                Ordering consumes lazy batches when scheduled.
+            estimate: Cost of tasks for ordering, 'size' for the size of the
+                source, or 'duration' read from its header, see
+                nwave.probe.estimate_cost.
         """
         super().__init__()
-        # Use new default threads algorithm (default for Py 3.8+)
-        self.threads = threads or min(32, (os.cpu_count() or 1) + 4)
+        if backend not in BACKENDS:
+            raise ValueError(f"Invalid backend: {backend}. Must be one of {BACKENDS}")
+        self.backend = backend
+        if backend == "process":
+            self.threads = threads or os.cpu_count() or 1
+        else:
+            # Use new default threads algorithm (default for Py 3.8+)
+            self.threads = threads or min(32, (os.cpu_count() or 1) + 4)
+        if max_pending is not None and max_pending < 1:
+            raise ValueError("max_pending must be at least 1.")
+        if micro_batch is not None and micro_batch < 1:
+            raise ValueError("micro_batch must be at least 1.")
+        if policy not in POLICIES:
+            raise ValueError(f"Invalid policy: {policy}. Must be one of {POLICIES}")
+        if estimate not in ESTIMATES:
+            raise ValueError(
+                f"Invalid estimate: {estimate}. Must be one of {ESTIMATES}"
+            )
         self.exit_wait = exit_wait
-        self._task_queue: deque[tuple[Future, Task]] = deque()
+        self.max_pending = max_pending
+        self.micro_batch = micro_batch
+        self.policy = policy
+        self.estimate = estimate
+        self._executor: Executor
+        # Process pool of the auto backend, created on first use
+        self._process_executor: Executor | None = None
+        self._backlog = _Backlog()
+        self.stats = StatsCollector()
+        self.hooks = HookList(hooks)
+        self._task_queue: deque[tuple[Future, Task | ArrayTask]] = deque()
+        # Futures being awaited by completion order
+        self._in_flight: dict[Future, Task | ArrayTask] = {}
+        # Outputs with directories to fsync once the results are consumed
+        self._written: list[Path] = []
 
     def __enter__(self) -> WaveCore:
         """
@@ -37,9 +254,12 @@ class WaveCore:
         Returns:
             WaveCore
         """
-        self._executor = ThreadPoolExecutor(
-            max_workers=self.threads, thread_name_prefix="WaveCore"
-        )
+        if self.backend == "process":
+            self._executor = get_process_pool(self.threads)
+        else:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.threads, thread_name_prefix="WaveCore"
+            )
         return self
 
     def __exit__(self, exc_type, exc_value, traceback) -> None:
@@ -51,31 +271,152 @@ class WaveCore:
             exc_value: Exception value
             traceback: Traceback
         """
-        self._executor.shutdown(wait=self.exit_wait)
+        if self.backend != "thread":
+            # Shared pool stays alive, only settle our own tasks
+            futures = [future for future, _ in self._task_queue]
+            futures.extend(self._in_flight)
+            if self.exit_wait:
+                wait(futures)
+            else:
+                for future in futures:
+                    future.cancel()
+        if self.backend != "process":
+            self._executor.shutdown(wait=self.exit_wait)
 
     @property
     def n_tasks(self) -> int:
         """
-        Number of tasks currently in queue
+        Number of tasks currently in queue, including tasks not yet submitted.
+        Batches of unknown size count as one task until exhausted.
 
         Returns:
             Number of tasks currently in queue
         """
-        return len(self._task_queue)
+        return self.n_submitted + len(self._backlog)
+
+    @property
+    def n_submitted(self) -> int:
+        """
+        Number of tasks submitted to the executor and not yet yielded
+
+        Returns:
+            Number of submitted tasks
+        """
+        return len(self._task_queue) + len(self._in_flight)
 
     def schedule(self, batch: Batch) -> None:
         """
         Submit a batch of tasks to the scheduler.
 
         Args:
-            batch: Batch to schedule for running.
+            batch: Batch to schedule for running. The manifest of the batch,
+                if any, is registered as a hook to record completed tasks.
+
+        Raises:
+            PathCollisionError: If outputs of the batch collide.
         """
-        self._task_queue.extend(
-            [(self._executor.submit(process, task), task) for task in batch.tasks]
+        if batch.plan_paths:
+            batch.prepare()
+        manifest = batch.manifest
+        if manifest is not None and manifest not in self.hooks.hooks:
+            self.add_hook(manifest)
+        self._backlog.push(*self._order(batch))
+        self._fill()
+
+    def _order(self, batch: Batch) -> tuple[t.Iterable[Task], int | None]:
+        """Tasks of a batch in the order of the policy, with their number."""
+        if self.policy == "fifo":
+            return batch.iter_tasks(), batch.size
+        tasks = list(batch.iter_tasks())
+        costs = [estimate_cost(task, self.estimate) for task in tasks]
+        # Stable, so tasks of equal cost keep their batch order
+        order = sorted(
+            range(len(tasks)), key=costs.__getitem__, reverse=self.policy == "lpt"
         )
+        return [tasks[i] for i in order], len(tasks)
+
+    def _fill(self) -> None:
+        """Submits tasks from the backlog up to the high-water mark."""
+        group: list[Task] = []
+        while (
+            self.max_pending is None or self.n_submitted + len(group) < self.max_pending
+        ):
+            task = self._backlog.pop()
+            if task is None:
+                break
+            if self.micro_batch and isinstance(task, Task):
+                if group and task.effects is not group[0].effects:
+                    # Groups share one effect chain
+                    self._submit_group(group)
+                    group = []
+                group.append(task)
+                if len(group) >= self.micro_batch:
+                    self._submit_group(group)
+                    group = []
+                continue
+            if group:
+                self._submit_group(group)
+                group = []
+            self._task_queue.append((self._submit(task), task))
+        if group:
+            self._submit_group(group)
+
+    def _submit_group(self, tasks: list[Task]) -> None:
+        """
+        Submits tasks as one micro-batch, queueing a child future per task
+        that is resolved when the group finishes.
+        """
+        if len(tasks) == 1:
+            self._task_queue.append((self._submit(tasks[0]), tasks[0]))
+            return
+        executor = self._executor_for(tasks[0])
+        if self.hooks:
+            for task in tasks:
+                self.hooks.on_schedule(task)
+            worker_hook = self.hooks if self._threaded(tasks[0]) else None
+            future = executor.submit(process_group, tasks, worker_hook)
+        else:
+            future = executor.submit(process_group, tasks)
+        children: list[Future] = [Future() for _ in tasks]
+        for child, task in zip(children, tasks):
+            # Cancelling any task cancels the group if it has not started
+            child.add_done_callback(partial(_cancel_group, future))
+            self._task_queue.append((child, task))
+        future.add_done_callback(partial(_resolve_group, children))
+
+    def _submit(self, task: Task | ArrayTask) -> Future:
+        """Submits a task to the executor, notifying hooks."""
+        # Both take (task, hook), one type for either branch
+        fn: t.Callable[..., t.Any] = (
+            process_array if isinstance(task, ArrayTask) else process
+        )
+        executor = self._executor_for(task)
+        if not self.hooks:
+            return executor.submit(fn, task)
+        self.hooks.on_schedule(task)
+        # Hooks are not sent to worker processes, events are replayed
+        worker_hook = self.hooks if self._threaded(task) else None
+        return executor.submit(fn, task, worker_hook)
+
+    def _threaded(self, task: Task | ArrayTask) -> bool:
+        """Whether a task runs on a thread rather than a worker process."""
+        if self.backend == "auto":
+            return all(effect.releases_gil for effect in task.effects)
+        return self.backend == "thread"
+
+    def _executor_for(self, task: Task | ArrayTask) -> Executor:
+        """Executor to run a task on."""
+        if self.backend != "auto" or self._threaded(task):
+            return self._executor
+        if self._process_executor is None:
+            self._process_executor = get_process_pool(os.cpu_count() or 1)
+        return self._process_executor
 
     def yield_all(
-        self, timeout: float | None = None, per_task_timeout: bool = False
+        self,
+        timeout: float | None = None,
+        per_task_timeout: bool = False,
+        ordered: bool = True,
     ) -> SizedGenerator:
         """
         Iterator for all scheduled tasks
@@ -85,36 +426,200 @@ class WaveCore:
                 Set to 0 to cancel all in-progress tasks.
             per_task_timeout: True to apply timeout to each task,
                 False to apply to entire batch.
+            ordered: True to yield results in submission order,
+                False to yield results as tasks finish. When unordered,
+                a per task timeout limits the wait for the next result.
 
         Returns:
             Sized Generator of TaskResult
         """
 
-        def gen() -> t.Generator[TaskResult, None, None]:
+        def remaining(end_time: float) -> float | None:
+            if timeout is None:
+                return None
+            if per_task_timeout:
+                return timeout
+            return max(0.0, end_time - time.monotonic())
+
+        def gen_ordered() -> t.Generator[TaskResult, None, None]:
             end_time = (timeout or 0) + time.monotonic()
 
-            try:
+            while self._task_queue:
+                future: Future
+                task: Task | ArrayTask
+                future, task = self._task_queue.popleft()
+                # Keep the executor busy while waiting on this result
+                self._fill()
+
+                if timeout is not None and not per_task_timeout:
+                    task_exception = future.exception(end_time - time.monotonic())
+                else:
+                    task_exception = future.exception(timeout)
+
+                progress.yielded += 1
+                yield self._collect(future, task, task_exception)
+
+        def gen_unordered() -> t.Generator[TaskResult, None, None]:
+            end_time = (timeout or 0) + time.monotonic()
+            done: SimpleQueue[tuple[Future, Task | ArrayTask]] = SimpleQueue()
+
+            while True:
+                # Track newly queued futures by completion
+                self._fill()
                 while self._task_queue:
-                    future: Future
-                    task: Task
                     future, task = self._task_queue.popleft()
+                    self._in_flight[future] = task
+                    future.add_done_callback(partial(_put_done, done, task))
+                if not self._in_flight:
+                    return
 
-                    if timeout is not None and not per_task_timeout:
-                        task_exception = future.exception(end_time - time.monotonic())
-                    else:
-                        task_exception = future.exception(timeout)
+                try:
+                    future, task = done.get(timeout=remaining(end_time))
+                except Empty as ex:
+                    raise FuturesTimeout() from ex
+                del self._in_flight[future]
+                progress.yielded += 1
+                yield self._collect(future, task, future.exception(0))
 
-                    if task_exception is None:
-                        yield TaskResult(task, None)
-                    else:
-                        yield TaskResult(task, task_exception)
+        def gen() -> t.Generator[TaskResult, None, None]:
+            try:
+                yield from gen_ordered() if ordered else gen_unordered()
             finally:
                 # Cancel all remaining tasks
                 for future, task in self._task_queue:
                     future.cancel()
+                for future in self._in_flight:
+                    future.cancel()
                 self._task_queue.clear()
+                self._in_flight.clear()
+                self._backlog.clear()
+                self.sync()
+
+        progress = _Progress(self)
+        return SizedGenerator(gen(), progress)
+
+    def _collect(
+        self,
+        future: Future,
+        task: Task | ArrayTask,
+        task_exception: BaseException | None,
+    ) -> TaskResult:
+        """Create the result of a finished future, adding it to the stats."""
+        result: TaskResult
+        if isinstance(task, ArrayTask):
+            if task_exception is None:
+                data, sample_rate, stats = future.result()
+                result = ArrayResult(task, None, stats, data, sample_rate)
+            else:
+                result = ArrayResult(task, task_exception)
+        elif task_exception is None:
+            result = TaskResult(task, None, future.result())
+        else:
+            result = TaskResult(task, task_exception)
+        self.stats.add(result)
+        if result.success and isinstance(task, Task) and task.write_options:
+            if task.write_options.fsync == "batch":
+                self._written.append(task.file_output)
+
+        if self.hooks:
+            if not self._threaded(task) and result.stats is not None:
+                self.hooks.on_start(task)
+                for stage, elapsed in result.stats.stages():
+                    self.hooks.on_stage_end(task, stage, elapsed)
+            if result.success:
+                self.hooks.on_complete(result)
+            else:
+                self.hooks.on_error(result)
+        return result
+
+    def map_arrays(
+        self,
+        items: t.Iterable[tuple[NDArray, float]],
+        effects: t.Sequence[BaseEffect],
+        ordered: bool = True,
+        optimize: bool = True,
+    ) -> SizedGenerator:
+        """
+        Process in-memory arrays with an effect chain, without disk round trips.
+        Tasks already scheduled are run and yielded as well.
+
+        Args:
+            items: Iterable of (data, sample rate), consumed lazily.
+            effects: Effect chain to apply to each item.
+            ordered: True to yield results in input order,
+                False to yield results as they finish.
+            optimize: Whether to simplify the effect chain once before running.
+
+        Returns:
+            Sized Generator of ArrayResult
+        """
+        chain = plan_chain(effects) if optimize else list(effects)
+        tasks = (
+            ArrayTask(data, sample_rate, chain, f"<array {i}>")
+            for i, (data, sample_rate) in enumerate(items)
+        )
+        return self._map(tasks, items, ordered)
+
+    def map_bytes(
+        self,
+        items: t.Iterable[bytes],
+        effects: t.Sequence[BaseEffect],
+        ordered: bool = True,
+        optimize: bool = True,
+    ) -> SizedGenerator:
+        """
+        Process in-memory wav files with an effect chain, returning wav bytes.
+        Tasks already scheduled are run and yielded as well.
+
+        Args:
+            items: Iterable of wav file contents, consumed lazily.
+            effects: Effect chain to apply to each item.
+            ordered: True to yield results in input order,
+                False to yield results as they finish.
+            optimize: Whether to simplify the effect chain once before running.
+
+        Returns:
+            Sized Generator of ArrayResult, with wav bytes as data
+        """
+        chain = plan_chain(effects) if optimize else list(effects)
+        tasks = (
+            ArrayTask(data, None, chain, f"<bytes {i}>") for i, data in enumerate(items)
+        )
+        return self._map(tasks, items, ordered)
+
+    def _map(
+        self, tasks: t.Iterable[ArrayTask], items: t.Iterable, ordered: bool
+    ) -> SizedGenerator:
+        """Schedules in-memory tasks created from items and yields all results."""
+        self._backlog.push(tasks, len(items) if isinstance(items, t.Sized) else None)
+        self._fill()
+        return self.yield_all(ordered=ordered)
 
-        return SizedGenerator(gen(), len(self._task_queue))
+    def sync(self) -> None:
+        """
+        Fsync the directories of outputs written with the 'batch' fsync policy,
+        once each. Called when yield_all finishes.
+        """
+        written, self._written = self._written, []
+        sync_dirs(written)
+
+    def add_hook(self, hook: Hook) -> None:
+        """
+        Register a hook for task events.
+
+        Args:
+            hook: Hook to register
+        """
+        self.hooks.append(hook)
+
+    def report(self) -> Report:
+        """
+        Aggregate report of all results yielded so far.
+
+        Returns:
+            Report of totals, per stage percentiles and the slowest files
+        """
+        return self.stats.report()
 
     def wait_all(self, timeout: float = None) -> list[TaskResult]:
         """
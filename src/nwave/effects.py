@@ -1,16 +1,131 @@
 from __future__ import annotations
 
+import inspect
 import numbers
-from typing import Callable
+import threading
+from typing import Callable, Tuple
 
 import librosa
 import numpy as np
 import soxr
 from numpy.typing import NDArray
 
-from nwave.base import BaseEffect
+from nwave import kernels
+from nwave.base import BaseEffect, EffectStream
+from nwave.common.cache import LRUCache
+from nwave.common.fingerprint import stable_repr
 
-__all__ = ["Wrapper", "Resample", "PadSilence"]
+__all__ = [
+    "Wrapper",
+    "Resample",
+    "PadSilence",
+    "Gain",
+    "Normalize",
+    "RemoveDC",
+    "Fade",
+    "Mixdown",
+    "Convert",
+]
+
+# Data types supported by soxr
+SOXR_DTYPES = {np.dtype(t) for t in ("float32", "float64", "int16", "int32")}
+
+# soxr qualities from lowest to highest
+QUALITY_ORDER = ("QQ", "LQ", "MQ", "HQ", "VHQ")
+
+# Resampler engines of float data kept per thread,
+# keyed by (in, out, quality, channels, dtype)
+RESAMPLER_CACHE_SIZE = 16
+ResamplerKey = Tuple[float, float, str, int, str]
+_resampler_local = threading.local()
+
+
+def get_resampler(key: ResamplerKey) -> soxr.ResampleStream:
+    """
+    Get a soxr resampler from the cache of the current thread,
+    creating it on a miss. The resampler must be cleared after use.
+
+    Args:
+        key: (in_rate, out_rate, quality, channels, dtype)
+
+    Returns:
+        soxr.ResampleStream
+    """
+    cache = getattr(_resampler_local, "cache", None)
+    if cache is None:
+        cache = _resampler_local.cache = LRUCache(RESAMPLER_CACHE_SIZE)
+    in_rate, out_rate, quality, channels, dtype = key
+    return cache.get(
+        key,
+        lambda: soxr.ResampleStream(in_rate, out_rate, channels, dtype, quality),
+    )
+
+
+def drop_resampler(key: ResamplerKey) -> None:
+    """
+    Remove a resampler from the cache of the current thread.
+
+    Args:
+        key: (in_rate, out_rate, quality, channels, dtype)
+    """
+    cache = getattr(_resampler_local, "cache", None)
+    if cache is not None:
+        cache.pop(key)
+
+
+def _same_view(a: NDArray, b: NDArray) -> bool:
+    """Whether two arrays view the same memory with the same layout."""
+    return (
+        a.__array_interface__["data"][0] == b.__array_interface__["data"][0]
+        and a.shape == b.shape
+        and a.strides == b.strides
+        and a.dtype == b.dtype
+    )
+
+
+class _Passthrough(EffectStream):
+    """Stream that returns blocks unchanged."""
+
+    def process(self, block: NDArray, last: bool) -> NDArray:
+        return block
+
+
+class _ResampleStream(EffectStream):
+    """Stream resampling blocks with a stateful soxr resampler."""
+
+    def __init__(
+        self, resampler: soxr.ResampleStream, sample_rate: float, dtype: np.dtype
+    ):
+        super().__init__(sample_rate, dtype)
+        self._resampler = resampler
+
+    def process(self, block: NDArray, last: bool) -> NDArray:
+        block = block.astype(self.dtype, copy=False)
+        return self._resampler.resample_chunk(block, last=last)
+
+
+class _PadStream(EffectStream):
+    """Stream adding silence before the first and after the last block."""
+
+    def __init__(self, pad_start: int, pad_end: int, sample_rate: float):
+        super().__init__(sample_rate)
+        self._pad_start = pad_start
+        self._pad_end = pad_end
+        self._started = False
+
+    def process(self, block: NDArray, last: bool) -> NDArray:
+        pad_s = 0 if self._started else self._pad_start
+        pad_e = self._pad_end if last else 0
+        self._started = True
+        if not pad_s and not pad_e:
+            return block
+        out = np.full(
+            (pad_s + len(block) + pad_e,) + block.shape[1:],
+            kernels.midpoint(block.dtype),
+            block.dtype,
+        )
+        out[pad_s : pad_s + len(block)] = block
+        return out
 
 
 class Wrapper(BaseEffect):
@@ -20,12 +135,15 @@ class Wrapper(BaseEffect):
         data_arg: str | None = None,
         sr_arg: str | None = None,
         output_sr_override: float | None = None,
+        releases_gil: bool = False,
         **kwargs,
     ) -> None:
         """
         Wrapper for any Callable as an Audio Effect. The function
         must return a NDArray or a 2 length tuple containing a NDArray
         and a float or int as the sample rate.
+        Safe to apply from several threads at once, as arguments are
+        built per call.
 
         Args:
             callable: Callable to wrap
@@ -34,21 +152,60 @@ class Wrapper(BaseEffect):
             sr_arg: Name of the sample rate keyword argument of type float
             output_sr_override: Define a fixed output expected sample rate
                 for cases where only one element of NDArray is returned
+            releases_gil: Whether the callable releases the GIL, such as
+                numba nogil functions or most numpy operations on large
+                arrays, so the auto backend of WaveCore runs it on threads.
             kwargs: Additional keyword arguments to pass to the callable
+
+        Raises:
+            TypeError: If the callable does not accept the arguments.
         """
         super().__init__()
         # Check if callable
         if not callable(function):
             raise TypeError(f"Expected Callable, got {type(function)}")
         self._function = function
-        self._kwargs = kwargs  # Store kwargs to pass to function
+        self._kwargs = kwargs  # Store kwargs to pass to function, never modified
         self._data_arg = data_arg
         self._sr_arg = sr_arg
         self._output_sr_override = output_sr_override
+        self.releases_gil = releases_gil
+        self._check_signature()
+
+    def _check_signature(self) -> None:
+        """Binds the arguments of a call once, to fail on construction."""
+        per_call = {name: None for name in (self._data_arg, self._sr_arg) if name}
+        if per_call.keys() & self._kwargs.keys():
+            raise TypeError("data_arg and sr_arg cannot also be given as kwargs")
+        try:
+            signature = inspect.signature(self._function)
+        except (TypeError, ValueError):
+            # Not introspectable, e.g. some builtins and ufuncs
+            return
+        args = () if self._data_arg else (None,)
+        signature.bind(*args, **self._kwargs, **per_call)
+
+    @property
+    def fingerprint(self) -> str:
+        # Functions are identified by their code, defaults and closure,
+        # partials by their function and arguments
+        params = stable_repr(
+            (
+                self._function,
+                self._kwargs,
+                self._data_arg,
+                self._sr_arg,
+                self._output_sr_override,
+            )
+        )
+        return f"{type(self).__module__}.{type(self).__qualname__}{params}"
 
     def apply(self, data: NDArray, sr: float) -> tuple[NDArray, float]:
-        # Add the data and sr keyword arguments
+        # Add the data and sr keyword arguments to a copy per call,
+        # the stored kwargs are shared by all threads applying the effect
         kwargs = self._kwargs
+        if self._data_arg or self._sr_arg:
+            kwargs = dict(kwargs)
         if self._sr_arg:
             kwargs[self._sr_arg] = sr
         if self._data_arg:
@@ -82,35 +239,107 @@ class Wrapper(BaseEffect):
 
 
 class Resample(BaseEffect):
-    def __init__(self, sample_rate: int, quality: str = "HQ") -> None:
+    releases_gil = True
+
+    def __init__(
+        self, sample_rate: int, quality: str = "HQ", dtype: str | None = None
+    ) -> None:
         """
         Resamples the audio to a new sample rate.
 
         Args:
             sample_rate: Target Sample Rate in Hz.
             quality: Resample Quality (One of 'QQ', 'LQ', 'MQ', 'HQ', 'VHQ')
+            dtype: Floating point precision to resample float input in
+                ('float32' or 'float64'). None keeps the input dtype, so float32
+                stays float32. Integer input is always resampled natively.
         """
         super().__init__()
         self.sample_rate = sample_rate
         self.quality = quality
-        self.qualities = {"QQ", "LQ", "MQ", "HQ", "VHQ"}
+        self.dtype = None if dtype is None else np.dtype(dtype)
+        self.qualities = set(QUALITY_ORDER)
         if not isinstance(self.sample_rate, numbers.Real) or self.sample_rate <= 0:
             raise ValueError("Sample rate must be a positive real number.")
         if self.quality not in self.qualities:
             raise ValueError(
                 f"Invalid quality: {self.quality}. Must be one of {self.qualities}"
             )
+        if self.dtype is not None and self.dtype.kind != "f":
+            raise ValueError(f"Invalid dtype: {self.dtype}. Must be a float type.")
+
+    def fuse(self, other: BaseEffect) -> BaseEffect | None:
+        # Only fuse if the intermediate rate keeps the bandwidth of the output
+        if not isinstance(other, Resample) or self.sample_rate < other.sample_rate:
+            return None
+        quality = max(self.quality, other.quality, key=QUALITY_ORDER.index)
+        dtype = other.dtype if other.dtype is not None else self.dtype
+        return Resample(
+            other.sample_rate, quality, None if dtype is None else dtype.name
+        )
+
+    def unchanged_for(self, sr: float, channels: int, dtype: np.dtype) -> bool:
+        return sr == self.sample_rate
+
+    def _work_dtype(self, dtype: np.dtype) -> np.dtype:
+        """Data type that input of the given dtype is resampled in."""
+        if self.dtype is not None and dtype.kind == "f":
+            return self.dtype
+        return dtype
 
     def apply(self, data, sr) -> tuple[NDArray, float]:
         if sr == self.sample_rate:
             return data, sr  # Skip processing if already at target sample rate
-        return (
-            soxr.resample(data, in_rate=sr, out_rate=self.sample_rate),
-            self.sample_rate,
+        data = data.astype(self._work_dtype(data.dtype), copy=False)
+        if data.dtype not in SOXR_DTYPES or data.dtype.kind != "f":
+            # Integer output is dithered, and the dither state of a cached
+            # resampler survives clear(), so integers are resampled one-shot.
+            # Unsupported types are reported by soxr.
+            return (
+                soxr.resample(
+                    data, in_rate=sr, out_rate=self.sample_rate, quality=self.quality
+                ),
+                self.sample_rate,
+            )
+
+        # Reuse the filter of a cached resampler, reset between files
+        channels = 1 if data.ndim == 1 else data.shape[1]
+        key = (sr, self.sample_rate, self.quality, channels, data.dtype.name)
+        resampler = get_resampler(key)
+        try:
+            result = resampler.resample_chunk(data, last=True)
+            resampler.clear()
+        except Exception:
+            drop_resampler(key)
+            raise
+        return result, self.sample_rate
+
+    def apply_batch(self, data: NDArray, sr: float) -> tuple[NDArray, float]:
+        if sr == self.sample_rate:
+            return data, sr
+        # Resample all clips at once as the channels of one signal,
+        # integer output may differ from apply by rounding
+        n_clips, n_frames = data.shape[:2]
+        channels = np.moveaxis(data, 0, -1).reshape(n_frames, -1)
+        result, sr = self.apply(np.ascontiguousarray(channels), sr)
+        result = result.reshape((len(result),) + data.shape[2:] + (n_clips,))
+        return np.ascontiguousarray(np.moveaxis(result, -1, 0)), sr
+
+    def stream(self, sr: float, channels: int, dtype: np.dtype) -> EffectStream | None:
+        if sr == self.sample_rate:
+            return _Passthrough(sr)
+        work_dtype = self._work_dtype(np.dtype(dtype))
+        if work_dtype not in SOXR_DTYPES:
+            return None
+        resampler = soxr.ResampleStream(
+            sr, self.sample_rate, channels, work_dtype.name, self.quality
         )
+        return _ResampleStream(resampler, self.sample_rate, work_dtype)
 
 
 class PadSilence(BaseEffect):
+    releases_gil = True
+
     def __init__(self, start: float, end: float) -> None:
         """
         Pads the beginning and end of the audio with silence.
@@ -125,25 +354,94 @@ class PadSilence(BaseEffect):
         self.start = start
         self.end = end
 
-    def apply(self, data: NDArray, sr: float) -> tuple[NDArray, float]:
+    @property
+    def is_noop(self) -> bool:
+        return self.start == 0 and self.end == 0
+
+    def fuse(self, other: BaseEffect) -> BaseEffect | None:
+        if not isinstance(other, PadSilence):
+            return None
+        return PadSilence(self.start + other.start, self.end + other.end)
+
+    def defers_past(self, other: BaseEffect) -> bool:
+        # Padding after a resample avoids resampling the silence
+        return isinstance(other, Resample)
+
+    def pad_frames(self, sr: float) -> tuple[int, int]:
+        """
+        Number of frames of padding at a sample rate
+
+        Args:
+            sr: Sample rate of the wave array
+
+        Returns:
+            Tuple of (start frames, end frames)
         """
-        Pads a wave array with silence
+        return int(self.start * sr), int(self.end * sr)
+
+    def output_shape(self, shape: tuple[int, ...], sr: float) -> tuple[int, ...]:
+        """
+        Shape of the padded output, for preallocating a buffer
+
+        Args:
+            shape: Shape of the input wave array
+            sr: Sample rate of the wave array
+
+        Returns:
+            Shape of the padded wave array
+        """
+        pad_s, pad_e = self.pad_frames(sr)
+        return (pad_s + shape[0] + pad_e,) + tuple(shape[1:])
+
+    def apply(
+        self, data: NDArray, sr: float, out: NDArray | None = None
+    ) -> tuple[NDArray, float]:
+        """
+        Pads a wave array with silence, keeping its dtype and channels.
+        The output is allocated once, or written into a preallocated buffer.
 
         Args:
             data: Wave array to pad
             sr: Sample rate of the wave array
+            out: Optional buffer of the output shape to pad into. If data is
+                already a view of out at the start offset, it is not copied.
 
         Returns:
             Tuple of (padded wave array, sample rate)
         """
-        # Convert from seconds to samples
-        pad_s = int(self.start * sr)
-        pad_e = int(self.end * sr)
-        # Generate zero arrays
-        start_samples = np.zeros(pad_s, dtype=np.float32)
-        end_samples = np.zeros(pad_e, dtype=np.float32)
-        # Concatenate arrays and return
-        return np.concatenate((start_samples, data, end_samples), dtype=np.float32), sr
+        pad_s, pad_e = self.pad_frames(sr)
+        n_frames = len(data)
+        shape = (pad_s + n_frames + pad_e,) + data.shape[1:]
+        if out is None:
+            out = np.empty(shape, dtype=data.dtype)
+        elif out.shape != shape:
+            raise ValueError(f"Output buffer shape {out.shape}, expected {shape}")
+
+        # Silence of unsigned samples is their midpoint
+        fill = out.dtype.type(kernels.midpoint(out.dtype))
+        out[:pad_s] = fill
+        out[pad_s + n_frames :] = fill
+        region = out[pad_s : pad_s + n_frames]
+        if not _same_view(region, data):
+            # A single memcpy, faster than a kernel for a plain copy
+            region[...] = data
+        return out, sr
+
+    def apply_batch(self, data: NDArray, sr: float) -> tuple[NDArray, float]:
+        # Pad all clips along the frame axis into one allocation
+        pad_s, pad_e = self.pad_frames(sr)
+        n_frames = data.shape[1]
+        out = np.empty(
+            (len(data), pad_s + n_frames + pad_e) + data.shape[2:], dtype=data.dtype
+        )
+        fill = kernels.midpoint(data.dtype)
+        out[:, :pad_s] = fill
+        out[:, pad_s + n_frames :] = fill
+        out[:, pad_s : pad_s + n_frames] = data
+        return out, sr
+
+    def stream(self, sr: float, channels: int, dtype: np.dtype) -> EffectStream | None:
+        return _PadStream(*self.pad_frames(sr), sr)
 
 
 class TimeStretch(BaseEffect):
@@ -164,3 +462,195 @@ class TimeStretch(BaseEffect):
         Time stretches a wave array by a factor.
         """
         return librosa.effects.time_stretch(data, rate=self.factor), sr
+
+
+class _BlockStream(EffectStream):
+    """Stream applying a stateless function to each block."""
+
+    def __init__(
+        self,
+        function: Callable[[NDArray], NDArray],
+        sample_rate: float,
+        dtype: np.dtype | None = None,
+        channels: int | None = None,
+    ):
+        super().__init__(sample_rate, dtype, channels)
+        self._function = function
+
+    def process(self, block: NDArray, last: bool) -> NDArray:
+        return self._function(block)
+
+
+def _scaled(data: NDArray, factor: float, dtype: np.dtype) -> NDArray:
+    """
+    Data multiplied by a factor into a new array of a dtype,
+    around the midpoints of the input and output dtypes.
+    """
+    out = np.empty(data.shape, dtype=dtype)
+    kernels.scale(
+        kernels.as_frames(data),
+        factor,
+        kernels.as_frames(out),
+        *kernels.limits(dtype),
+        kernels.midpoint(data.dtype),
+        kernels.midpoint(dtype),
+    )
+    return out
+
+
+class Gain(BaseEffect):
+    releases_gil = True
+
+    def __init__(self, db: float) -> None:
+        """
+        Changes the volume of the audio, clipping integer samples.
+
+        Args:
+            db: Gain in decibels.
+        """
+        super().__init__()
+        self.db = db
+
+    @property
+    def factor(self) -> float:
+        """Linear gain factor."""
+        return 10 ** (self.db / 20)
+
+    @property
+    def is_noop(self) -> bool:
+        return self.db == 0
+
+    def fuse(self, other: BaseEffect) -> BaseEffect | None:
+        # Gains in opposite directions differ from their sum once clipped
+        if not isinstance(other, Gain) or (self.db < 0) != (other.db < 0):
+            return None
+        return Gain(self.db + other.db)
+
+    def apply(self, data: NDArray, sr: float) -> tuple[NDArray, float]:
+        return _scaled(data, self.factor, data.dtype), sr
+
+    def stream(self, sr: float, channels: int, dtype: np.dtype) -> EffectStream | None:
+        return _BlockStream(lambda block: self.apply(block, sr)[0], sr)
+
+
+class Normalize(BaseEffect):
+    releases_gil = True
+
+    def __init__(self, peak_db: float = 0.0) -> None:
+        """
+        Scales the audio so its largest sample is at a peak level.
+
+        Args:
+            peak_db: Peak level in decibels relative to full scale.
+        """
+        super().__init__()
+        self.peak_db = peak_db
+
+    def apply(self, data: NDArray, sr: float) -> tuple[NDArray, float]:
+        peak = kernels.peak(kernels.as_frames(data), kernels.midpoint(data.dtype))
+        if peak == 0:
+            # Silence stays silent
+            return data, sr
+        target = 10 ** (self.peak_db / 20) * kernels.full_scale(data.dtype)
+        return _scaled(data, target / peak, data.dtype), sr
+
+
+class RemoveDC(BaseEffect):
+    """Removes the DC offset of each channel by subtracting its mean."""
+
+    releases_gil = True
+
+    def apply(self, data: NDArray, sr: float) -> tuple[NDArray, float]:
+        frames = kernels.as_frames(data)
+        out = np.empty(data.shape, dtype=data.dtype)
+        # Keep unsigned samples centered on their midpoint
+        kernels.offset(
+            frames,
+            kernels.channel_means(frames) - kernels.midpoint(data.dtype),
+            kernels.as_frames(out),
+            *kernels.limits(data.dtype),
+        )
+        return out, sr
+
+
+class Fade(BaseEffect):
+    releases_gil = True
+
+    def __init__(self, fade_in: float = 0.0, fade_out: float = 0.0) -> None:
+        """
+        Fades the audio in from silence and out to silence linearly.
+
+        Args:
+            fade_in: Duration of the fade in at the start in seconds.
+            fade_out: Duration of the fade out at the end in seconds.
+        """
+        if fade_in < 0 or fade_out < 0:
+            raise ValueError("Fade durations must be positive.")
+        super().__init__()
+        self.fade_in = fade_in
+        self.fade_out = fade_out
+
+    @property
+    def is_noop(self) -> bool:
+        return self.fade_in == 0 and self.fade_out == 0
+
+    def apply(self, data: NDArray, sr: float) -> tuple[NDArray, float]:
+        out = np.empty(data.shape, dtype=data.dtype)
+        kernels.ramp(
+            kernels.as_frames(data),
+            int(self.fade_in * sr),
+            int(self.fade_out * sr),
+            kernels.as_frames(out),
+            *kernels.limits(data.dtype),
+            kernels.midpoint(data.dtype),
+        )
+        return out, sr
+
+
+class Mixdown(BaseEffect):
+    """Mixes all channels down to mono, averaging the channels of each frame."""
+
+    releases_gil = True
+
+    def unchanged_for(self, sr: float, channels: int, dtype: np.dtype) -> bool:
+        return channels == 1
+
+    def apply(self, data: NDArray, sr: float) -> tuple[NDArray, float]:
+        if data.ndim == 1:
+            return data, sr
+        out = np.empty(len(data), dtype=data.dtype)
+        kernels.mixdown(kernels.as_frames(data), out, *kernels.limits(data.dtype))
+        return out, sr
+
+    def stream(self, sr: float, channels: int, dtype: np.dtype) -> EffectStream | None:
+        return _BlockStream(lambda block: self.apply(block, sr)[0], sr, channels=1)
+
+
+class Convert(BaseEffect):
+    releases_gil = True
+
+    def __init__(self, dtype: str) -> None:
+        """
+        Converts the samples to another data type, scaling between
+        the full scale of integer types and [-1, 1] of float types.
+        Unsigned input, such as 8-bit PCM, is centered on its midpoint.
+
+        Args:
+            dtype: Output data type, e.g. 'int16' or 'float32'.
+        """
+        super().__init__()
+        self.dtype = np.dtype(dtype)
+        if self.dtype.kind not in "if":
+            raise ValueError(f"Invalid dtype: {self.dtype}. Must be int or float.")
+
+    def unchanged_for(self, sr: float, channels: int, dtype: np.dtype) -> bool:
+        return np.dtype(dtype) == self.dtype
+
+    def apply(self, data: NDArray, sr: float) -> tuple[NDArray, float]:
+        if data.dtype == self.dtype:
+            return data, sr
+        factor = kernels.full_scale(self.dtype) / kernels.full_scale(data.dtype)
+        return _scaled(data, factor, self.dtype), sr
+
+    def stream(self, sr: float, channels: int, dtype: np.dtype) -> EffectStream | None:
+        return _BlockStream(lambda block: self.apply(block, sr)[0], sr, self.dtype)
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import typing as t
+
+if t.TYPE_CHECKING:  # pragma: no cover
+    from nwave.task import ArrayTask, Task, TaskResult
+
+
+class Hook:
+    """
+    Base class for WaveCore hooks, override the events of interest.
+
+    on_start and on_stage_end are called from worker threads, and must be
+    thread-safe. With the process backend they are replayed in the main
+    process when the task completes.
+    """
+
+    def on_schedule(self, task: Task | ArrayTask) -> None:
+        """Called when a task is submitted to the executor."""
+
+    def on_start(self, task: Task | ArrayTask) -> None:
+        """Called when a worker starts processing a task."""
+
+    def on_stage_end(self, task: Task | ArrayTask, stage: str, seconds: float) -> None:
+        """
+        Called when a stage of a task ends.
+
+        Args:
+            task: Task being processed.
+            stage: 'load', the name of an effect, or 'write'.
+            seconds: Duration of the stage.
+        """
+
+    def on_complete(self, result: TaskResult) -> None:
+        """Called when a successful result is yielded."""
+
+    def on_error(self, result: TaskResult) -> None:
+        """Called when a failed or cancelled result is yielded."""
+
+
+class HookList(Hook):
+    def __init__(self, hooks: t.Iterable[Hook] = ()):
+        """
+        Hook dispatching events to multiple hooks in order.
+
+        Args:
+            hooks: Hooks to dispatch to.
+        """
+        self.hooks: list[Hook] = list(hooks)
+
+    def __len__(self) -> int:
+        return len(self.hooks)
+
+    def append(self, hook: Hook) -> None:
+        """Add a hook."""
+        self.hooks.append(hook)
+
+    def on_schedule(self, task: Task | ArrayTask) -> None:
+        for hook in self.hooks:
+            hook.on_schedule(task)
+
+    def on_start(self, task: Task | ArrayTask) -> None:
+        for hook in self.hooks:
+            hook.on_start(task)
+
+    def on_stage_end(self, task: Task | ArrayTask, stage: str, seconds: float) -> None:
+        for hook in self.hooks:
+            hook.on_stage_end(task, stage, seconds)
+
+    def on_complete(self, result: TaskResult) -> None:
+        for hook in self.hooks:
+            hook.on_complete(result)
+
+    def on_error(self, result: TaskResult) -> None:
+        for hook in self.hooks:
+            hook.on_error(result)
@@ -1,5 +1,5 @@
 from __future__ import annotations
 
-from .writer import Writer
+from .writer import FSYNC_POLICIES, WriteOptions, Writer, sync_dirs
 
-__all__ = ["Writer"]
+__all__ = ["Writer", "WriteOptions", "FSYNC_POLICIES", "sync_dirs"]
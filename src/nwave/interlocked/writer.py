@@ -1,37 +1,239 @@
 from __future__ import annotations
 
+import errno
 import os
+import shutil
 import tempfile
+import typing as t
+from dataclasses import dataclass
 from os import PathLike
 
+FSYNC_POLICIES = ("none", "file", "batch")
+
+# Errors of os.link on filesystems without hard links
+_NO_LINK_ERRNOS = {
+    errno.EPERM,
+    errno.EOPNOTSUPP,
+    getattr(errno, "ENOTSUP", errno.EOPNOTSUPP),
+    errno.EMLINK,
+    errno.ENOSYS,
+}
+# Errors of O_TMPFILE on kernels or filesystems without support
+_NO_TMPFILE_ERRNOS = {errno.EISDIR, errno.EOPNOTSUPP, errno.EINVAL, errno.ENOENT}
+# Errors of linking an O_TMPFILE through /proc where it is not allowed
+_NO_PROC_LINK_ERRNOS = {errno.EXDEV, errno.ENOENT, errno.EPERM, errno.EOPNOTSUPP}
+# Mode of temp files, as with tempfile
+_TEMP_MODE = 0o600
+
+
+@dataclass(frozen=True)
+class WriteOptions:
+    """Options of how Writer stores files."""
+
+    # Directory of temp files, on the same filesystem as the outputs.
+    # None to use the directory of each output.
+    temp_dir: str | None = None
+    # 'none' to leave syncing to the OS, 'file' to fsync each file and its
+    # directory, 'batch' to fsync each file, leaving directories to be
+    # synced once per batch with sync_dirs.
+    fsync: str = "none"
+    # Write to an unnamed O_TMPFILE on Linux, so failed writes leave no
+    # temp files behind. Falls back to named temp files where unsupported.
+    tmpfile: bool = False
+
+    def __post_init__(self):
+        if self.fsync not in FSYNC_POLICIES:
+            raise ValueError(
+                f"Invalid fsync policy: {self.fsync}. Must be one of {FSYNC_POLICIES}"
+            )
+
+
+DEFAULT_OPTIONS = WriteOptions()
+
+
+def sync_dirs(paths: t.Iterable[str | PathLike]) -> None:
+    """
+    Fsync the directories of files once each, making their renames durable.
+
+    Args:
+        paths: Paths of files written.
+    """
+    for directory in {os.path.dirname(os.path.abspath(p)) for p in paths}:
+        _fsync_dir(directory)
+
+
+def _fsync_dir(directory: str) -> None:
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        # Directories cannot be opened on some platforms
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
 
 class Writer:
-    def __init__(self, file: str | PathLike, overwrite: bool = False):
-        if os.path.isdir(file):
-            raise ValueError(f"{file} cannot be a directory")
-        self.file = file
+    # Cleared once unnamed temp files are found not to link on this system
+    tmpfile_supported = True
+
+    def __init__(
+        self,
+        file: str | PathLike,
+        overwrite: bool = False,
+        options: WriteOptions | None = None,
+    ):
+        """
+        Atomically writes a file through a temp file that is moved into place
+        on exit. Nothing is moved into place if the block raises.
+
+        Args:
+            file: Path of the file to write.
+            overwrite: Whether to replace an existing file, otherwise
+                FileExistsError is raised and the existing file is kept.
+            options: WriteOptions, defaults to named temp files without fsync.
+        """
+        self.file = os.fspath(file)
         self.overwrite = overwrite
-        self.temp = tempfile.NamedTemporaryFile(
-            delete=False, dir=os.path.dirname(self.file), mode="w+b"
-        )
+        self.options = options or DEFAULT_OPTIONS
+        self.directory = os.path.dirname(self.file) or "."
+        temp_dir = self.options.temp_dir or self.directory
+        # Path of the named temp file, None for an unnamed O_TMPFILE
+        self.temp_name: str | None = None
+        self._link_source: str | None = None
+
+        fd = self._open_tmpfile(temp_dir) if self.options.tmpfile else None
+        if fd is None:
+            fd, self.temp_name = tempfile.mkstemp(dir=temp_dir, suffix=".tmp")
+        self.temp = os.fdopen(fd, "w+b")
+
+    @staticmethod
+    def _open_tmpfile(directory: str) -> int | None:
+        """Opens an unnamed temp file, or None if not supported."""
+        flag = getattr(os, "O_TMPFILE", None)
+        if flag is None or not Writer.tmpfile_supported:
+            return None
+        try:
+            return os.open(directory, flag | os.O_RDWR, _TEMP_MODE)
+        except OSError as ex:
+            if ex.errno in _NO_TMPFILE_ERRNOS:
+                return None
+            raise
 
     def __enter__(self):
         # Return the opened file
         return self.temp
 
+    def link(self, source: str | PathLike) -> None:
+        """
+        Use a hard link to source as the contents instead of writing,
+        the link is moved into place on exit like a written file.
+
+        Args:
+            source: File on the same filesystem as the output to link to.
+        """
+        self._link_source = os.fspath(source)
+
     def __exit__(self, exc_type, exc_val, exc_tb):
-        # Close temp file
-        self.temp.close()
         try:
-            # If target file exists
-            if os.path.isfile(self.file):
-                # Raise error if overwrite is False
-                if not self.overwrite:
-                    raise FileExistsError(f"File {self.file} already exists")
-                os.remove(self.file)
-            # Copy temp file to target (rename)
-            os.rename(self.temp.name, self.file)
+            if exc_type is None and self._link_source is None:
+                self.temp.flush()
+                if self.options.fsync != "none":
+                    os.fsync(self.temp.fileno())
+            if self.temp_name is not None or self._link_source is not None:
+                # Open files cannot be renamed on Windows, only unnamed
+                # temp files are linked through their descriptor
+                self.temp.close()
+            if exc_type is None:
+                try:
+                    self._commit()
+                except OSError as ex:
+                    if (
+                        self.temp_name is not None
+                        or ex.errno not in _NO_PROC_LINK_ERRNOS
+                    ):
+                        raise
+                    # Unnamed temp files cannot be linked, use named ones
+                    Writer.tmpfile_supported = False
+                    self._name_temp()
+                    self._commit()
         finally:
-            # Delete temp file
-            if os.path.exists(self.temp.name):
-                os.remove(self.temp.name)
+            self.temp.close()
+            if self.temp_name is not None:
+                _remove(self.temp_name)
+        if exc_type is None and self.options.fsync == "file":
+            _fsync_dir(self.directory)
+
+    def _commit(self) -> None:
+        """Moves the contents into place."""
+        if self._link_source is not None:
+            source, follow = self._link_source, False
+        elif self.temp_name is not None:
+            source, follow = self.temp_name, False
+        else:
+            # Unnamed temp file, linked through its descriptor
+            source, follow = f"/proc/self/fd/{self.temp.fileno()}", True
+
+        if self.overwrite:
+            if source == self.temp_name:
+                self._replace(source)
+                self.temp_name = None
+            else:
+                # Links cannot replace files, link to a name then replace
+                name = self._link_temp(source, follow)
+                try:
+                    self._replace(name)
+                finally:
+                    _remove(name)
+            return
+
+        try:
+            # Fails if the file exists, so existing files are never replaced
+            os.link(source, self.file, follow_symlinks=follow)
+        except FileExistsError:
+            if os.path.isdir(self.file):
+                raise ValueError(f"{self.file} cannot be a directory") from None
+            raise FileExistsError(f"File {self.file} already exists") from None
+        except OSError as ex:
+            if ex.errno not in _NO_LINK_ERRNOS or source != self.temp_name:
+                raise
+            # No hard links on this filesystem, check then rename
+            if os.path.lexists(self.file):
+                raise FileExistsError(f"File {self.file} already exists") from None
+            os.rename(source, self.file)
+            self.temp_name = None
+
+    def _name_temp(self) -> None:
+        """Copies an unnamed temp file to a named one."""
+        fd, self.temp_name = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as file:
+            self.temp.seek(0)
+            shutil.copyfileobj(self.temp, file)
+            if self.options.fsync != "none":
+                file.flush()
+                os.fsync(file.fileno())
+
+    def _replace(self, source: str) -> None:
+        try:
+            os.replace(source, self.file)
+        except IsADirectoryError:
+            raise ValueError(f"{self.file} cannot be a directory") from None
+
+    def _link_temp(self, source: str, follow: bool) -> str:
+        """Hard links source to a new temp name in the output directory."""
+        for _ in range(tempfile.TMP_MAX):
+            name = os.path.join(self.directory, f"tmp{os.urandom(6).hex()}.tmp")
+            try:
+                os.link(source, name, follow_symlinks=follow)
+            except FileExistsError:
+                continue
+            return name
+        raise FileExistsError("No usable temporary file name found")
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import math
+
+import numpy as np
+from numba import njit
+from numpy.typing import NDArray
+
+# Kernels take 2-D (frames, channels) arrays and write into a preallocated
+# output. They compile once per dtype on first use, are cached on disk, and
+# release the GIL, so effects using them scale across WaveCore threads.
+# Outputs of integer dtypes are rounded and clipped to [lo, hi]. Unsigned
+# samples are offset binary, silent at their midpoint, so kernels that scale
+# samples take the center of the input and output.
+
+_JIT = {"nogil": True, "cache": True}
+
+
+def limits(dtype: np.dtype) -> tuple[float, float, bool]:
+    """
+    Clipping range of output values of a dtype.
+
+    Args:
+        dtype: Data type of the output
+
+    Returns:
+        (lo, hi, integer), unbounded for float types
+    """
+    dtype = np.dtype(dtype)
+    if dtype.kind in "iu":
+        info = np.iinfo(dtype)
+        return float(info.min), float(info.max), True
+    return -math.inf, math.inf, False
+
+
+def full_scale(dtype: np.dtype) -> float:
+    """
+    Magnitude of a full scale sample of a dtype relative to its midpoint,
+    1.0 for float types.
+
+    Args:
+        dtype: Data type of the samples
+
+    Returns:
+        Full scale as float
+    """
+    dtype = np.dtype(dtype)
+    if dtype.kind in "iu":
+        return float(2 ** (dtype.itemsize * 8 - 1))
+    return 1.0
+
+
+def midpoint(dtype: np.dtype) -> float:
+    """
+    Value of a silent sample of a dtype, e.g. 128 for 8-bit PCM
+    which is unsigned, and 0 for signed and float types.
+
+    Args:
+        dtype: Data type of the samples
+
+    Returns:
+        Midpoint as float
+    """
+    dtype = np.dtype(dtype)
+    if dtype.kind == "u":
+        return float(2 ** (dtype.itemsize * 8 - 1))
+    return 0.0
+
+
+def as_frames(data: NDArray) -> NDArray:
+    """
+    View of audio as a 2-D (frames, channels) array.
+
+    Args:
+        data: NDArray of audio, 1-D for mono
+
+    Returns:
+        2-D view of data
+    """
+    # -1 is ambiguous for empty data, such as the last block of a stream
+    channels = int(np.prod(data.shape[1:]))
+    return data.reshape(len(data), channels)
+
+
+@njit(**_JIT)
+def _store(value, lo, hi, integer):
+    if integer:
+        value = math.floor(value + 0.5)
+    return min(max(value, lo), hi)
+
+
+@njit(**_JIT)
+def scale(data, factor, out, lo, hi, integer, center=0.0, out_center=0.0):
+    """out = (data - center) * factor + out_center"""
+    for i in range(data.shape[0]):
+        for c in range(data.shape[1]):
+            value = (data[i, c] - center) * factor + out_center
+            out[i, c] = _store(value, lo, hi, integer)
+
+
+@njit(**_JIT)
+def peak(data, center=0.0):
+    """Largest absolute sample value relative to center."""
+    result = 0.0
+    for i in range(data.shape[0]):
+        for c in range(data.shape[1]):
+            value = abs(data[i, c] - center)
+            if value > result:
+                result = value
+    return result
+
+
+@njit(**_JIT)
+def channel_means(data):
+    """Mean of each channel."""
+    sums = np.zeros(data.shape[1])
+    for i in range(data.shape[0]):
+        for c in range(data.shape[1]):
+            sums[c] += data[i, c]
+    if data.shape[0]:
+        sums /= data.shape[0]
+    return sums
+
+
+@njit(**_JIT)
+def offset(data, offsets, out, lo, hi, integer):
+    """out = data - offsets of each channel"""
+    for i in range(data.shape[0]):
+        for c in range(data.shape[1]):
+            out[i, c] = _store(data[i, c] - offsets[c], lo, hi, integer)
+
+
+@njit(**_JIT)
+def ramp(data, fade_in, fade_out, out, lo, hi, integer, center=0.0):
+    """out = data with linear fades to center over the first and last frames"""
+    n = data.shape[0]
+    for i in range(n):
+        gain = 1.0
+        if i < fade_in:
+            gain = i / fade_in
+        if n - 1 - i < fade_out:
+            gain = min(gain, (n - 1 - i) / fade_out)
+        for c in range(data.shape[1]):
+            value = (data[i, c] - center) * gain + center
+            out[i, c] = _store(value, lo, hi, integer)
+
+
+@njit(**_JIT)
+def mixdown(data, out, lo, hi, integer):
+    """out = mean of the channels of each frame, out is 1-D"""
+    channels = data.shape[1]
+    for i in range(data.shape[0]):
+        total = 0.0
+        for c in range(channels):
+            total += data[i, c]
+        out[i] = _store(total / channels, lo, hi, integer)
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import typing as t
+from os import PathLike
+
+from nwave import interlocked
+from nwave.common.fingerprint import ChainFingerprints, source_fingerprint
+from nwave.hooks import Hook
+from nwave.task import Task
+
+if t.TYPE_CHECKING:  # pragma: no cover
+    from nwave.task import TaskResult
+
+
+class Manifest(Hook):
+    def __init__(self, path: str | PathLike, fast: bool = True, sync: bool = False):
+        """
+        Append-only journal of completed tasks, so interrupted or repeated
+        batch runs only schedule missing or stale tasks.
+        Each line is a JSON record of the output path, source path, source
+        fingerprint and effect chain fingerprint of a task.
+        Register it as a hook, or pass it to Batch to both skip and record.
+        Tasks of a batch carry the manifest to their workers, which
+        fingerprint each source before processing it.
+
+        Args:
+            path: Path of the manifest file, created if missing.
+            fast: True to fingerprint sources by size and modification time
+                instead of hashing their contents.
+            sync: True to fsync after each record, so records survive a
+                power loss and not only a crash of the process.
+        """
+        self.path = os.fspath(path)
+        self.fast = fast
+        self.sync = sync
+        self._lock = threading.Lock()
+        self._chains = ChainFingerprints()
+        self._file: t.IO[str] | None = None
+        # Latest record of each output path
+        self.records: dict[str, dict[str, str]] = {}
+        self.load()
+
+    def __getstate__(self):
+        # Copies in worker processes only fingerprint sources
+        return {"path": self.path, "fast": self.fast, "sync": self.sync}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        self._chains = ChainFingerprints()
+        self._file = None
+        self.records = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def load(self) -> None:
+        """Reads the records of the manifest file, if it exists."""
+        self.records.clear()
+        try:
+            file = open(self.path, encoding="utf-8")
+        except FileNotFoundError:
+            return
+        with file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Partial line of an interrupted write
+                    continue
+                self.records[record["output"]] = record
+
+    def source_fingerprint(self, path: str | PathLike) -> str:
+        """
+        Fingerprint of a source file, as recorded by the manifest.
+
+        Args:
+            path: Path of the source.
+
+        Returns:
+            Fingerprint string
+        """
+        return source_fingerprint(path, self.fast)
+
+    def record_of(
+        self, task: Task, source_fp: str | None = None
+    ) -> dict[str, str] | None:
+        """
+        Current record of a task.
+
+        Args:
+            task: Task to fingerprint.
+            source_fp: Fingerprint of the source, None to fingerprint it now.
+
+        Returns:
+            Record as a dict of str, None if the effect chain cannot be
+            fingerprinted, so the task is never recorded as done.
+        """
+        chain = self._chains(task.effects)
+        if chain is None:
+            return None
+        record = {
+            "output": os.fspath(task.file_output),
+            "source": os.fspath(task.file_source),
+            "source_fp": source_fp or self.source_fingerprint(task.file_source),
+            "chain_fp": chain,
+        }
+        if task.io_options is not None and task.io_options.subtype is not None:
+            record["subtype"] = task.io_options.subtype
+        return record
+
+    def is_done(self, task: Task) -> bool:
+        """
+        Whether a task was completed with the same source and effect chain,
+        and its output still exists.
+
+        Args:
+            task: Task to check.
+
+        Returns:
+            True if the task can be skipped.
+        """
+        record = self.records.get(os.fspath(task.file_output))
+        if record is None or not os.path.isfile(task.file_output):
+            return False
+        try:
+            return record == self.record_of(task)
+        except FileNotFoundError:
+            return False
+
+    def add(self, task: Task, source_fp: str | None = None) -> None:
+        """
+        Appends a record of a completed task.
+
+        Args:
+            task: Completed task.
+            source_fp: Fingerprint of the source taken before the task was
+                processed, None to fingerprint it now.
+        """
+        record = self.record_of(task, source_fp)
+        if record is None:
+            return
+        line = json.dumps(record) + "\n"
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(line)
+            self._file.flush()
+            if self.sync:
+                os.fsync(self._file.fileno())
+            self.records[record["output"]] = record
+
+    def compact(self) -> None:
+        """Rewrites the manifest with only the latest record of each output."""
+        with self._lock:
+            self._close()
+            with interlocked.Writer(self.path, overwrite=True) as file:
+                for record in self.records.values():
+                    file.write((json.dumps(record) + "\n").encode("utf-8"))
+
+    def close(self) -> None:
+        """Closes the manifest file, it is reopened by the next record."""
+        with self._lock:
+            self._close()
+
+    def _close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def on_complete(self, result: TaskResult) -> None:
+        # In-memory tasks have no output to record
+        if not isinstance(result.task, Task):
+            return
+        stats = result.stats
+        source_fp = None
+        if stats is not None and result.task.manifest is self:
+            source_fp = stats.source_fp
+        self.add(result.task, source_fp)
@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+import typing as t
+from os import PathLike
+
+from nwave import interlocked
+from nwave.hooks import Hook
+
+if t.TYPE_CHECKING:  # pragma: no cover
+    from nwave.task import ArrayTask, Task, TaskResult
+
+# Upper bounds in seconds of the stage latency buckets
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+class Histogram:
+    def __init__(self, buckets: t.Sequence[float] = DEFAULT_BUCKETS):
+        """
+        Fixed bucket histogram. Not thread-safe.
+
+        Args:
+            buckets: Sorted upper bounds of the buckets, an overflow
+                bucket is added for larger values.
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """Add a value to the histogram."""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list[tuple[float, int]]:
+        """Cumulative counts as (upper bound, count), ending with infinity."""
+        result = []
+        total = 0
+        for bound, count in zip((*self.buckets, float("inf")), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+class HistogramCollector(Hook):
+    def __init__(self, buckets: t.Sequence[float] = DEFAULT_BUCKETS):
+        """
+        In-memory collector of live task counters and per stage
+        latency histograms.
+
+        Args:
+            buckets: Upper bounds in seconds of the latency buckets.
+        """
+        self.buckets = tuple(buckets)
+        self.scheduled = 0
+        self.started = 0
+        self.completed = 0
+        self.failed = 0
+        self.stages: dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def queue_depth(self) -> int:
+        """Tasks submitted but not yet started."""
+        return max(0, self.scheduled - self.started)
+
+    @property
+    def in_flight(self) -> int:
+        """Tasks started but not yet yielded."""
+        return max(0, self.started - self.completed - self.failed)
+
+    def on_schedule(self, task: Task | ArrayTask) -> None:
+        with self._lock:
+            self.scheduled += 1
+
+    def on_start(self, task: Task | ArrayTask) -> None:
+        with self._lock:
+            self.started += 1
+
+    def on_stage_end(self, task: Task | ArrayTask, stage: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def on_complete(self, result: TaskResult) -> None:
+        with self._lock:
+            self.completed += 1
+
+    def on_error(self, result: TaskResult) -> None:
+        with self._lock:
+            self.failed += 1
+
+
+def _escape(value: str) -> str:
+    """Escape a Prometheus label value."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _bound(value: float) -> str:
+    """Format a bucket bound as a Prometheus label value."""
+    return "+Inf" if value == float("inf") else repr(value)
+
+
+class PrometheusExporter(Hook):
+    def __init__(
+        self,
+        collector: HistogramCollector,
+        path: str | PathLike,
+        interval: float = 5.0,
+        prefix: str = "nwave",
+    ):
+        """
+        Writes the metrics of a collector to a file in the Prometheus text
+        format, e.g. for the node_exporter textfile collector.
+        Register it as a hook after the collector to write at most every
+        interval seconds as results complete, and call write() after the run
+        for the final values.
+
+        Args:
+            collector: Collector of the metrics.
+            path: Path of the file to write, replaced atomically.
+            interval: Minimum seconds between writes triggered by results.
+            prefix: Prefix of the metric names.
+        """
+        self.collector = collector
+        self.path = path
+        self.interval = interval
+        self.prefix = prefix
+        self._last_write: float | None = None
+        self._lock = threading.Lock()
+
+    def render(self) -> str:
+        """
+        Render the metrics.
+
+        Returns:
+            Metrics in the Prometheus text exposition format
+        """
+        c = self.collector
+        p = self.prefix
+        lines = []
+
+        def metric(name: str, kind: str, doc: str, value: float) -> None:
+            lines.append(f"# HELP {p}_{name} {doc}")
+            lines.append(f"# TYPE {p}_{name} {kind}")
+            lines.append(f"{p}_{name} {value}")
+
+        with c._lock:
+            metric("tasks_scheduled_total", "counter", "Tasks submitted.", c.scheduled)
+            metric("tasks_started_total", "counter", "Tasks started.", c.started)
+            metric("tasks_completed_total", "counter", "Tasks done.", c.completed)
+            metric("tasks_failed_total", "counter", "Tasks failed.", c.failed)
+            metric("queue_depth", "gauge", "Tasks waiting to start.", c.queue_depth)
+            metric("in_flight", "gauge", "Tasks being processed.", c.in_flight)
+
+            lines.append(f"# HELP {p}_stage_seconds Duration of processing stages.")
+            lines.append(f"# TYPE {p}_stage_seconds histogram")
+            for stage, histogram in c.stages.items():
+                label = f'stage="{_escape(stage)}"'
+                for bound, count in histogram.cumulative():
+                    lines.append(
+                        f'{p}_stage_seconds_bucket{{{label},le="{_bound(bound)}"}} '
+                        f"{count}"
+                    )
+                lines.append(f"{p}_stage_seconds_sum{{{label}}} {histogram.sum}")
+                lines.append(f"{p}_stage_seconds_count{{{label}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self) -> None:
+        """Write the metrics to the file now."""
+        with self._lock:
+            self._last_write = time.monotonic()
+            text = self.render().encode("utf-8")
+            with interlocked.Writer(self.path, overwrite=True) as file:
+                file.write(text)
+
+    def _maybe_write(self) -> None:
+        last = self._last_write
+        if last is None or time.monotonic() - last >= self.interval:
+            self.write()
+
+    def on_complete(self, result: TaskResult) -> None:
+        self._maybe_write()
+
+    def on_error(self, result: TaskResult) -> None:
+        self._maybe_write()
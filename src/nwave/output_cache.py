@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from os import PathLike
+
+from nwave import interlocked
+from nwave.audio_io import output_format
+from nwave.common.fingerprint import ChainFingerprints, source_fingerprint
+from nwave.task import Task
+
+# Fraction of max_bytes eviction frees the cache down to, so a full cache
+# is scanned once per tenth of its size stored and not on every store
+EVICT_TO = 0.9
+
+
+class OutputCache:
+    def __init__(
+        self,
+        directory: str | PathLike,
+        max_bytes: int = 1 << 30,
+        fast: bool = False,
+        link: bool = False,
+    ):
+        """
+        On-disk cache of task outputs, keyed by the source file and the
+        fingerprint of the effect chain. Entries are evicted least recently
+        used first once the cache grows past max_bytes, down to EVICT_TO
+        of max_bytes.
+        Safe to share between threads and processes.
+
+        Args:
+            directory: Directory of the cache entries, created if missing.
+            max_bytes: Maximum total size of the entries.
+            fast: True to key sources by size and modification time
+                instead of hashing their contents.
+            link: True to hard link entries and outputs instead of copying.
+                Outputs then share storage with the cache, and must not be
+                modified in place.
+        """
+        self.directory = os.fspath(directory)
+        self.max_bytes = max_bytes
+        self.fast = fast
+        self.link = link
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._size: int | None = None
+        self._chains = ChainFingerprints()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # Locks cannot be pickled, and the size is tracked per process
+        del state["_lock"]
+        state["_size"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def key(self, task: Task) -> str | None:
+        """
+        Cache key of a task.
+
+        Args:
+            task: Task to key.
+
+        Returns:
+            Hex digest of the source and effect chain fingerprints,
+            and of the output format if not the default. None if the
+            effect chain cannot be fingerprinted, so it is not cached.
+        """
+        chain = self._chains(task.effects)
+        if chain is None:
+            return None
+        source = source_fingerprint(task.file_source, self.fast)
+        key = f"{source}\0{chain}"
+        out_format = output_format(task.file_output)
+        subtype = task.io_options.subtype if task.io_options else None
+        if out_format != "WAV" or subtype is not None:
+            key += f"\0{out_format}\0{subtype}"
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def path(self, key: str) -> str:
+        """Path of the entry of a key."""
+        return os.path.join(self.directory, key[:2], f"{key}.wav")
+
+    def restore(self, key: str, task: Task) -> int | None:
+        """
+        Writes the cached output of a key to the output of a task.
+
+        Args:
+            key: Cache key of the task.
+            task: Task to write the output of.
+
+        Returns:
+            Bytes written, or None if the key is not cached.
+        """
+        entry = self.path(key)
+        try:
+            with open(entry, "rb") as source:
+                # Mark as recently used
+                os.utime(entry)
+                writer = interlocked.Writer(
+                    task.file_output, task.overwrite, task.write_options
+                )
+                with writer as file:
+                    if self.link:
+                        writer.link(entry)
+                    else:
+                        shutil.copyfileobj(source, file)
+                return os.fstat(source.fileno()).st_size
+        except FileNotFoundError:
+            # Missing or evicted concurrently
+            return None
+
+    def store(self, key: str, output: str | PathLike) -> None:
+        """
+        Adds an output file to the cache, evicting entries if the cache is full.
+
+        Args:
+            key: Cache key of the task.
+            output: Output file of the task.
+        """
+        entry = self.path(key)
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        fd, temp = tempfile.mkstemp(dir=os.path.dirname(entry), suffix=".tmp")
+        os.close(fd)
+        try:
+            if self.link:
+                os.remove(temp)
+                os.link(output, temp)
+            else:
+                shutil.copyfile(output, temp)
+            size = os.stat(temp).st_size
+            os.replace(temp, entry)
+        finally:
+            if os.path.exists(temp):
+                os.remove(temp)
+
+        with self._lock:
+            if self._size is None:
+                self._size = self.size()
+            else:
+                self._size += size
+            if self._size > self.max_bytes:
+                self._size = self._evict()
+
+    def entries(self) -> list[tuple[float, int, str]]:
+        """
+        Entries of the cache.
+
+        Returns:
+            List of (modification time, size, path)
+        """
+        result = []
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if not entry.name.endswith(".wav"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                result.append((stat.st_mtime, stat.st_size, entry.path))
+        return result
+
+    def size(self) -> int:
+        """Total size of the entries in bytes."""
+        return sum(size for _, size, _ in self.entries())
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            for _, _, path in self.entries():
+                _remove(path)
+            self._size = 0
+
+    def _evict(self) -> int:
+        """Remove least recently used entries until within EVICT_TO of max_bytes."""
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * EVICT_TO
+        for _, size, path in entries:
+            if total <= target:
+                break
+            _remove(path)
+            total -= size
+        return total
+
+
+def _remove(path: str) -> None:
+    """Remove a file, ignoring files already removed."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
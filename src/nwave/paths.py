@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import os
+from os import PathLike
+from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple
+
+
+class Paths(NamedTuple):
+    """Paths for file processing pair."""
+
+    source: Path
+    target: Path
+
+
+class PathCollisionError(ValueError):
+    """Raised when several sources of a batch map to the same output."""
+
+    def __init__(self, collisions: dict[Path, list[Path]]):
+        """
+        Args:
+            collisions: Sources of each output written more than once.
+        """
+        self.collisions = collisions
+        examples = "; ".join(
+            f"{target} <- {', '.join(str(s) for s in sources)}"
+            for target, sources in list(collisions.items())[:3]
+        )
+        super().__init__(f"{len(collisions)} output paths collide: {examples}")
+
+
+def mirror(
+    sources: Iterable[str | PathLike],
+    source_root: str | PathLike,
+    dest_root: str | PathLike,
+    suffix: str | None = None,
+) -> Iterator[Paths]:
+    """
+    Maps source files to the same relative paths under a destination root.
+
+    Args:
+        sources: Source files under source_root, consumed lazily.
+        source_root: Root directory of the sources.
+        dest_root: Root directory of the outputs.
+        suffix: Suffix to replace the suffix of outputs with, e.g. '.wav'.
+
+    Returns:
+        Iterator of Paths
+
+    Raises:
+        ValueError: If a source is not under source_root.
+    """
+    source_root = os.path.abspath(source_root)
+    dest_root = Path(dest_root)
+    for source in sources:
+        relative = os.path.relpath(os.path.abspath(source), source_root)
+        if relative == os.pardir or relative.startswith(os.pardir + os.sep):
+            raise ValueError(f"{source} is not under {source_root}")
+        target = dest_root / relative
+        if suffix is not None:
+            target = target.with_suffix(suffix)
+        yield Paths(Path(source), target)
+
+
+def _key(path: Path, cwd: str) -> str:
+    """Normalized absolute form of a path, for comparing outputs."""
+    return os.path.normcase(os.path.normpath(os.path.join(cwd, path)))
+
+
+def find_collisions(paths: Iterable[Paths]) -> dict[Path, list[Path]]:
+    """
+    Finds outputs that more than one source would write.
+
+    Args:
+        paths: Source and output pairs.
+
+    Returns:
+        Sources of each colliding output, empty if there are none.
+    """
+    cwd = os.getcwd()
+    seen: dict[str, Paths] = {}
+    collisions: dict[Path, list[Path]] = {}
+    for pair in paths:
+        key = _key(pair.target, cwd)
+        first = seen.setdefault(key, pair)
+        if first is not pair:
+            sources = collisions.setdefault(first.target, [first.source])
+            sources.append(pair.source)
+    return collisions
+
+
+def leaf_dirs(targets: Iterable[Path]) -> list[str]:
+    """
+    Unique parent directories of output files, without directories that
+    are parents of others, as creating a directory creates its parents.
+
+    Args:
+        targets: Output files.
+
+    Returns:
+        Sorted list of directories
+    """
+    dirs = {os.path.normpath(os.path.dirname(t) or ".") for t in targets}
+    ancestors: set[str] = set()
+    for directory in dirs:
+        parent = os.path.dirname(directory)
+        while parent and parent != directory and parent not in ancestors:
+            ancestors.add(parent)
+            directory, parent = parent, os.path.dirname(parent)
+    return sorted(dirs - ancestors)
+
+
+def make_dirs(targets: Iterable[Path]) -> int:
+    """
+    Creates the parent directories of output files, each exactly once.
+
+    Args:
+        targets: Output files.
+
+    Returns:
+        Number of directories passed to os.makedirs
+    """
+    leaves = leaf_dirs(targets)
+    for directory in leaves:
+        os.makedirs(directory, exist_ok=True)
+    return len(leaves)
+
+
+def making_dirs(paths: Iterable[Paths]) -> Iterator[Paths]:
+    """
+    Creates the output directories of lazily generated paths as they are
+    consumed, each directory once.
+
+    Args:
+        paths: Source and output pairs.
+
+    Returns:
+        Iterator of the same pairs
+    """
+    created: set[Path] = set()
+    for pair in paths:
+        parent = pair.target.parent
+        if parent not in created:
+            os.makedirs(parent, exist_ok=True)
+            created.add(parent)
+        yield pair
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from typing import Sequence
+
+from nwave.base import BaseEffect
+
+
+def plan_chain(effects: Sequence[BaseEffect]) -> list[BaseEffect]:
+    """
+    Simplify an effect chain before execution.
+
+    Drops effects that are statically no-ops, moves effects past the next
+    effect where they are cheaper to run (e.g. padding after a resample),
+    and fuses adjacent effects (e.g. consecutive resamples or paddings),
+    until the chain no longer changes.
+
+    Args:
+        effects: Effect chain in order of application.
+
+    Returns:
+        New list of effects with the same result.
+    """
+    chain = [effect for effect in effects if not effect.is_noop]
+    changed = True
+    while changed:
+        changed = False
+        i = 0
+        while i < len(chain) - 1:
+            current, following = chain[i], chain[i + 1]
+            fused = current.fuse(following)
+            if fused is not None:
+                chain[i : i + 2] = [] if fused.is_noop else [fused]
+                changed = True
+                # Fused effect may combine with the previous one
+                i = max(0, i - 1)
+            elif current.defers_past(following):
+                chain[i], chain[i + 1] = following, current
+                changed = True
+                i = max(0, i - 1)
+            else:
+                i += 1
+    return chain
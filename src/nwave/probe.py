@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import io
+import os
+import typing as t
+
+import numpy as np
+import soundfile as sf
+
+from nwave.task import ArrayTask, Task
+
+ESTIMATES = ("size", "duration")
+# Array dtypes of subtypes, matching the arrays of scipy.io.wavfile
+SUBTYPE_DTYPES: dict[str, np.dtype] = {
+    "PCM_16": np.dtype("int16"),
+    "PCM_24": np.dtype("int32"),
+    "PCM_32": np.dtype("int32"),
+    "FLOAT": np.dtype("float32"),
+    "DOUBLE": np.dtype("float64"),
+}
+# Data type of other subtypes, such as compressed formats
+FLOAT_DTYPE = np.dtype("float32")
+
+
+class AudioInfo(t.NamedTuple):
+    """Header metadata of an audio file."""
+
+    sample_rate: int
+    channels: int
+    frames: int
+    subtype: str
+    file_format: str
+
+    @property
+    def duration(self) -> float:
+        """Duration in seconds."""
+        return self.frames / self.sample_rate
+
+    @property
+    def dtype(self) -> np.dtype:
+        """Data type the samples load as."""
+        return load_dtype(self.subtype)
+
+
+def load_dtype(subtype: str) -> np.dtype:
+    """
+    Data type samples of a subtype are loaded as.
+
+    Args:
+        subtype: soundfile subtype, e.g. 'PCM_16'.
+
+    Returns:
+        Native dtype of PCM and float subtypes, otherwise float32
+    """
+    return np.dtype(SUBTYPE_DTYPES.get(subtype, FLOAT_DTYPE))
+
+
+def probe(file: str | os.PathLike | t.BinaryIO) -> AudioInfo:
+    """
+    Reads the header of an audio file, without loading its samples.
+
+    Args:
+        file: Path or binary file object of the audio file.
+
+    Returns:
+        AudioInfo
+    """
+    if isinstance(file, os.PathLike):
+        file = os.fspath(file)
+    info = sf.info(file)
+    return AudioInfo(
+        info.samplerate, info.channels, info.frames, info.subtype, info.format
+    )
+
+
+def estimate_cost(task: Task | ArrayTask, estimate: str = "size") -> float:
+    """
+    Estimates the relative processing cost of a task from cheap reads,
+    for ordering tasks before they are submitted.
+
+    Args:
+        task: Task to estimate.
+        estimate: 'size' for the size of the source in bytes, or 'duration'
+            for its duration in seconds read from the header.
+
+    Returns:
+        Estimated cost, 0 if the source cannot be read
+    """
+    if estimate not in ESTIMATES:
+        raise ValueError(f"Invalid estimate: {estimate}. Must be one of {ESTIMATES}")
+    try:
+        if isinstance(task, ArrayTask):
+            return _array_cost(task, estimate)
+        if estimate == "size":
+            return float(os.path.getsize(task.file_source))
+        return probe(task.file_source).duration
+    except (OSError, RuntimeError):
+        # Missing or unreadable, fails quickly when processed
+        return 0.0
+
+
+def _array_cost(task: ArrayTask, estimate: str) -> float:
+    data = task.data
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        # Encoded audio, as accepted by process_array
+        if estimate == "size":
+            return float(memoryview(data).nbytes)
+        return probe(io.BytesIO(data)).duration
+    if estimate == "size":
+        return float(data.nbytes)
+    if task.sample_rate is None:
+        # Fails quickly when processed, as arrays require a sample rate
+        return 0.0
+    return len(data) / task.sample_rate
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import os
+import queue
+import threading
+import typing as t
+from fnmatch import fnmatchcase
+from os import PathLike
+from pathlib import Path
+
+# Found paths buffered ahead of the consumer
+SCAN_BUFFER = 4096
+# Seconds between checks for a stopped scan while the buffer is full
+_PUT_INTERVAL = 0.1
+
+
+class _Failure(t.NamedTuple):
+    """Exception raised in a scan worker, re-raised to the consumer."""
+
+    exception: BaseException
+
+
+_DONE = object()
+
+
+def _split(pattern: str) -> tuple[str, ...]:
+    """Segments of a pattern relative to the scan root."""
+    return tuple(
+        s for s in pattern.replace(os.sep, "/").split("/") if s not in ("", ".")
+    )
+
+
+def match(
+    parts: t.Sequence[str], segments: t.Sequence[str], prefix: bool = False
+) -> bool:
+    """
+    Matches relative path parts against glob pattern segments,
+    where a '**' segment matches any number of directories.
+
+    Args:
+        parts: Parts of a path relative to the scan root.
+        segments: Segments of the pattern.
+        prefix: True to match directories that files matching the pattern
+            could be under, instead of whole paths.
+
+    Returns:
+        Whether the path matches
+    """
+    if not parts:
+        if prefix:
+            return bool(segments)
+        return all(segment == "**" for segment in segments)
+    if not segments:
+        return False
+    if segments[0] == "**":
+        return match(parts, segments[1:], prefix) or match(parts[1:], segments, prefix)
+    return fnmatchcase(parts[0], segments[0]) and match(parts[1:], segments[1:], prefix)
+
+
+def scan(
+    root: str | PathLike,
+    pattern: str = "**/*",
+    extensions: t.Iterable[str] | None = None,
+    min_size: int | None = None,
+    max_size: int | None = None,
+    threads: int = 8,
+    follow_links: bool = False,
+    onerror: t.Callable[[OSError], None] | None = None,
+) -> t.Iterator[Path]:
+    """
+    Lazily finds files under a directory, scanning directories in parallel
+    with os.scandir. Paths are yielded as they are found, in no set order,
+    so processing can start while the scan continues.
+
+    Args:
+        root: Directory to scan.
+        pattern: Glob pattern relative to root, where '**' matches any
+            number of directories, e.g. '**/*.wav' or 'speaker_*/*.wav'.
+        extensions: File extensions to keep, case-insensitive, e.g. ['.wav'].
+        min_size: Minimum file size in bytes.
+        max_size: Maximum file size in bytes.
+        threads: Number of directories scanned at once.
+        follow_links: Whether to descend into symbolic links to directories.
+        onerror: Called with the OSError of directories that cannot be
+            scanned, from a scan thread. Errors are ignored by default,
+            as with os.walk.
+
+    Returns:
+        Iterator of file paths
+    """
+    if threads < 1:
+        raise ValueError("threads must be at least 1.")
+    segments = _split(pattern)
+    suffixes = None
+    if extensions is not None:
+        suffixes = tuple(
+            (e if e.startswith(".") else f".{e}").lower() for e in extensions
+        )
+    check_size = min_size is not None or max_size is not None
+
+    results: queue.Queue = queue.Queue(SCAN_BUFFER)
+    directories: queue.SimpleQueue = queue.SimpleQueue()
+    stop = threading.Event()
+    lock = threading.Lock()
+    # Directories queued or being scanned
+    pending = 1
+
+    def put(item: t.Any) -> None:
+        # Bounded, so a slow consumer holds the scan back
+        while not stop.is_set():
+            try:
+                results.put(item, timeout=_PUT_INTERVAL)
+                return
+            except queue.Full:
+                continue
+
+    def keep(entry: os.DirEntry, parts: tuple[str, ...]) -> bool:
+        if suffixes is not None and not entry.name.lower().endswith(suffixes):
+            return False
+        if not match(parts, segments):
+            return False
+        if check_size:
+            size = entry.stat().st_size
+            if min_size is not None and size < min_size:
+                return False
+            if max_size is not None and size > max_size:
+                return False
+        return True
+
+    def scan_dir(path: str, parts: tuple[str, ...]) -> None:
+        nonlocal pending
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if stop.is_set():
+                        return
+                    sub = parts + (entry.name,)
+                    try:
+                        if entry.is_dir(follow_symlinks=follow_links):
+                            if match(sub, segments, prefix=True):
+                                with lock:
+                                    pending += 1
+                                directories.put((entry.path, sub))
+                        elif entry.is_file() and keep(entry, sub):
+                            put(Path(entry.path))
+                    except FileNotFoundError:
+                        # Removed during the scan
+                        continue
+        except OSError as ex:
+            if onerror is not None:
+                onerror(ex)
+
+    def worker() -> None:
+        nonlocal pending
+        while not stop.is_set():
+            item = directories.get()
+            if item is None:
+                return
+            try:
+                scan_dir(*item)
+            except BaseException as ex:  # pylint: disable=broad-except
+                put(_Failure(ex))
+            with lock:
+                pending -= 1
+                done = pending == 0
+            if done:
+                put(_DONE)
+                for _ in range(threads):
+                    directories.put(None)
+                return
+
+    directories.put((os.fspath(root), ()))
+    workers = [
+        threading.Thread(target=worker, name="nwave-scan", daemon=True)
+        for _ in range(threads)
+    ]
+    for thread in workers:
+        thread.start()
+    try:
+        while True:
+            item = results.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failure):
+                raise item.exception
+            yield item
+    finally:
+        stop.set()
+        for _ in range(threads):
+            directories.put(None)
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import heapq
+from array import array
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+from nwave.task import TaskResult
+
+# Percentiles reported for each stage
+PERCENTILES = (50, 95, 99)
+
+
+@dataclass(frozen=True)
+class StageSummary:
+    """Aggregate timings in seconds of one processing stage."""
+
+    name: str
+    count: int
+    total: float
+    percentiles: dict[str, float]
+
+    def __str__(self):
+        values = ", ".join(
+            f"{k} {v * 1000:.2f} ms" for k, v in self.percentiles.items()
+        )
+        return f"{self.name}: {self.count} calls, {self.total:.3f} s total, {values}"
+
+
+@dataclass(frozen=True)
+class Report:
+    """Aggregate statistics of processed tasks."""
+
+    tasks: int = 0
+    failed: int = 0
+    cache_hits: int = 0
+    passthroughs: int = 0
+    total_time: float = 0.0
+    bytes_read: int = 0
+    bytes_written: int = 0
+    samples_in: int = 0
+    samples_out: int = 0
+    stages: dict[str, StageSummary] = field(default_factory=dict)
+    # (total seconds, source file) of the slowest tasks, slowest first
+    slowest: list[tuple[float, Path]] = field(default_factory=list)
+
+    def __str__(self):
+        lines = [
+            f"Tasks: {self.tasks} ({self.failed} failed), {self.total_time:.3f} s",
+            f"Read: {self.bytes_read} bytes, {self.samples_in} samples",
+            f"Written: {self.bytes_written} bytes, {self.samples_out} samples",
+        ]
+        if self.cache_hits:
+            lines.append(f"Cached: {self.cache_hits} tasks restored from cache")
+        if self.passthroughs:
+            lines.append(f"Unchanged: {self.passthroughs} tasks passed through")
+        lines.extend(str(stage) for stage in self.stages.values())
+        lines.extend(f"Slow: {file} {total:.3f} s" for total, file in self.slowest)
+        return "\n".join(lines)
+
+
+class StatsCollector:
+    def __init__(self, n_slowest: int = 10):
+        """
+        Collects the TaskStats of results into aggregate reports.
+        Timings are kept as compact arrays, not per result objects.
+
+        Args:
+            n_slowest: Number of slowest files to keep.
+        """
+        self.n_slowest = n_slowest
+        self._tasks = 0
+        self._failed = 0
+        self._cache_hits = 0
+        self._passthroughs = 0
+        self._bytes_read = 0
+        self._bytes_written = 0
+        self._samples_in = 0
+        self._samples_out = 0
+        self._stages: dict[str, array] = {}
+        self._slowest: list[tuple[float, int, Path]] = []
+
+    def add(self, result: TaskResult) -> None:
+        """
+        Add a result to the collection.
+
+        Args:
+            result: TaskResult, results without stats count as failed.
+        """
+        self._tasks += 1
+        stats = result.stats
+        if not result.success or stats is None:
+            self._failed += 1
+            return
+
+        self._cache_hits += stats.cache_hit
+        self._passthroughs += stats.passthrough
+        self._bytes_read += stats.bytes_read
+        self._bytes_written += stats.bytes_written
+        self._samples_in += stats.samples_in
+        self._samples_out += stats.samples_out
+        for name, elapsed in stats.stages():
+            timings = self._stages.get(name)
+            if timings is None:
+                timings = self._stages[name] = array("d")
+            timings.append(elapsed)
+
+        # Min-heap of the slowest tasks, counter breaks ties
+        entry = (stats.total, self._tasks, result.task.file_source)
+        if len(self._slowest) < self.n_slowest:
+            heapq.heappush(self._slowest, entry)
+        elif self.n_slowest:
+            heapq.heappushpop(self._slowest, entry)
+
+    def report(self) -> Report:
+        """
+        Create a report of all collected results.
+
+        Returns:
+            Report
+        """
+        stages = {}
+        total_time = 0.0
+        for name, timings in self._stages.items():
+            values = np.frombuffer(timings, dtype=np.float64)
+            total = float(values.sum())
+            total_time += total
+            stages[name] = StageSummary(
+                name,
+                len(values),
+                total,
+                {f"p{p}": float(np.percentile(values, p)) for p in PERCENTILES},
+            )
+        return Report(
+            tasks=self._tasks,
+            failed=self._failed,
+            cache_hits=self._cache_hits,
+            passthroughs=self._passthroughs,
+            total_time=total_time,
+            bytes_read=self._bytes_read,
+            bytes_written=self._bytes_written,
+            samples_in=self._samples_in,
+            samples_out=self._samples_out,
+            stages=stages,
+            slowest=[
+                (total, file) for total, _, file in sorted(self._slowest, reverse=True)
+            ],
+        )
@@ -2,16 +2,25 @@ from __future__ import annotations
 
 import typing as t
 from concurrent.futures import CancelledError
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from os import PathLike
 from pathlib import Path
 
 if t.TYPE_CHECKING:  # pragma: no cover
+    from numpy.typing import NDArray
+
+    from nwave.audio_io import IOOptions
     from nwave.base import BaseEffect
+    from nwave.interlocked import WriteOptions
+    from nwave.manifest import Manifest
+    from nwave.output_cache import OutputCache
 
 # Make a type alias for AnyPath
 AnyPath = t.Union[str, PathLike, Path]
 
+# Ways to satisfy tasks whose effects leave the source unchanged
+PASSTHROUGH_MODES = ("skip", "link", "copy")
+
 
 @dataclass(init=False)
 class Task:
@@ -21,6 +30,13 @@ class Task:
     file_output: Path
     effects: list[BaseEffect]
     overwrite: bool
+    block_size: int | None = None
+    mmap: bool = False
+    cache: OutputCache | None = None
+    write_options: WriteOptions | None = None
+    passthrough: str | None = None
+    io_options: IOOptions | None = None
+    manifest: Manifest | None = None
 
     def __init__(
         self,
@@ -28,7 +44,19 @@ class Task:
         file_output: AnyPath,
         effects: list[BaseEffect],
         overwrite: bool,
+        block_size: int | None = None,
+        mmap: bool = False,
+        cache: OutputCache | None = None,
+        write_options: WriteOptions | None = None,
+        passthrough: str | None = None,
+        io_options: IOOptions | None = None,
+        manifest: Manifest | None = None,
     ):
+        if passthrough is not None and passthrough not in PASSTHROUGH_MODES:
+            raise ValueError(
+                f"Invalid passthrough: {passthrough}. "
+                f"Must be one of {PASSTHROUGH_MODES}"
+            )
         self.file_source = (
             file_source if isinstance(file_source, Path) else Path(file_source)
         )
@@ -37,22 +65,104 @@ class Task:
         )
         self.effects = effects
         self.overwrite = overwrite
+        # Frames per block for streaming, None to process whole files
+        self.block_size = block_size
+        # Memory-map PCM input as read-only arrays instead of copying
+        self.mmap = mmap
+        # Cache of outputs to restore instead of processing
+        self.cache = cache
+        # Temp file and fsync options of the output writer
+        self.write_options = write_options
+        # Mode of satisfying the task without loading if the effects leave
+        # the source unchanged: 'skip' writes nothing, 'link' hard links
+        # the source as the output (copying across filesystems) and 'copy'
+        # copies it. None to always process.
+        self.passthrough = passthrough
+        # Backend and output subtype of reading and writing audio
+        self.io_options = io_options
+        # Manifest recording the task once complete, with the fingerprint
+        # of the source taken before it is processed
+        self.manifest = manifest
+
+
+@dataclass
+class ArrayTask:
+    """
+    Defines an in-memory audio processing task.
+    Data is either an array with its sample rate, or the bytes of a
+    wav file, in which case the output is encoded as wav bytes too.
+    """
+
+    data: NDArray | bytes
+    sample_rate: float | None
+    effects: list[BaseEffect]
+    # Label of the task in reports and results
+    name: str = "<array>"
+
+    @property
+    def file_source(self) -> Path:
+        """Name of the task as a path, as reported for file tasks."""
+        return Path(self.name)
+
+
+@dataclass
+class TaskStats:
+    """Timings in seconds and sizes recorded while processing a task."""
+
+    load: float = 0.0
+    effects: list[tuple[str, float]] = field(default_factory=list)
+    write: float = 0.0
+    bytes_read: int = 0
+    bytes_written: int = 0
+    # Number of samples per channel
+    samples_in: int = 0
+    samples_out: int = 0
+    # Whether the output was restored from the cache
+    cache_hit: bool = False
+    # Whether the source was passed through without loading
+    passthrough: bool = False
+    # Fingerprint of the source before processing, for the manifest of the task
+    source_fp: str | None = None
+
+    @property
+    def total(self) -> float:
+        """Total time of all stages."""
+        return self.load + sum(t for _, t in self.effects) + self.write
+
+    def stages(self) -> list[tuple[str, float]]:
+        """Timings of all stages in order, as (name, seconds)."""
+        return [("load", self.load), *self.effects, ("write", self.write)]
 
 
 @dataclass(frozen=True)
 class TaskResult:
     """Result of a task."""
 
-    task: Task
+    task: Task | ArrayTask
     error: BaseException | None = None
+    stats: TaskStats | None = None
 
     @property
     def success(self) -> bool:
         """Whether the task was successful."""
         return not self.error
 
+    @property
+    def cache_hit(self) -> bool:
+        """Whether the output was restored from the cache."""
+        return self.stats is not None and self.stats.cache_hit
+
+    @property
+    def passthrough(self) -> bool:
+        """Whether the source was passed through without processing."""
+        return self.stats is not None and self.stats.passthrough
+
     def __str__(self):
-        if self.success:
+        if self.cache_hit:
+            status = "[Cached]"
+        elif self.passthrough:
+            status = "[Unchanged]"
+        elif self.success:
             status = "[Completed]"
         elif isinstance(self.error, CancelledError):
             status = "[Cancelled]"
@@ -62,6 +172,25 @@ class TaskResult:
         return f"Task: {self.task.file_source} -> {self.task.file_output}\n{status}"
 
 
+@dataclass(frozen=True)
+class ArrayResult(TaskResult):
+    """Result of an in-memory task."""
+
+    # Output array, or wav bytes for bytes input
+    data: NDArray | bytes | None = None
+    sample_rate: float | None = None
+
+    def __str__(self):
+        if self.success:
+            status = "[Completed]"
+        elif isinstance(self.error, CancelledError):
+            status = "[Cancelled]"
+        else:
+            status = f"[Failed]: {self.error}"
+
+        return f"Task: {self.task.file_source}\n{status}"
+
+
 class TaskException(Exception):
     """Exception raised when a task fails."""
 
@@ -78,6 +207,10 @@ class TaskException(Exception):
         self.inner_type = exception.__class__.__name__
         self.raising_source = during
 
+    def __reduce__(self):
+        # Keep the raising source when pickled across process boundaries
+        return self.__class__, (self.inner_exception, self.raising_source)
+
     def __str__(self):
         if self.raising_source:
             return (
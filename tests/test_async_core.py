@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from glob import glob
+from os.path import join
+
+import pytest
+
+from nwave import AsyncWaveCore, Batch, Task, effects
+
+
+def make_batch(data_dir):
+    files = sorted(glob(join(data_dir, "*.wav")))
+    out_dir = join(data_dir, "out")
+    os.makedirs(out_dir, exist_ok=True)
+    outputs = [join(out_dir, os.path.basename(f)) for f in files]
+    return Batch(files, outputs, overwrite=True).apply(effects.Resample(16000))
+
+
+@pytest.mark.parametrize("max_pending", [None, 2])
+def test_submit(data_dir, max_pending):
+    tasks = make_batch(data_dir).tasks
+
+    async def main():
+        async with AsyncWaveCore(2, max_pending=max_pending) as core:
+            return await asyncio.gather(*(core.submit(task) for task in tasks))
+
+    results = asyncio.run(main())
+    assert [result.task for result in results] == tasks
+    assert all(result.success for result in results)
+
+
+def test_submit_error(data_dir):
+    task = Task(join(data_dir, "missing.wav"), join(data_dir, "out.wav"), [], True)
+
+    async def main():
+        async with AsyncWaveCore(1) as core:
+            return await core.submit(task), core.report()
+
+    result, report = asyncio.run(main())
+    assert not result.success
+    assert str(result.error).startswith("During File Loading")
+    assert report.failed == 1
+
+
+@pytest.mark.parametrize("max_pending", [None, 1])
+def test_results(data_dir, max_pending):
+    async def main():
+        async with AsyncWaveCore(2, max_pending=max_pending) as core:
+            core.schedule(make_batch(data_dir))
+            results = [result async for result in core.results()]
+            core.schedule(make_batch(data_dir))
+            return results, await core.wait_all()
+
+    results, again = asyncio.run(main())
+    assert len(results) == len(again) == 5
+    assert all(result.success for result in results + again)
+
+
+def test_cancel_submit(data_dir):
+    # Occupies the only worker so the second task stays queued
+    release = threading.Event()
+    blocker = effects.Wrapper(lambda data: release.wait(5) and data)
+    files = sorted(glob(join(data_dir, "*.wav")))
+
+    async def main():
+        async with AsyncWaveCore(1) as core:
+            first = asyncio.ensure_future(
+                core.submit(Task(files[0], join(data_dir, "a.wav"), [blocker], True))
+            )
+            second = asyncio.ensure_future(
+                core.submit(Task(files[1], join(data_dir, "b.wav"), [], True))
+            )
+            await asyncio.sleep(0.05)
+            second.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await second
+            release.set()
+            return await first
+
+    assert asyncio.run(main()).success
+    # The executor future was cancelled, so the task never ran
+    assert not os.path.exists(join(data_dir, "b.wav"))
+
+
+def test_exit_does_not_block_loop(data_dir):
+    # A running task outlives its cancelled caller
+    release = threading.Event()
+    blocker = effects.Wrapper(lambda data: release.wait(5) and data)
+    source = sorted(glob(join(data_dir, "*.wav")))[0]
+
+    async def main():
+        async with AsyncWaveCore(1) as core:
+            task = Task(source, join(data_dir, "a.wav"), [blocker], True)
+            running = asyncio.ensure_future(core.submit(task))
+            await asyncio.sleep(0.05)
+            running.cancel()
+            # Only runs if exiting leaves the loop free
+            asyncio.get_running_loop().call_later(0.1, release.set)
+        return time.monotonic()
+
+    start = time.monotonic()
+    assert asyncio.run(main()) - start < 2
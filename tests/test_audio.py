@@ -1,12 +1,17 @@
 from __future__ import annotations
 
+import os
 from glob import glob
 from os.path import join
 from unittest.mock import patch
 
+import numpy as np
 import pytest
+import soundfile as sf
+from scipy.io import wavfile
 
-from nwave import Task, TaskException, audio
+from nwave import Task, TaskException, audio, effects
+from nwave.audio_io import IOOptions
 
 
 def test_process_write_exceptions(data_dir):
@@ -14,8 +19,229 @@ def test_process_write_exceptions(data_dir):
     f = glob(join(data_dir, "*.wav"))[0]
     # Create a task
     t = Task(f, f, [], True)
-    # Process os.rename to raise an exception
-    with patch("os.rename", side_effect=OSError("Test")):
+    # Patch os.replace to raise an exception
+    with patch("os.replace", side_effect=OSError("Test")):
         with pytest.raises(TaskException) as e:
             audio.process(t)
         assert str(e.value) == "During File Writing -> OSError: Test"
+
+
+@pytest.mark.parametrize("block_size", [1024, 4096, 116125, 200000])
+def test_process_stream(data_dir, block_size):
+    f = glob(join(data_dir, "*.wav"))[0]
+    chain = [effects.Resample(44100), effects.PadSilence(0.25, 0.5)]
+    # Whole file reference
+    audio.process(Task(f, join(data_dir, "whole.wav"), chain, True))
+    whole_sr, whole = wavfile.read(join(data_dir, "whole.wav"))
+    # Streamed in blocks
+    t = Task(f, join(data_dir, "stream.wav"), chain, True, block_size=block_size)
+    assert audio.process_stream(t)
+    stream_sr, stream = wavfile.read(join(data_dir, "stream.wav"))
+    assert stream_sr == whole_sr == 44100
+    # Native dtype is kept when streaming
+    assert stream.dtype == np.int16
+    assert abs(len(stream) - len(whole)) <= 2
+
+
+@pytest.mark.parametrize(
+    "chain",
+    [[effects.Mixdown()], [effects.Mixdown(), effects.Resample(16000)]],
+    ids=["mixdown", "mixdown-resample"],
+)
+def test_process_stream_stereo(data_dir, chain):
+    _, mono = wavfile.read(glob(join(data_dir, "*.wav"))[0])
+    source = join(data_dir, "stereo.wav")
+    wavfile.write(source, 44100, np.stack([mono, mono // 2], axis=1))
+    audio.process(Task(source, join(data_dir, "whole.wav"), chain, True))
+    whole_sr, whole = wavfile.read(join(data_dir, "whole.wav"))
+    t = Task(source, join(data_dir, "stream.wav"), chain, True, block_size=4096)
+    assert audio.process_stream(t)
+    stream_sr, stream = wavfile.read(join(data_dir, "stream.wav"))
+    assert stream_sr == whole_sr
+    assert stream.ndim == whole.ndim == 1
+    if len(chain) == 1:
+        assert np.array_equal(stream, whole)
+    else:
+        assert abs(len(stream) - len(whole)) <= 2
+
+
+def test_process_stream_small_blocks(data_dir):
+    # Resampling small blocks yields empty ones for the effects after it
+    f = glob(join(data_dir, "*.wav"))[0]
+    chain = [effects.Resample(16000), effects.Gain(-3)]
+    audio.process(Task(f, join(data_dir, "whole.wav"), chain, True))
+    _, whole = wavfile.read(join(data_dir, "whole.wav"))
+    t = Task(f, join(data_dir, "stream.wav"), chain, True, block_size=256)
+    assert audio.process_stream(t)
+    _, stream = wavfile.read(join(data_dir, "stream.wav"))
+    assert abs(len(stream) - len(whole)) <= 2
+
+
+def test_process_stream_fallback(data_dir):
+    f = glob(join(data_dir, "*.wav"))[0]
+    # Wrapper cannot stream, so the whole file is processed
+    t = Task(f, join(data_dir, "out.wav"), [effects.Wrapper(np.flip)], True, 1024)
+    assert not audio.process_stream(t)
+    audio.process(t)
+    _, data = wavfile.read(join(data_dir, "out.wav"))
+    _, source = wavfile.read(f)
+    assert np.array_equal(data, source[::-1])
+
+
+def test_process_stream_exceptions(data_dir):
+    t = Task(join(data_dir, "no_exists.wav"), join(data_dir, "out.wav"), [], True, 64)
+    with pytest.raises(TaskException) as e:
+        audio.process(t)
+    assert str(e.value).startswith("During File Loading")
+
+
+def test_load_mmap(data_dir):
+    f = glob(join(data_dir, "*.wav"))[0]
+    sr, data = audio.load(Task(f, f, [], True, mmap=True))
+    assert isinstance(data, np.memmap)
+    assert not data.flags.writeable
+    # Normal load is a writable copy
+    sr_copy, data_copy = audio.load(Task(f, f, [], True))
+    assert data_copy.flags.writeable
+    assert sr == sr_copy
+    assert np.array_equal(data, data_copy)
+
+
+def test_load_mmap_fallback(data_dir):
+    # 24-bit PCM cannot be memory-mapped
+    f = join(data_dir, "pcm24.wav")
+    sf.write(f, np.zeros(100, dtype=np.float32), 16000, subtype="PCM_24")
+    sr, data = audio.load(Task(f, f, [], True, mmap=True))
+    assert sr == 16000
+    assert len(data) == 100
+    assert data.flags.writeable
+
+
+def test_process_mmap(data_dir):
+    f = glob(join(data_dir, "*.wav"))[0]
+    out = join(data_dir, "out.wav")
+    audio.process(Task(f, out, [effects.PadSilence(0.1, 0.1)], True, mmap=True))
+    assert wavfile.read(out)[1].size > wavfile.read(f)[1].size
+
+
+def test_process_stream_stats(data_dir):
+    f = glob(join(data_dir, "*.wav"))[0]
+    out = join(data_dir, "stream.wav")
+    t = Task(f, out, [effects.Resample(44100)], True, block_size=4096)
+    stats = audio.process(t)
+    assert [name for name, _ in stats.stages()] == ["load", "Resample", "write"]
+    assert stats.samples_in == 116125
+    assert abs(stats.samples_out - 232250) <= 2
+    assert stats.bytes_written == os.path.getsize(out)
+    assert stats.total > 0
+
+
+def test_process_group(data_dir):
+    files = sorted(glob(join(data_dir, "test_*.wav")))
+    # A shorter clip forms its own group
+    sr, data = wavfile.read(files[0])
+    wavfile.write(files[1], sr, data[:1000])
+    chain = [effects.Resample(16000), effects.PadSilence(0.01, 0)]
+    tasks = [Task(f, f.replace(".wav", "_out.wav"), chain, True) for f in files]
+    tasks.append(
+        Task(join(data_dir, "missing.wav"), join(data_dir, "m.wav"), chain, True)
+    )
+    outcomes = audio.process_group(tasks)
+    assert isinstance(outcomes[-1], TaskException)
+    for task, stats in zip(tasks[:-1], outcomes):
+        ref_file = join(data_dir, "ref.wav")
+        expected = audio.process(Task(task.file_source, ref_file, chain, True))
+        assert [name for name, _ in stats.effects] == ["Resample", "PadSilence"]
+        assert stats.samples_out == expected.samples_out
+        _, out = wavfile.read(task.file_output)
+        _, ref = wavfile.read(ref_file)
+        assert out.shape == ref.shape
+        assert np.abs(out.astype(np.int32) - ref).max() <= 2
+
+
+def test_process_group_effect_error(data_dir):
+    files = sorted(glob(join(data_dir, "test_*.wav")))[:2]
+    chain = [effects.Wrapper(lambda data: data.astype(np.complex64))]
+    tasks = [Task(f, f.replace(".wav", "_out.wav"), chain, True) for f in files]
+    outcomes = audio.process_group(tasks)
+    # Errors are reported for each task
+    assert all(isinstance(outcome, TaskException) for outcome in outcomes)
+    assert str(outcomes[0]).startswith("During File Writing")
+
+
+@pytest.mark.parametrize("mode", ["skip", "link", "copy"])
+def test_pass_through(data_dir, mode):
+    src = join(data_dir, "test_0.wav")
+    out = join(data_dir, "out.wav")
+    # Already at the target rate
+    task = Task(src, out, [effects.Resample(22050)], False, passthrough=mode)
+    with patch.object(audio, "load") as load:
+        stats = audio.process(task)
+    load.assert_not_called()
+    assert stats.passthrough
+    assert stats.samples_in == stats.samples_out == 116125
+    if mode == "skip":
+        assert not os.path.exists(out)
+        return
+    with open(src, "rb") as a, open(out, "rb") as b:
+        assert a.read() == b.read()
+    assert stats.bytes_written == os.path.getsize(src)
+    assert os.path.samefile(src, out) is (mode == "link")
+    # Existing outputs are kept
+    with pytest.raises(TaskException):
+        audio.process(task)
+
+
+def test_pass_through_changed(data_dir):
+    src = join(data_dir, "test_0.wav")
+    out = join(data_dir, "out.wav")
+    task = Task(src, out, [effects.Resample(16000)], False, passthrough="link")
+    stats = audio.process(task)
+    assert not stats.passthrough
+    assert wavfile.read(out)[0] == 16000
+    # 24-bit sources are written back as 32-bit, so are processed
+    src_24 = join(data_dir, "pcm24.wav")
+    sf.write(src_24, np.zeros(100, dtype=np.int16), 22050, "PCM_24")
+    task = Task(src_24, join(data_dir, "out24.wav"), [], False, passthrough="copy")
+    assert not audio.process(task).passthrough
+    # Unreadable sources fail to load as usual
+    task = Task(join(data_dir, "missing.wav"), out, [], False, passthrough="skip")
+    with pytest.raises(TaskException) as ex:
+        audio.process(task)
+    assert str(ex.value).startswith("During File Loading")
+    with pytest.raises(ValueError):
+        Task(src, out, [], False, passthrough="move")
+
+
+def test_pass_through_link_fallback(data_dir):
+    src = join(data_dir, "test_0.wav")
+    out = join(data_dir, "out.wav")
+    task = Task(src, out, [], False, passthrough="link")
+    # Hard links not supported, copies instead
+    with patch("os.link", side_effect=PermissionError(1, "Operation not permitted")):
+        stats = audio.process(task)
+    assert stats.passthrough
+    assert not os.path.samefile(src, out)
+    assert os.path.getsize(out) == os.path.getsize(src)
+
+
+@pytest.mark.parametrize("block_size", [None, 4096])
+def test_process_formats(data_dir, block_size):
+    sr, data = wavfile.read(join(data_dir, "test_0.wav"))
+    src = join(data_dir, "source.flac")
+    sf.write(src, data, sr)
+    out = join(data_dir, "out.flac")
+    options = IOOptions(subtype="PCM_24")
+    chain = [effects.Resample(16000)]
+    task = Task(src, out, chain, False, block_size=block_size, io_options=options)
+    audio.process(task)
+    info = sf.info(out)
+    assert (info.format, info.subtype, info.samplerate) == ("FLAC", "PCM_24", 16000)
+    # Float pipelines are converted to PCM by the writer
+    out = join(data_dir, "out.wav")
+    chain = [effects.Wrapper(lambda data: (data / 32768).astype(np.float32))]
+    options = IOOptions(subtype="PCM_16")
+    audio.process(Task(src, out, chain, False, io_options=options))
+    _, written = wavfile.read(out)
+    assert written.dtype == np.int16
+    np.testing.assert_allclose(written, data, atol=1)
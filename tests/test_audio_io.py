@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import io
+from os.path import join
+
+import numpy as np
+import pytest
+import soundfile as sf
+from scipy.io import wavfile
+
+from nwave import audio_io
+from nwave.audio_io import IOOptions, output_format, output_subtype
+
+
+@pytest.fixture(scope="function")
+def tone():
+    t = np.arange(8000) / 8000
+    return (0.5 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+
+
+def test_output_format():
+    assert output_format("a/b.flac") == "FLAC"
+    assert output_format("b.WAV") == "WAV"
+    assert output_format("b.ogg") == "OGG"
+    # Unknown suffixes are written as wav
+    assert output_format("b.tmp") == "WAV"
+
+
+def test_output_subtype():
+    assert output_subtype(np.dtype("int16"), "WAV") == "PCM_16"
+    assert output_subtype(np.dtype("float32"), "WAV") == "FLOAT"
+    assert output_subtype(np.dtype("float32"), "WAV", "PCM_24") == "PCM_24"
+    # FLAC has no float subtypes
+    assert output_subtype(np.dtype("float32"), "FLAC") == sf.default_subtype("FLAC")
+
+
+def test_io_options():
+    with pytest.raises(ValueError):
+        IOOptions(backend="wave")
+    with pytest.raises(ValueError):
+        IOOptions(subtype="PCM_17")
+
+
+@pytest.mark.parametrize("backend", ["auto", "soundfile"])
+def test_read_flac(tmp_path, tone, backend):
+    file = join(tmp_path, "tone.flac")
+    pcm = (tone * 32767).astype(np.int16)
+    sf.write(file, pcm, 8000, "PCM_16")
+    sample_rate, data = audio_io.read(file, backend)
+    assert sample_rate == 8000
+    # PCM is read in its native dtype
+    assert data.dtype == np.int16
+    np.testing.assert_array_equal(data, pcm)
+    with pytest.raises(ValueError):
+        audio_io.read(file, "scipy")
+
+
+def test_read_wav_fallback(tmp_path, tone):
+    # scipy cannot read u-law wav files
+    file = join(tmp_path, "tone.wav")
+    sf.write(file, tone, 8000, "ULAW")
+    sample_rate, data = audio_io.read(file)
+    assert sample_rate == 8000
+    assert data.dtype == np.float32
+    np.testing.assert_allclose(data, tone, atol=0.02)
+    with open(file, "rb") as f:
+        assert audio_io.read(f)[1].shape == data.shape
+
+
+@pytest.mark.parametrize("backend", ["auto", "scipy", "soundfile"])
+def test_write(tone, backend):
+    buffer = io.BytesIO()
+    audio_io.write(buffer, 8000, tone, options=IOOptions(backend))
+    sample_rate, data = wavfile.read(io.BytesIO(buffer.getvalue()))
+    assert sample_rate == 8000
+    np.testing.assert_array_equal(data, tone)
+
+
+def test_write_subtype(tmp_path, tone):
+    # Converted by the writer
+    options = IOOptions(subtype="PCM_16")
+    file = join(tmp_path, "tone.wav")
+    audio_io.write(file, 8000, tone, options=options)
+    _, data = wavfile.read(file)
+    assert data.dtype == np.int16
+    np.testing.assert_allclose(data / 32768, tone, atol=1e-4)
+    file = join(tmp_path, "tone.flac")
+    audio_io.write(file, 8000, tone, "FLAC")
+    assert sf.info(file).subtype == "PCM_16"
+    # scipy writes wav data in its own dtype only
+    with pytest.raises(ValueError):
+        audio_io.write(file, 8000, tone, "FLAC", IOOptions("scipy"))
+    with pytest.raises(ValueError):
+        audio_io.write(file, 8000, tone, options=IOOptions("scipy", "PCM_16"))
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import numpy as np
+
 from nwave.base import BaseEffect
 
 
@@ -20,3 +22,12 @@ def test_base_effect():
     assert isinstance(effect, MyEffect)
     assert isinstance(effect, BaseEffect)
     assert effect.name == "MyEffect"
+
+
+def test_base_effect_writable():
+    data = np.zeros(8)
+    assert BaseEffect.writable(data) is data
+    data.flags.writeable = False
+    copy = BaseEffect.writable(data)
+    assert copy is not data
+    assert copy.flags.writeable
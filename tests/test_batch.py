@@ -2,8 +2,12 @@ from __future__ import annotations
 
 import os
 from glob import glob
+from pathlib import Path
+
+import pytest
 
 from nwave import Batch, Task, TaskException, TaskResult, effects
+from nwave.paths import PathCollisionError
 
 
 def test_batch():
@@ -47,3 +51,102 @@ def test_run():
         assert isinstance(result, TaskResult)
         assert result.success is False
         assert isinstance(result.error, TaskException)
+
+
+def test_batch_from_pairs():
+    # Sized sources keep their length
+    batch = Batch.from_pairs([("a.wav", "a_out.wav"), ("b.wav", "b_out.wav")])
+    assert batch.size == 2
+    assert [str(task.file_output) for task in batch.tasks] == ["a_out.wav", "b_out.wav"]
+    # Iterators are consumed lazily
+    batch = Batch.from_pairs(iter([("a.wav", "a_out.wav")]), overwrite=True)
+    assert batch.size is None
+    tasks = list(batch.iter_tasks())
+    assert len(tasks) == 1
+    assert tasks[0].overwrite is True
+
+
+def test_batch_from_tree(data_dir):
+    # Nest the sources in a tree
+    for i, sub in enumerate(["a", "a/b", "c"]):
+        os.makedirs(os.path.join(data_dir, "in", sub))
+        os.rename(
+            os.path.join(data_dir, f"test_{i}.wav"),
+            os.path.join(data_dir, "in", sub, "clip.wav"),
+        )
+    src_root = os.path.join(data_dir, "in")
+    out_root = os.path.join(data_dir, "out")
+    batch = Batch.from_tree(src_root, out_root)
+    assert batch.size == 3
+    results = batch.apply(effects.Resample(16000)).run()
+    assert all(result.success for result in results)
+    for sub in ["a", "a/b", "c"]:
+        assert os.path.isfile(os.path.join(out_root, sub, "clip.wav"))
+    # The same tree with glob
+    pattern = os.path.join(src_root, "**", "*.wav")
+    batch = Batch.from_glob(pattern, out_root + "2", root=src_root)
+    assert sorted(
+        os.path.relpath(t.file_output, out_root + "2") for t in batch.tasks
+    ) == [
+        os.path.join("a", "b", "clip.wav"),
+        os.path.join("a", "clip.wav"),
+        os.path.join("c", "clip.wav"),
+    ]
+
+
+def test_batch_from_scan(data_dir):
+    for i, sub in enumerate(["a", "a/b", "c"]):
+        os.makedirs(os.path.join(data_dir, "in", sub))
+        os.rename(
+            os.path.join(data_dir, f"test_{i}.wav"),
+            os.path.join(data_dir, "in", sub, "clip.wav"),
+        )
+    src_root = os.path.join(data_dir, "in")
+    out_root = os.path.join(data_dir, "out")
+    batch = Batch.from_scan(src_root, out_root, min_size=1, threads=2)
+    # Discovered while running, so tasks cannot be listed up front
+    assert batch.size is None
+    with pytest.raises(TypeError):
+        batch.tasks
+    results = list(batch.apply(effects.Resample(16000)).run_yield())
+    assert len(results) == 3
+    assert all(result.success for result in results)
+    for sub in ["a", "a/b", "c"]:
+        assert os.path.isfile(os.path.join(out_root, sub, "clip.wav"))
+
+
+def test_batch_collisions(data_dir):
+    src_files = sorted(glob(os.path.join(data_dir, "*.wav")))
+    out_dir = os.path.join(data_dir, "out")
+    batch = Batch(src_files, [os.path.join(out_dir, "same.wav")] * len(src_files))
+    with pytest.raises(PathCollisionError) as e:
+        batch.run()
+    assert len(e.value.collisions[Path(out_dir, "same.wav")]) == len(src_files)
+    # Nothing was created or scheduled
+    assert not os.path.exists(out_dir)
+    # Without path planning, collisions fail per task
+    batch = Batch(src_files[:2], [os.path.join(data_dir, "same.wav")] * 2)
+    batch.plan_paths = False
+    assert [r.success for r in batch.run(threads=1)] == [True, False]
+
+
+def test_batch_lazy_dirs(data_dir):
+    src_files = sorted(glob(os.path.join(data_dir, "*.wav")))
+    pairs = (
+        (f, os.path.join(data_dir, "x", "y", os.path.basename(f))) for f in src_files
+    )
+    results = Batch.from_pairs(pairs).run()
+    assert len(results) == len(src_files)
+    assert all(result.success for result in results)
+
+
+def test_batch_passthrough(data_dir):
+    src_files = sorted(glob(os.path.join(data_dir, "*.wav")))
+    out_files = [f.replace(".wav", "_out.wav") for f in src_files]
+    batch = Batch(src_files, out_files, passthrough="link")
+    results = batch.apply(effects.Resample(22050)).run(micro_batch=2)
+    assert all(result.passthrough for result in results)
+    assert "[Unchanged]" in str(results[0])
+    assert all(os.path.samefile(s, o) for s, o in zip(src_files, out_files))
+    with pytest.raises(ValueError):
+        Batch(src_files, out_files, passthrough="move")
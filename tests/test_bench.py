@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import json
+import os
+from tempfile import TemporaryDirectory
+
+import pytest
+from scipy.io import wavfile
+
+from nwave import bench
+
+
+def test_generate_corpus():
+    with TemporaryDirectory() as tmpdir:
+        corpus = bench.generate_corpus(tmpdir, 3, 0.5, 16000, channels=2)
+        assert len(corpus.files) == 3
+        assert corpus.audio_seconds == 1.5
+        sr, data = wavfile.read(corpus.files[0])
+        assert sr == 16000
+        assert data.shape == (8000, 2)
+
+
+@pytest.mark.parametrize("backend", ["thread", "process"])
+def test_run_bench(backend):
+    with TemporaryDirectory() as tmpdir:
+        corpus = bench.generate_corpus(tmpdir, 4, 0.25, 22050)
+        result = bench.run_bench(corpus, "resample_pad", backend, threads=2)
+    assert result.key == f"{backend}/resample_pad"
+    assert result.files == 4
+    assert result.failed == 0
+    assert result.files_per_s > 0
+    assert result.audio_s_per_s > 0
+    assert set(result.latency_s) == {"p50", "p95", "p99"}
+    # Processing time of each task, within the wall time of the run
+    assert 0 < result.latency_s["p50"] <= result.latency_s["p99"] <= result.wall_s
+    # Measured in a fresh process
+    assert result.peak_rss_mb > 0
+
+
+def test_run_bench_in_process():
+    with TemporaryDirectory() as tmpdir:
+        corpus = bench.generate_corpus(tmpdir, 2, 0.25, 22050)
+        result = bench.run_bench(corpus, "pad", isolate=False)
+    assert result.failed == 0
+    assert result.peak_rss_mb is None
+
+
+def test_compare():
+    base = bench.BenchResult("thread", "pad", 2, 10, 0, 1.0, 10.0, 50.0)
+    base.latency_s = {"p95": 0.1}
+    base.peak_rss_mb = 100.0
+    same = bench.BenchResult("thread", "pad", 2, 10, 0, 1.0, 9.5, 48.0)
+    same.latency_s = {"p95": 0.105}
+    same.peak_rss_mb = 105.0
+    assert bench.compare([same], [base]) == []
+    slow = bench.BenchResult("thread", "pad", 2, 10, 0, 2.0, 5.0, 25.0)
+    slow.latency_s = {"p95": 0.2}
+    slow.peak_rss_mb = 100.0
+    metrics = {r.metric for r in bench.compare([slow], [base])}
+    assert metrics == {"files_per_s", "audio_s_per_s", "latency_p95"}
+    # No baseline for key
+    other = bench.BenchResult("process", "pad", 2, 10, 0, 2.0, 1.0, 1.0)
+    assert bench.compare([other], [base]) == []
+
+
+def test_main(capsys):
+    with TemporaryDirectory() as tmpdir:
+        output = os.path.join(tmpdir, "bench.json")
+        args = ["--files", "2", "--duration", "0.1", "--chain", "pad"]
+        assert bench.main(args + ["--output", output]) == 0
+        with open(output) as file:
+            saved = json.load(file)
+        assert saved[0]["chain"] == "pad"
+        assert len(bench.load_results(output)) == 1
+        # Compare with a much faster baseline
+        saved[0]["files_per_s"] *= 100
+        with open(output, "w") as file:
+            json.dump(saved, file)
+        assert bench.main(args + ["--baseline", output]) == 1
+    assert "Regression: thread/pad files_per_s" in capsys.readouterr().out
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+import pytest
+
+from nwave.common.cache import LRUCache
+
+
+def test_lru_cache():
+    cache: LRUCache[str, int] = LRUCache(2)
+    assert cache.get("a", lambda: 1) == 1
+    assert cache.get("b", lambda: 2) == 2
+    # Hit does not call the factory, and marks as recently used
+    assert cache.get("a", lambda: 10) == 1
+    cache.get("c", lambda: 3)
+    assert "b" not in cache
+    assert "a" in cache
+    assert len(cache) == 2
+    assert cache.pop("a") == 1
+    assert cache.pop("a") is None
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_lru_cache_ex():
+    with pytest.raises(ValueError):
+        LRUCache(0)
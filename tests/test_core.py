@@ -1,12 +1,21 @@
 from __future__ import annotations
 
+import io
 import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeout
 from glob import glob
+from pathlib import Path
+from threading import Event
 from unittest.mock import patch
 
+import numpy as np
 import pytest
+from scipy.io import wavfile
 
-from nwave import Batch, WaveCore, __version__, effects
+from nwave import Batch, Task, TaskStats, WaveCore, __version__, effects
+from nwave.hooks import Hook
+from nwave.interlocked import WriteOptions
 
 
 def test_version():
@@ -76,3 +85,245 @@ def test_core_glob_ex():
     # Test no files found
     with pytest.raises(ValueError):
         Batch.from_glob("no_exists/*.wav", "no_exists/")
+
+
+def test_core_process_backend(data_dir):
+    src_files = glob(os.path.join(data_dir, "*.wav"))
+    out_files = [f.replace(".wav", "_out.wav") for f in src_files]
+    batch = Batch(src_files, out_files).apply(effects.Resample(44100))
+    with WaveCore(threads=2, backend="process") as core:
+        core.schedule(batch)
+        results = core.wait_all(timeout=60)
+    assert len(results) == len(src_files)
+    for result in results:
+        assert result.success
+        assert os.path.exists(result.task.file_output)
+    # Workers are shared between instances
+    with WaveCore(threads=2, backend="process") as core_2:
+        assert core_2._executor is core._executor
+
+
+def test_core_process_backend_errors():
+    # Errors raised in workers are passed back through TaskResult
+    batch = Batch(["no_exists.wav"], ["no_exists_out.wav"])
+    results = batch.run(threads=2, backend="process")
+    assert len(results) == 1
+    assert not results[0].success
+    assert "During File Loading" in str(results[0].error)
+
+
+def test_core_auto_backend(data_dir):
+    src_files = sorted(glob(os.path.join(data_dir, "*.wav")))
+    threaded = Batch(src_files, [f.replace(".wav", "_t.wav") for f in src_files])
+    threaded.apply(effects.Resample(16000))
+    # Holds the GIL, so runs on processes
+    held = Batch(src_files, [f.replace(".wav", "_p.wav") for f in src_files])
+    held.apply(effects.Wrapper(np.flip))
+    events = []
+
+    class Recorder(Hook):
+        def on_complete(self, result):
+            events.append(result.task.file_output)
+
+    with WaveCore(2, backend="auto", hooks=[Recorder()]) as core:
+        core.schedule(threaded)
+        core.schedule(held)
+        results = core.wait_all(timeout=60)
+        assert isinstance(core._executor, ThreadPoolExecutor)
+        assert isinstance(core._process_executor, ProcessPoolExecutor)
+    assert all(result.success for result in results)
+    assert [core._threaded(r.task) for r in results] == [True] * 5 + [False] * 5
+    assert len(events) == 10
+
+
+def test_core_backend_ex():
+    with pytest.raises(ValueError):
+        WaveCore(backend="fiber")
+
+
+def test_core_yield_unordered(data_dir):
+    src_files = glob(os.path.join(data_dir, "*.wav"))
+    out_files = [f.replace(".wav", "_out.wav") for f in src_files]
+    batch = Batch(src_files, out_files).apply(effects.Resample(44100))
+    with WaveCore() as core:
+        core.schedule(batch)
+        results = core.yield_all(timeout=30, ordered=False)
+        assert len(results) == len(src_files)
+        outputs = {str(result.task.file_output) for result in results}
+        assert outputs == set(out_files)
+        assert core.n_tasks == 0
+
+
+def test_core_yield_unordered_completion_order():
+    # A slow task must not hold back finished ones
+    release = Event()
+
+    def slow():
+        release.wait(10)
+        return TaskStats()
+
+    with WaveCore(threads=2) as core:
+        slow_future = core._executor.submit(slow)
+        fast_future = core._executor.submit(TaskStats)
+        slow_task = Task("slow.wav", "slow_out.wav", [], False)
+        fast_task = Task("fast.wav", "fast_out.wav", [], False)
+        core._task_queue.extend([(slow_future, slow_task), (fast_future, fast_task)])
+        results = core.yield_all(ordered=False)
+        assert next(results).task is fast_task
+        release.set()
+        assert next(results).task is slow_task
+
+
+def test_core_yield_unordered_timeout():
+    release = Event()
+    with WaveCore(threads=1) as core:
+        future = core._executor.submit(release.wait, 10)
+        core._task_queue.append((future, Task("a.wav", "b.wav", [], False)))
+        with pytest.raises(FuturesTimeout):
+            next(core.yield_all(timeout=0.1, ordered=False))
+        release.set()
+        assert core.n_tasks == 0
+
+
+def test_core_max_pending(data_dir):
+    src_files = glob(os.path.join(data_dir, "*.wav"))
+    pairs = ((f, f.replace(".wav", "_out.wav")) for f in src_files)
+    batch = Batch.from_pairs(pairs).apply(effects.Resample(44100))
+    assert batch.size is None
+    with WaveCore(threads=2, max_pending=2) as core:
+        core.schedule(batch)
+        # Only the high-water mark is submitted up front
+        assert core.n_submitted == 2
+        results = core.yield_all(timeout=30)
+        count = 0
+        for result in results:
+            assert result.success
+            assert core.n_submitted <= 2
+            count += 1
+        assert count == len(src_files)
+        assert core.n_tasks == 0
+
+
+def test_core_max_pending_unordered(data_dir):
+    src_files = glob(os.path.join(data_dir, "*.wav"))
+    out_files = [f.replace(".wav", "_out.wav") for f in src_files]
+    batch = Batch.from_pairs(list(zip(src_files, out_files)))
+    with WaveCore(threads=2, max_pending=1) as core:
+        core.schedule(batch)
+        results = core.yield_all(ordered=False)
+        assert len(results) == len(src_files)
+        assert len(list(results)) == len(src_files)
+
+
+def test_core_max_pending_ex():
+    with pytest.raises(ValueError):
+        WaveCore(max_pending=0)
+
+
+@pytest.mark.parametrize("backend", ["thread", "process"])
+def test_map_arrays(backend):
+    items = [(np.full(4410 * (i + 1), i, dtype=np.int16), 44100) for i in range(4)]
+    chain = [effects.PadSilence(0.1, 0), effects.Resample(22050)]
+    with WaveCore(2, backend=backend) as core:
+        results = list(core.map_arrays(items, chain))
+    assert [len(r.data) for r in results] == [2205 * (i + 2) for i in range(4)]
+    assert all(r.sample_rate == 22050 and r.data.dtype == np.int16 for r in results)
+    assert str(results[0].task.file_source) == "<array 0>"
+    assert core.report().tasks == 4
+
+
+def test_map_bytes():
+    buffer = io.BytesIO()
+    wavfile.write(buffer, 44100, np.zeros(4410, dtype=np.int16))
+    with WaveCore(2) as core:
+        results = list(
+            core.map_bytes([buffer.getvalue(), b"bad"], [effects.Resample(8000)])
+        )
+    sample_rate, data = wavfile.read(io.BytesIO(results[0].data))
+    assert (sample_rate, len(data)) == (8000, 800)
+    assert not results[1].success
+    assert str(results[1].error).startswith("During File Loading")
+    assert "[Failed]" in str(results[1])
+
+
+@pytest.mark.parametrize("backend", ["thread", "process"])
+@pytest.mark.parametrize("max_pending", [None, 3])
+def test_micro_batch(data_dir, backend, max_pending):
+    src_files = sorted(glob(os.path.join(data_dir, "*.wav")))
+    src_files.append(os.path.join(data_dir, "missing.wav"))
+    out_files = [f.replace(".wav", "_out.wav") for f in src_files]
+    batch = Batch(src_files, out_files).apply(effects.Resample(16000))
+    with WaveCore(2, backend=backend, max_pending=max_pending, micro_batch=4) as core:
+        core.schedule(batch)
+        results = list(core.yield_all())
+    assert [r.task.file_source for r in results] == [Path(f) for f in src_files]
+    assert [r.success for r in results] == [True] * 5 + [False]
+    assert all(os.path.exists(f) for f in out_files[:-1])
+    assert core.report().tasks == 6
+
+
+@pytest.mark.parametrize("estimate", ["size", "duration"])
+def test_policy(data_dir, estimate):
+    # Sources of lengths 1, 3, 2 and 3 seconds, and a missing one
+    src_files = []
+    for i, seconds in enumerate([1, 3, 2, 3]):
+        file = os.path.join(data_dir, f"clip_{i}.wav")
+        wavfile.write(file, 8000, np.zeros(8000 * seconds, dtype=np.int16))
+        src_files.append(file)
+    src_files.append(os.path.join(data_dir, "missing.wav"))
+    out_files = [f.replace(".wav", "_out.wav") for f in src_files]
+
+    def order(policy: str) -> list[str]:
+        batch = Batch(src_files, out_files, overwrite=True)
+        with WaveCore(1, policy=policy, estimate=estimate) as core:
+            core.schedule(batch)
+            results = core.wait_all()
+        return [os.path.basename(r.task.file_source) for r in results]
+
+    assert order("fifo") == [os.path.basename(f) for f in src_files]
+    # Ties keep batch order
+    assert order("lpt") == [
+        "clip_1.wav",
+        "clip_3.wav",
+        "clip_2.wav",
+        "clip_0.wav",
+        "missing.wav",
+    ]
+    assert order("spt") == [
+        "missing.wav",
+        "clip_0.wav",
+        "clip_2.wav",
+        "clip_1.wav",
+        "clip_3.wav",
+    ]
+    with pytest.raises(ValueError):
+        WaveCore(policy="random")
+    with pytest.raises(ValueError):
+        WaveCore(estimate="frames")
+
+
+def test_micro_batch_cancel(data_dir):
+    src_files = sorted(glob(os.path.join(data_dir, "*.wav")))
+    out_files = [f.replace(".wav", "_out.wav") for f in src_files]
+    event = Event()
+    chain = [effects.Wrapper(lambda data: event.wait(5) and data)]
+    with WaveCore(1, micro_batch=2) as core:
+        core.schedule(Batch(src_files, out_files).apply(*chain))
+        with pytest.raises(FuturesTimeout):
+            next(core.yield_all(timeout=0.1))
+        event.set()
+    # Queued groups were cancelled with their tasks
+    assert sum(os.path.exists(f) for f in out_files) <= 2
+
+
+def test_core_sync(data_dir):
+    src_files = sorted(glob(os.path.join(data_dir, "*.wav")))
+    out_files = [f.replace(".wav", "_out.wav") for f in src_files]
+    options = WriteOptions(fsync="batch")
+    batch = Batch(src_files, out_files, write_options=options)
+    with patch("nwave.core.sync_dirs") as sync_dirs:
+        results = batch.run(threads=2)
+    assert all(result.success for result in results)
+    # Directories are synced once for the whole batch
+    sync_dirs.assert_called_once()
+    assert sorted(sync_dirs.call_args[0][0]) == [Path(f) for f in out_files]
@@ -3,13 +3,15 @@ from __future__ import annotations
 import gzip
 import math
 from importlib.resources import path
+from unittest.mock import patch
 
+import numpy as np
 import pytest
 import soundfile as sf
 import soxr
 
 import nwave.effects as fx
-from nwave import TaskException
+from nwave import TaskException, kernels
 
 from . import data as test_data
 
@@ -122,6 +124,59 @@ def test_resample(wav, target_sr, quality):
     assert math.isclose(factor, expected_factor, rel_tol=0.01)  # 1% tolerance
 
 
+@pytest.mark.parametrize("quality", ["QQ", "LQ", "MQ", "HQ", "VHQ"])
+def test_resample_quality(wav, quality):
+    data, sr = wav
+    effect = fx.Resample(44100, quality)
+    with patch("nwave.effects.get_resampler", wraps=fx.get_resampler) as resampler:
+        effect.apply_trace(data, sr)
+    assert resampler.call_args[0][0] == (sr, 44100, quality, 1, "float64")
+
+
+def test_resample_int_repeatable():
+    # Integer output matches soxr.resample regardless of earlier files
+    rng = np.random.default_rng(0)
+    effect = fx.Resample(16000)
+    for _ in range(3):
+        data = (rng.standard_normal(44100) * 3000).astype(np.int16)
+        out, _ = effect.apply_trace(data, 44100)
+        np.testing.assert_array_equal(out, soxr.resample(data, 44100, 16000, "HQ"))
+
+
+def test_resample_cache(wav):
+    data, sr = wav
+    effect = fx.Resample(16000, "MQ")
+    # Cached resampler is reset between files, so results are repeatable
+    first, _ = effect.apply_trace(data, sr)
+    second, _ = effect.apply_trace(data, sr)
+    np.testing.assert_array_equal(first, second)
+    np.testing.assert_array_equal(first, soxr.resample(data, sr, 16000, "MQ"))
+    key = (sr, 16000, "MQ", 1, "float64")
+    assert fx.get_resampler(key) is fx.get_resampler(key)
+    # Stereo uses a separate engine
+    stereo, _ = effect.apply_trace(np.stack([data, data], axis=1), sr)
+    assert stereo.shape == (len(first), 2)
+
+
+@pytest.mark.parametrize(
+    "in_dtype, dtype, out_dtype",
+    [
+        (np.float32, None, np.float32),  # No upcast
+        (np.float64, None, np.float64),
+        (np.float64, "float32", np.float32),
+        (np.int16, None, np.int16),
+        (np.int16, "float32", np.int16),  # Integers are kept native
+    ],
+)
+def test_resample_dtype(wav, in_dtype, dtype, out_dtype):
+    data, sr = wav
+    if np.issubdtype(in_dtype, np.integer):
+        data = data * np.iinfo(in_dtype).max
+    effect = fx.Resample(44100, dtype=dtype)
+    re_data, _ = effect.apply_trace(data.astype(in_dtype), sr)
+    assert re_data.dtype == out_dtype
+
+
 # Test Resample Exceptions
 @pytest.mark.parametrize(
     "target_sr, quality, ex",
@@ -140,6 +195,11 @@ def test_resample_exceptions(wav, target_sr, quality, ex):
         effect.apply_trace(data, sr)
 
 
+def test_resample_dtype_exceptions():
+    with pytest.raises(ValueError):
+        fx.Resample(44100, dtype="int16")
+
+
 # Test Resample Task Exception
 def test_resample_exceptions_task(wav):
     # Load data
@@ -163,6 +223,44 @@ def test_pad_silence(wav):
     assert math.isclose(res_time, original_time + 0.5, rel_tol=0.01)
 
 
+@pytest.mark.parametrize("dtype", [np.int16, np.int32, np.float32, np.float64])
+@pytest.mark.parametrize("channels", [None, 1, 2])
+def test_pad_silence_layout(dtype, channels):
+    shape = (100,) if channels is None else (100, channels)
+    data = np.ones(shape, dtype=dtype)
+    effect = fx.PadSilence(0.01, 0.02)
+    out, sr = effect.apply_trace(data, 1000)
+    assert sr == 1000
+    assert out.dtype == dtype
+    assert out.shape == effect.output_shape(data.shape, 1000) == (130,) + shape[1:]
+    assert not out[:10].any()
+    assert out[10:110].all()
+    assert not out[110:].any()
+    # Empty input is all silence
+    out, _ = effect.apply(data[:0], 1000)
+    assert out.shape == (30,) + shape[1:] and not out.any()
+
+
+def test_pad_silence_out():
+    effect = fx.PadSilence(0.01, 0.02)
+    data = np.ones((100, 2), dtype=np.int16)
+    # Pad into a preallocated buffer
+    buffer = np.full(effect.output_shape(data.shape, 1000), 7, dtype=np.int16)
+    out, _ = effect.apply(data, 1000, out=buffer)
+    assert out is buffer
+    assert not out[:10].any() and out[10:110].all() and not out[110:].any()
+    # Data already in place is not copied
+    buffer = np.zeros(effect.output_shape(data.shape, 1000), dtype=np.int16)
+    view = buffer[10:110]
+    view[...] = 3
+    assert fx._same_view(buffer[10:110], view)
+    out, _ = effect.apply(view, 1000, out=buffer)
+    assert (out[10:110] == 3).all()
+    # Wrong shape
+    with pytest.raises(ValueError):
+        effect.apply(data, 1000, out=np.zeros(5, dtype=np.int16))
+
+
 def test_pad_silence_exceptions(wav):
     # Non-positive padding
     with pytest.raises(ValueError):
@@ -184,3 +282,159 @@ def test_time_stretch(wav):
     # Test for Exceptions
     with pytest.raises(ValueError):
         fx.TimeStretch(factor=-1)
+
+
+@pytest.mark.parametrize("channels", [1, 2])
+@pytest.mark.parametrize("dtype", ["int16", "float32"])
+def test_apply_batch(channels, dtype):
+    rng = np.random.default_rng(0)
+    shape = (3, 8000) if channels == 1 else (3, 8000, channels)
+    clips = (rng.uniform(-0.5, 0.5, shape) * 1000).astype(dtype)
+    for effect in (fx.Resample(16000), fx.PadSilence(0.01, 0.02)):
+        stacked, sr = effect.apply_batch(clips, 8000)
+        for clip, result in zip(clips, stacked):
+            expected, expected_sr = effect.apply(clip, 8000)
+            assert sr == expected_sr
+            assert result.dtype == expected.dtype
+            # soxr may round integer output of more channels differently
+            np.testing.assert_allclose(result, expected, atol=2)
+
+
+def test_apply_batch_fallback():
+    clips = np.arange(12, dtype=np.float32).reshape(3, 4)
+    stacked, sr = fx.Wrapper(np.flip).apply_batch(clips, 100)
+    assert sr == 100
+    np.testing.assert_array_equal(stacked, clips[:, ::-1])
+    # Outputs of different shapes cannot be stacked
+    trim = fx.Wrapper(lambda data: data[: int(data[0]) + 1])
+    with pytest.raises(TaskException):
+        trim.apply_batch_trace(clips, 100)
+
+
+@pytest.mark.parametrize("dtype", ["int16", "float32"])
+def test_gain(dtype):
+    data = np.array([[-0.25, 0.5], [0.125, -0.75]]) * kernels.full_scale(dtype)
+    data = data.astype(dtype)
+    out, sr = fx.Gain(6.0206).apply_trace(data, 100)
+    assert sr == 100
+    assert out.dtype == data.dtype
+    # Doubled, clipped at full scale for integers
+    expected = np.clip(data.astype(np.float64) * 2, -32768, 32767)
+    np.testing.assert_allclose(out, expected, rtol=1e-3, atol=1)
+    assert fx.Gain(0).is_noop
+    assert fx.Gain(3).fuse(fx.Gain(-3)) is None
+    assert fx.Gain(3).fuse(fx.Gain(2)).db == 5
+
+
+@pytest.mark.parametrize("dtype", ["int16", "float64"])
+def test_normalize(dtype):
+    data = (np.array([0.1, -0.25, 0.2]) * kernels.full_scale(dtype)).astype(dtype)
+    out, _ = fx.Normalize(-6.0206).apply_trace(data, 100)
+    assert out.dtype == data.dtype
+    expected = data.astype(np.float64) * 2
+    np.testing.assert_allclose(out, expected, rtol=1e-3, atol=1)
+    # Silence is unchanged
+    silence = np.zeros(3, dtype=dtype)
+    assert fx.Normalize().apply(silence, 100)[0] is silence
+
+
+def test_remove_dc():
+    data = np.array([[3, -1], [5, 1]], dtype=np.int16)
+    out, _ = fx.RemoveDC().apply_trace(data, 100)
+    np.testing.assert_array_equal(out, [[-1, -1], [1, 1]])
+
+
+def test_fade(wav):
+    data, sr = wav
+    out, _ = fx.Fade(0.1, 0.2).apply_trace(data, sr)
+    assert out.shape == data.shape
+    assert out[0] == 0 and out[-1] == 0
+    middle = slice(int(0.1 * sr), len(data) - int(0.2 * sr))
+    np.testing.assert_array_equal(out[middle], data[middle])
+    assert fx.Fade().is_noop
+    with pytest.raises(ValueError):
+        fx.Fade(-1)
+
+
+def test_mixdown():
+    data = np.array([[2, 4], [-3, 1]], dtype=np.int16)
+    out, _ = fx.Mixdown().apply_trace(data, 100)
+    np.testing.assert_array_equal(out, [3, -1])
+    mono = np.arange(3, dtype=np.int16)
+    assert fx.Mixdown().apply(mono, 100)[0] is mono
+    assert fx.Mixdown().unchanged_for(100, 1, np.dtype("int16"))
+
+
+def test_convert():
+    data = np.array([-32768, 16384, 32767], dtype=np.int16)
+    out, _ = fx.Convert("float32").apply_trace(data, 100)
+    assert out.dtype == np.float32
+    np.testing.assert_allclose(out, [-1, 0.5, 32767 / 32768])
+    back, _ = fx.Convert("int16").apply_trace(out, 100)
+    np.testing.assert_array_equal(back, data)
+    # Out of range floats are clipped
+    clipped, _ = fx.Convert("int16").apply(np.array([1.5, -2.0]), 100)
+    np.testing.assert_array_equal(clipped, [32767, -32768])
+    assert fx.Convert("int16").unchanged_for(100, 1, np.dtype("int16"))
+    with pytest.raises(ValueError):
+        fx.Convert("complex64")
+
+
+def test_unsigned_effects():
+    # 8-bit PCM is offset binary, silent at 128
+    data = np.array([0, 128, 255], dtype=np.uint8)
+    out, _ = fx.Convert("float32").apply_trace(data, 100)
+    np.testing.assert_allclose(out, [-1, 0, 127 / 128])
+    out, _ = fx.Convert("int16").apply_trace(data, 100)
+    np.testing.assert_array_equal(out, [-32768, 0, 32512])
+    quiet = np.array([96, 128, 160], dtype=np.uint8)
+    out, _ = fx.Normalize().apply_trace(quiet, 100)
+    np.testing.assert_array_equal(out, [0, 128, 255])
+    out, _ = fx.Gain(20 * np.log10(2)).apply_trace(quiet, 100)
+    np.testing.assert_array_equal(out, [64, 128, 192])
+    out, _ = fx.RemoveDC().apply_trace(np.array([138, 118, 128], np.uint8), 100)
+    np.testing.assert_array_equal(out, [138, 118, 128])
+    out, _ = fx.PadSilence(0.01, 0.01).apply_trace(data, 100)
+    np.testing.assert_array_equal(out, [128, 0, 128, 255, 128])
+
+
+@pytest.mark.parametrize(
+    "effect",
+    [fx.Gain(-3), fx.Mixdown(), fx.Convert("float32")],
+    ids=lambda effect: effect.name,
+)
+def test_kernel_streams(effect):
+    data = np.random.default_rng(0).integers(-1000, 1000, (1000, 2)).astype(np.int16)
+    expected, _ = effect.apply(data, 100)
+    stream = effect.stream(100, 2, data.dtype)
+    # Empty blocks come from effects that buffer, such as Resample
+    blocks = [stream.process(data[:0], False)]
+    blocks += [
+        stream.process(data[i : i + 300], i + 300 >= 1000) for i in range(0, 1000, 300)
+    ]
+    np.testing.assert_array_equal(np.concatenate(blocks), expected)
+
+
+def test_wrapper_signature():
+    def target(x, in_rate, gain=1.0):
+        return x * gain, in_rate
+
+    # Arguments the function does not take fail on construction
+    with pytest.raises(TypeError):
+        fx.Wrapper(target, data_arg="y", sr_arg="in_rate")
+    with pytest.raises(TypeError):
+        fx.Wrapper(target, data_arg="x", sr_arg="in_rate", volume=2)
+    with pytest.raises(TypeError):
+        fx.Wrapper(target, data_arg="x", sr_arg="in_rate", x=np.zeros(1))
+    # Missing required arguments too
+    with pytest.raises(TypeError):
+        fx.Wrapper(target, data_arg="x")
+    effect = fx.Wrapper(target, data_arg="x", sr_arg="in_rate", gain=2.0)
+    out, sr = effect.apply(np.ones(2), 100)
+    np.testing.assert_array_equal(out, [2.0, 2.0])
+    assert sr == 100
+    # Arguments of a call are not stored, so threads never share them
+    assert effect._kwargs == {"gain": 2.0}
+    assert not effect.releases_gil
+    assert fx.Wrapper(np.flip, releases_gil=True).releases_gil
+    assert fx.Resample(16000).releases_gil
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import functools
+import os
+import threading
+from glob import glob
+from os.path import join
+
+import numpy as np
+import pytest
+
+from nwave import effects
+from nwave.common.fingerprint import (
+    ChainFingerprints,
+    FingerprintError,
+    chain_fingerprint,
+    source_fingerprint,
+    stable_repr,
+)
+
+
+def make_scale(factor):
+    def scale(data):
+        return data * factor
+
+    return scale
+
+
+def define(body):
+    namespace = {}
+    exec(f"def shift(data):\n    return {body}", namespace)
+    return namespace["shift"]
+
+
+class Scaler:
+    def __init__(self, factor):
+        self.factor = factor
+
+    def apply(self, data):
+        return data * self.factor
+
+
+def test_stable_repr():
+    assert stable_repr({"b", "a"}) == stable_repr({"a", "b"}) == "{'a', 'b'}"
+    assert stable_repr({"b": 1, "a": 2}) == "{'a': 2, 'b': 1}"
+    assert stable_repr(np.flip).startswith("numpy.flip")
+    assert stable_repr(np.multiply) == "numpy.multiply"
+    assert stable_repr(np.dtype("int16")) == "<i2"
+    assert stable_repr(np.zeros(2)) == stable_repr(np.zeros(2))
+    # Same bytes with another dtype or shape
+    assert stable_repr(np.zeros(2)) != stable_repr(np.zeros(4, np.int32))
+    assert stable_repr(np.zeros(4)) != stable_repr(np.zeros((2, 2)))
+
+
+def test_chain_fingerprint():
+    chain = [effects.Resample(16000, "VHQ"), effects.PadSilence(0.5, 0.5)]
+    same = [effects.Resample(16000, "VHQ"), effects.PadSilence(0.5, 0.5)]
+    assert chain_fingerprint(chain) == chain_fingerprint(same)
+    assert chain_fingerprint(chain) != chain_fingerprint(chain[::-1])
+    assert chain_fingerprint(chain) != chain_fingerprint(chain[:1])
+    assert "Resample" in chain[0].fingerprint
+
+
+def test_source_fingerprint(data_dir):
+    first, second = sorted(glob(join(data_dir, "*.wav")))[:2]
+    # Identical contents hash the same
+    assert source_fingerprint(first) == source_fingerprint(second)
+    size = os.stat(first).st_size
+    os.utime(first, ns=(1, 1))
+    assert source_fingerprint(first, fast=True) == f"{size}:1"
+
+
+def test_stable_repr_callables():
+    # Partials by their function and arguments
+    double = stable_repr(functools.partial(np.multiply, 2))
+    assert double == stable_repr(functools.partial(np.multiply, 2))
+    assert double != stable_repr(functools.partial(np.multiply, 3))
+    assert double != stable_repr(functools.partial(np.add, 2))
+    # Closures by their cell values
+    assert stable_repr(make_scale(2)) == stable_repr(make_scale(2))
+    assert stable_repr(make_scale(2)) != stable_repr(make_scale(3))
+    # Functions by their code, with the same name
+    assert stable_repr(define("data + 1")) == stable_repr(define("data + 1"))
+    assert stable_repr(define("data + 1")) != stable_repr(define("data + 2"))
+    assert stable_repr(define("data + 1")) != stable_repr(define("data - 1"))
+    # Bound methods by their object
+    assert stable_repr(Scaler(2).apply) == stable_repr(Scaler(2).apply)
+    assert stable_repr(Scaler(2).apply) != stable_repr(Scaler(3).apply)
+
+
+def test_stable_repr_unstable():
+    with pytest.raises(FingerprintError):
+        stable_repr(threading.Lock())
+    chain = [effects.Wrapper(functools.partial(np.multiply, threading.Lock()))]
+    with pytest.raises(FingerprintError):
+        chain_fingerprint(chain)
+    assert ChainFingerprints()(chain) is None
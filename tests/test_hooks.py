@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import os
+import threading
+from glob import glob
+
+import pytest
+
+from nwave import Batch, WaveCore, effects
+from nwave.hooks import Hook, HookList
+
+
+class Recorder(Hook):
+    def __init__(self):
+        self.events = []
+        self.lock = threading.Lock()
+
+    def _add(self, *event):
+        with self.lock:
+            self.events.append(event)
+
+    def on_schedule(self, task):
+        self._add("schedule", task.file_source.name)
+
+    def on_start(self, task):
+        self._add("start", task.file_source.name)
+
+    def on_stage_end(self, task, stage, seconds):
+        assert seconds >= 0
+        self._add("stage", task.file_source.name, stage)
+
+    def on_complete(self, result):
+        self._add("complete", result.task.file_source.name)
+
+    def on_error(self, result):
+        self._add("error", result.task.file_source.name)
+
+
+def test_hook_list():
+    # Base hook events are no-ops
+    hooks = HookList([Hook()])
+    recorder = Recorder()
+    hooks.append(recorder)
+    assert len(hooks) == 2
+    batch = Batch(["a.wav"], ["b.wav"])
+    hooks.on_schedule(batch.tasks[0])
+    assert recorder.events == [("schedule", "a.wav")]
+
+
+@pytest.mark.parametrize("backend", ["thread", "process"])
+def test_core_hooks(data_dir, backend):
+    src_files = glob(os.path.join(data_dir, "*.wav"))
+    out_files = [f.replace(".wav", "_out.wav") for f in src_files]
+    batch = Batch(src_files + ["missing.wav"], out_files + ["missing_out.wav"])
+    batch.apply(effects.Resample(16000))
+    recorder = Recorder()
+    with WaveCore(threads=2, backend=backend, hooks=[recorder]) as core:
+        core.schedule(batch)
+        core.wait_all()
+
+    name = os.path.basename(src_files[0])
+    events = [event for event in recorder.events if event[1] == name]
+    assert events == [
+        ("schedule", name),
+        ("start", name),
+        ("stage", name, "load"),
+        ("stage", name, "Resample"),
+        ("stage", name, "write"),
+        ("complete", name),
+    ]
+    assert ("error", "missing.wav") in recorder.events
+
+
+def test_core_add_hook():
+    with WaveCore() as core:
+        assert not core.hooks
+        core.add_hook(Recorder())
+        assert len(core.hooks) == 1
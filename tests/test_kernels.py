@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import math
+import threading
+
+import numpy as np
+import pytest
+
+from nwave import kernels
+
+
+def test_limits():
+    assert kernels.limits(np.int16) == (-32768.0, 32767.0, True)
+    assert kernels.limits(np.float32) == (-math.inf, math.inf, False)
+    assert kernels.full_scale(np.int16) == 32768.0
+    assert kernels.full_scale(np.int32) == 2.0**31
+    assert kernels.full_scale(np.float64) == 1.0
+    assert kernels.full_scale(np.uint8) == 128.0
+    assert kernels.midpoint(np.uint8) == 128.0
+    assert kernels.midpoint(np.int16) == kernels.midpoint(np.float32) == 0.0
+
+
+def test_as_frames():
+    assert kernels.as_frames(np.zeros(5)).shape == (5, 1)
+    assert kernels.as_frames(np.zeros((5, 2))).shape == (5, 2)
+    assert kernels.as_frames(np.zeros(0)).shape == (0, 1)
+    assert kernels.as_frames(np.zeros((0, 2))).shape == (0, 2)
+
+
+@pytest.mark.parametrize("dtype", [np.int16, np.int32, np.float32, np.float64])
+def test_scale(dtype):
+    data = np.array([[-3, 1], [2, 5]], dtype=dtype)
+    out = np.empty_like(data)
+    kernels.scale(data, 2.5, out, *kernels.limits(dtype))
+    expected = data * 2.5
+    if out.dtype.kind == "i":
+        # Rounded half up
+        expected = np.floor(expected + 0.5)
+    np.testing.assert_array_equal(out, expected)
+
+
+def test_scale_clips():
+    data = np.array([[-30000], [20000]], dtype=np.int16)
+    out = np.empty_like(data)
+    kernels.scale(data, 2.0, out, *kernels.limits(np.int16))
+    np.testing.assert_array_equal(out.ravel(), [-32768, 32767])
+    # Conversion to float
+    out = np.empty(data.shape, dtype=np.float32)
+    kernels.scale(data, 1 / 32768, out, *kernels.limits(np.float32))
+    np.testing.assert_allclose(out.ravel(), data.ravel() / 32768)
+
+
+def test_unsigned():
+    data = np.array([[0], [128], [255]], dtype=np.uint8)
+    out = np.empty_like(data)
+    kernels.scale(data, 0.5, out, *kernels.limits(np.uint8), 128.0, 128.0)
+    np.testing.assert_array_equal(out.ravel(), [64, 128, 192])
+    assert kernels.peak(data, 128.0) == 128.0
+    kernels.ramp(data, 2, 0, out, *kernels.limits(np.uint8), 128.0)
+    np.testing.assert_array_equal(out.ravel(), [128, 128, 255])
+
+
+def test_reductions():
+    data = np.array([[1.0, -4.0], [3.0, 2.0]])
+    assert kernels.peak(data) == 4.0
+    np.testing.assert_array_equal(kernels.channel_means(data), [2.0, -1.0])
+    out = np.empty_like(data)
+    kernels.offset(data, np.array([2.0, -1.0]), out, *kernels.limits(data.dtype))
+    np.testing.assert_array_equal(out, [[-1.0, -3.0], [1.0, 3.0]])
+    mono = np.empty(2)
+    kernels.mixdown(data, mono, *kernels.limits(mono.dtype))
+    np.testing.assert_array_equal(mono, [-1.5, 2.5])
+
+
+def test_ramp():
+    data = np.ones((9, 1))
+    out = np.empty_like(data)
+    kernels.ramp(data, 4, 2, out, *kernels.limits(data.dtype))
+    np.testing.assert_allclose(out.ravel(), [0, 0.25, 0.5, 0.75, 1, 1, 1, 0.5, 0])
+
+
+def test_read_only():
+    data = np.ones((4, 1), dtype=np.int16)
+    data.flags.writeable = False
+    out = np.empty_like(data)
+    kernels.scale(data, 2.0, out, *kernels.limits(data.dtype))
+    assert (out == 2).all()
+
+
+def test_threads():
+    # Kernels run concurrently without the GIL
+    data = np.random.default_rng(0).standard_normal((100_000, 2))
+    outs = [np.empty_like(data) for _ in range(4)]
+    threads = [
+        threading.Thread(
+            target=kernels.scale, args=(data, 0.5, out, *kernels.limits(data.dtype))
+        )
+        for out in outs
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for out in outs:
+        np.testing.assert_array_equal(out, data * 0.5)
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import os
+import threading
+from glob import glob
+from os.path import join
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from nwave import Batch, Task, TaskResult, WaveCore, effects
+from nwave.common.fingerprint import source_fingerprint
+from nwave.manifest import Manifest
+
+
+def append_to_source(data, data_dir):
+    # Change every source while its task is processed
+    for name in os.listdir(data_dir):
+        if name.startswith("test_"):
+            with open(join(data_dir, name), "ab") as file:
+                file.write(b"\0")
+    return data
+
+
+def make_batch(data_dir, manifest, sample_rate=16000):
+    files = sorted(glob(join(data_dir, "test_*.wav")))
+    out_dir = join(data_dir, "out")
+    os.makedirs(out_dir, exist_ok=True)
+    outputs = [join(out_dir, os.path.basename(f)) for f in files]
+    batch = Batch(files, outputs, overwrite=True, manifest=manifest)
+    return batch.apply(effects.Resample(sample_rate))
+
+
+@pytest.mark.parametrize("fast", [True, False])
+def test_manifest_resume(data_dir, fast):
+    path = join(data_dir, "manifest.jsonl")
+    with Manifest(path, fast=fast) as manifest:
+        results = make_batch(data_dir, manifest).run()
+        assert len(results) == 5
+        assert len(manifest) == 5
+    # A new run with the same manifest file skips everything
+    manifest = Manifest(path, fast=fast)
+    assert len(manifest) == 5
+    batch = make_batch(data_dir, manifest)
+    assert batch.size is None
+    assert batch.tasks == []
+    # Missing outputs, changed sources, or another chain are stale
+    os.remove(join(data_dir, "out", "test_0.wav"))
+    with open(join(data_dir, "test_1.wav"), "ab") as file:
+        file.write(b"\0\0")
+    stale = [t.file_source.name for t in make_batch(data_dir, manifest).tasks]
+    assert stale == ["test_0.wav", "test_1.wav"]
+    assert len(make_batch(data_dir, manifest, 22050).tasks) == 5
+    manifest.close()
+
+
+def test_manifest_new_files(data_dir):
+    manifest = Manifest(join(data_dir, "manifest.jsonl"))
+    make_batch(data_dir, manifest).run()
+    src = sorted(glob(join(data_dir, "test_*.wav")))[0]
+    with open(src, "rb") as file, open(join(data_dir, "test_9.wav"), "wb") as out:
+        out.write(file.read())
+    tasks = make_batch(data_dir, manifest).tasks
+    assert [t.file_source.name for t in tasks] == ["test_9.wav"]
+    manifest.close()
+
+
+def test_manifest_failed_not_recorded(data_dir):
+    manifest = Manifest(join(data_dir, "manifest.jsonl"))
+    task = Task(join(data_dir, "test_0.wav"), join(data_dir, "out.wav"), [], True)
+    manifest.on_error(TaskResult(task, ValueError()))
+    assert len(manifest) == 0
+    assert not os.path.exists(manifest.path)
+
+
+def test_manifest_unstable_chain(data_dir):
+    manifest = Manifest(join(data_dir, "manifest.jsonl"))
+    lock = threading.Lock()
+    chain = [effects.Wrapper(lambda data: data if lock else None)]
+    task = Task(join(data_dir, "test_0.wav"), join(data_dir, "out.wav"), chain, True)
+    manifest.on_complete(TaskResult(task))
+    assert len(manifest) == 0
+    assert not manifest.is_done(task)
+    manifest.close()
+
+
+def test_manifest_partial_line(data_dir):
+    path = join(data_dir, "manifest.jsonl")
+    manifest = Manifest(path)
+    make_batch(data_dir, manifest).run()
+    manifest.close()
+    # Simulate a crash during a write
+    with open(path, "a", encoding="utf-8") as file:
+        file.write('{"output": "trunc')
+    manifest = Manifest(path)
+    assert len(manifest) == 5
+    # Repeated records are dropped by compaction
+    for task in make_batch(data_dir, None).tasks:
+        manifest.add(task)
+    manifest.compact()
+    with open(path, encoding="utf-8") as file:
+        assert len(file.readlines()) == 5
+    assert make_batch(data_dir, Manifest(path)).tasks == []
+    manifest.close()
+
+
+def test_from_glob_manifest(data_dir):
+    manifest = Manifest(join(data_dir, "manifest.jsonl"))
+    out_dir = join(data_dir, "out")
+    os.mkdir(out_dir)
+    pattern = join(data_dir, "*.wav")
+    batch = Batch.from_glob(pattern, out_dir, manifest=manifest)
+    assert len(batch.run()) == 5
+    assert Batch.from_glob(pattern, out_dir, manifest=manifest).tasks == []
+    manifest.close()
+
+
+@pytest.mark.parametrize("backend", ["thread", "process"])
+def test_manifest_source_fp_before_processing(data_dir, backend):
+    path = join(data_dir, "manifest.jsonl")
+    manifest = Manifest(path, fast=False)
+    changing = effects.Wrapper(append_to_source, data_dir=data_dir)
+    batch = make_batch(data_dir, manifest).apply(changing)
+    with patch("nwave.manifest.source_fingerprint", wraps=source_fingerprint) as fp:
+        assert all(result.success for result in batch.run(backend=backend))
+    if backend == "thread":
+        # Each source is hashed once, by its worker
+        assert fp.call_count == 5
+    manifest.close()
+    # Sources changed while processing, so every record is stale
+    batch = make_batch(data_dir, Manifest(path, fast=False)).apply(changing)
+    assert len(batch.tasks) == 5
+
+
+def test_manifest_array_results(data_dir):
+    manifest = Manifest(join(data_dir, "manifest.jsonl"))
+    with WaveCore() as core:
+        core.schedule(make_batch(data_dir, manifest))
+        assert len(list(core.yield_all())) == 5
+        results = list(core.map_arrays([(np.zeros(100), 100)], []))
+    assert results[0].success
+    assert len(manifest) == 5
+    manifest.close()
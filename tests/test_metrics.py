@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import os
+from glob import glob
+from tempfile import TemporaryDirectory
+
+from nwave import Batch, WaveCore, effects
+from nwave.metrics import Histogram, HistogramCollector, PrometheusExporter
+
+
+def test_histogram():
+    histogram = Histogram([0.1, 1.0])
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value)
+    assert histogram.count == 4
+    assert histogram.sum == 2.65
+    assert histogram.cumulative() == [(0.1, 2), (1.0, 3), (float("inf"), 4)]
+
+
+def test_collector_and_exporter(data_dir):
+    src_files = glob(os.path.join(data_dir, "*.wav"))
+    out_files = [f.replace(".wav", "_out.wav") for f in src_files]
+    batch = Batch(src_files, out_files).apply(effects.Resample(16000))
+    collector = HistogramCollector()
+    with TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "nwave.prom")
+        exporter = PrometheusExporter(collector, path, interval=0)
+        with WaveCore(threads=2, hooks=[collector, exporter]) as core:
+            core.schedule(batch)
+            core.wait_all()
+        assert collector.scheduled == collector.started == len(src_files)
+        assert collector.completed == len(src_files)
+        assert collector.queue_depth == collector.in_flight == 0
+        assert collector.stages["Resample"].count == len(src_files)
+
+        with open(path) as file:
+            text = file.read()
+    assert f"nwave_tasks_completed_total {len(src_files)}" in text
+    assert "# TYPE nwave_stage_seconds histogram" in text
+    assert (
+        f'nwave_stage_seconds_bucket{{stage="Resample",le="+Inf"}} {len(src_files)}'
+        in text
+    )
+    assert f'nwave_stage_seconds_count{{stage="write"}} {len(src_files)}' in text
+
+
+def test_exporter_interval():
+    collector = HistogramCollector()
+    with TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "nwave.prom")
+        exporter = PrometheusExporter(collector, path, interval=3600)
+        exporter.on_complete(None)
+        assert os.path.exists(path)
+        os.remove(path)
+        # Within the interval, nothing is written
+        exporter.on_error(None)
+        assert not os.path.exists(path)
+        collector.on_stage_end(None, 'we"ird', 0.5)
+        assert 'stage="we\\"ird"' in exporter.render()
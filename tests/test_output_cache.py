@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import functools
+import os
+import pickle
+import threading
+from glob import glob
+from os.path import join
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from scipy.io import wavfile
+
+from nwave import Batch, Task, audio, effects
+from nwave.audio_io import IOOptions
+from nwave.output_cache import OutputCache
+from nwave.stats import StatsCollector
+
+
+def scale(data, factor):
+    return data * factor
+
+
+def make_task(data_dir, cache, chain=None, name="out.wav"):
+    f = sorted(glob(join(data_dir, "test_*.wav")))[0]
+    chain = chain if chain is not None else [effects.Resample(16000)]
+    return Task(f, join(data_dir, name), chain, True, cache=cache)
+
+
+@pytest.mark.parametrize("link", [False, True])
+@pytest.mark.parametrize("fast", [False, True])
+def test_cache_hit(data_dir, fast, link):
+    cache = OutputCache(join(data_dir, "cache"), fast=fast, link=link)
+    first = audio.process(make_task(data_dir, cache))
+    assert not first.cache_hit
+    # Hits are restored without running the chain
+    with patch.object(effects.Resample, "apply", side_effect=AssertionError):
+        second = audio.process(make_task(data_dir, cache, name="again.wav"))
+    assert second.cache_hit
+    assert second.bytes_written == first.bytes_written
+    _, data = wavfile.read(join(data_dir, "out.wav"))
+    _, again = wavfile.read(join(data_dir, "again.wav"))
+    assert np.array_equal(data, again)
+    linked = os.stat(join(data_dir, "again.wav")).st_nlink > 1
+    assert linked == link
+
+
+def test_cache_key(data_dir):
+    cache = OutputCache(join(data_dir, "cache"))
+    key = cache.key(make_task(data_dir, cache))
+    # Same parameters in a new chain give the same key
+    assert cache.key(make_task(data_dir, cache, [effects.Resample(16000)])) == key
+    # Other parameters or sources do not
+    assert cache.key(make_task(data_dir, cache, [effects.Resample(22050)])) != key
+    assert cache.key(make_task(data_dir, cache, [])) != key
+    # Nor other output formats
+    assert cache.key(make_task(data_dir, cache, name="out.flac")) != key
+    task = make_task(data_dir, cache)
+    task.io_options = IOOptions(subtype="PCM_16")
+    assert cache.key(task) != key
+    task = make_task(data_dir, cache)
+    with open(task.file_source, "ab") as file:
+        file.write(b"\0")
+    assert cache.key(task) != key
+
+
+def test_cache_wrapper_key(data_dir):
+    cache = OutputCache(join(data_dir, "cache"))
+    chain = [effects.Wrapper(scale, factor=0.5)]
+    key = cache.key(make_task(data_dir, cache, chain))
+    # Applying the wrapper does not change its fingerprint
+    chain[0].apply(np.ones(4), 44100)
+    assert cache.key(make_task(data_dir, cache, list(chain))) == key
+    chain = [effects.Wrapper(scale, factor=0.25)]
+    assert cache.key(make_task(data_dir, cache, chain)) != key
+
+
+def test_cache_partial_key(data_dir):
+    cache = OutputCache(join(data_dir, "cache"))
+    double = [effects.Wrapper(functools.partial(np.multiply, 2))]
+    audio.process(make_task(data_dir, cache, double))
+    triple = [effects.Wrapper(functools.partial(np.multiply, 3))]
+    task = make_task(data_dir, cache, triple, name="triple.wav")
+    assert not audio.process(task).cache_hit
+    _, source = wavfile.read(task.file_source)
+    _, tripled = wavfile.read(task.file_output)
+    assert np.array_equal(source * 3, tripled)
+
+
+def test_cache_unstable_chain(data_dir):
+    cache = OutputCache(join(data_dir, "cache"))
+    lock = threading.Lock()
+    chain = [effects.Wrapper(lambda data: data if lock else None)]
+    assert cache.key(make_task(data_dir, cache, chain)) is None
+    # Processed without caching
+    for name in ("out.wav", "again.wav"):
+        stats = audio.process(make_task(data_dir, cache, chain, name=name))
+        assert not stats.cache_hit
+    assert cache.size() == 0
+
+
+def test_cache_eviction(data_dir):
+    files = sorted(glob(join(data_dir, "test_*.wav")))
+    size = os.stat(files[0]).st_size
+    cache = OutputCache(join(data_dir, "cache"), max_bytes=int(size * 1.5), fast=True)
+    for i, f in enumerate(files[:3]):
+        os.utime(f, ns=(i, i))
+        task = Task(f, join(data_dir, f"out_{i}.wav"), [], True)
+        cache.store(cache.key(task), f)
+    # Only the most recently stored entry fits
+    entries = cache.entries()
+    assert len(entries) == 1
+    assert cache.size() == size
+
+
+def test_cache_eviction_low_water(data_dir):
+    files = sorted(glob(join(data_dir, "test_*.wav")))
+    size = os.stat(files[0]).st_size
+    cache = OutputCache(join(data_dir, "cache"), max_bytes=4 * size, fast=True)
+    with patch.object(OutputCache, "entries", wraps=cache.entries) as entries:
+        for i in range(8):
+            f = files[i % len(files)]
+            os.utime(f, ns=(i, i))
+            task = Task(f, join(data_dir, f"out_{i}.wav"), [], True)
+            cache.store(cache.key(task), f)
+    # Scanned once for the initial size, then on every other store once
+    # full, as evicting down to 90% frees room for the next store
+    assert entries.call_count == 1 + 2
+    assert cache.size() == 4 * size
+
+
+def test_cache_lru_order(data_dir):
+    files = sorted(glob(join(data_dir, "test_*.wav")))
+    size = os.stat(files[0]).st_size
+    cache = OutputCache(join(data_dir, "cache"), max_bytes=int(size * 2.5), fast=True)
+    tasks = []
+    for i, f in enumerate(files[:3]):
+        # Distinct sources, so distinct keys
+        os.utime(f, ns=(i, i))
+        tasks.append(Task(f, join(data_dir, f"out_{i}.wav"), [], True, cache=cache))
+    keys = [cache.key(task) for task in tasks]
+    cache.store(keys[0], files[0])
+    cache.store(keys[1], files[1])
+    os.utime(cache.path(keys[1]), (0, 0))
+    # Restoring the first entry marks it as recently used
+    assert cache.restore(keys[0], tasks[0]) is not None
+    cache.store(keys[2], files[2])
+    assert os.path.exists(cache.path(keys[0]))
+    assert not os.path.exists(cache.path(keys[1]))
+    assert cache.restore(keys[1], tasks[1]) is None
+
+
+def test_cache_pickle(data_dir):
+    cache = OutputCache(join(data_dir, "cache"))
+    key = cache.key(make_task(data_dir, cache))
+    clone = pickle.loads(pickle.dumps(cache))
+    assert clone.key(make_task(data_dir, clone)) == key
+    clone.clear()
+    assert clone.size() == 0
+
+
+def test_batch_cache(data_dir):
+    files = sorted(glob(join(data_dir, "test_*.wav")))
+    out_dir = join(data_dir, "out")
+    os.mkdir(out_dir)
+    outputs = [join(out_dir, os.path.basename(f)) for f in files]
+    cache = OutputCache(join(data_dir, "cache"))
+
+    def run():
+        batch = Batch(files, outputs, overwrite=True, cache=cache)
+        results = batch.apply(effects.Resample(16000)).run(threads=1)
+        assert all(result.success for result in results)
+        return results
+
+    # Copies of the same file share one entry
+    assert sum(result.cache_hit for result in run()) == len(files) - 1
+    results = run()
+    assert all(result.cache_hit for result in results)
+    assert "[Cached]" in str(results[0])
+    collector = StatsCollector()
+    for result in results:
+        collector.add(result)
+    assert collector.report().cache_hits == len(files)
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import os
+from os.path import join
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from nwave.paths import (
+    PathCollisionError,
+    Paths,
+    find_collisions,
+    leaf_dirs,
+    make_dirs,
+    making_dirs,
+    mirror,
+)
+
+
+def test_mirror():
+    sources = ["in/a.flac", "in/x/b.wav", "in/x/y/c.wav"]
+    paths = list(mirror(sources, "in", "out", suffix=".wav"))
+    assert paths == [
+        Paths(Path("in/a.flac"), Path("out/a.wav")),
+        Paths(Path("in/x/b.wav"), Path("out/x/b.wav")),
+        Paths(Path("in/x/y/c.wav"), Path("out/x/y/c.wav")),
+    ]
+    with pytest.raises(ValueError):
+        list(mirror(["other/a.wav"], "in", "out"))
+
+
+def test_find_collisions():
+    paths = [
+        Paths(Path("a/1.wav"), Path("out/1.wav")),
+        Paths(Path("b/1.wav"), Path("out/./1.wav")),
+        Paths(Path("c/1.wav"), Path(os.path.abspath("out/1.wav"))),
+        Paths(Path("a/2.wav"), Path("out/2.wav")),
+    ]
+    collisions = find_collisions(paths)
+    assert collisions == {
+        Path("out/1.wav"): [Path("a/1.wav"), Path("b/1.wav"), Path("c/1.wav")]
+    }
+    assert find_collisions(paths[2:]) == {}
+    assert "1 output paths collide" in str(PathCollisionError(collisions))
+
+
+def test_leaf_dirs():
+    targets = ["a/x.wav", "a/b/y.wav", "a-c/z.wav", "a/b/c/w.wav", "top.wav"]
+    assert leaf_dirs([Path(t) for t in targets]) == [".", "a-c", join("a", "b", "c")]
+
+
+def test_make_dirs(tmp_path):
+    targets = [tmp_path / "a" / "b" / f"{i}.wav" for i in range(100)]
+    targets.append(tmp_path / "a" / "c" / "0.wav")
+    # Missing parents are created by recursive calls
+    (tmp_path / "a").mkdir()
+    with patch("os.makedirs", wraps=os.makedirs) as makedirs:
+        assert make_dirs(targets) == 2
+        assert makedirs.call_count == 2
+    assert (tmp_path / "a" / "b").is_dir() and (tmp_path / "a" / "c").is_dir()
+
+
+def test_making_dirs(tmp_path):
+    paths = (Paths(Path(f"{i}.wav"), tmp_path / "d" / f"{i}.wav") for i in range(10))
+    with patch("os.makedirs", wraps=os.makedirs) as makedirs:
+        assert len(list(making_dirs(paths))) == 10
+        assert makedirs.call_count == 1
+    assert (tmp_path / "d").is_dir()
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from nwave import Batch, effects
+from nwave.plan import plan_chain
+
+
+def test_plan_noop():
+    chain = [effects.PadSilence(0, 0), effects.Gain(0), effects.Fade()]
+    assert plan_chain(chain) == []
+    # Time stretching at rate 1 is not an exact identity
+    stretch = effects.TimeStretch(1.0)
+    assert plan_chain([stretch]) == [stretch]
+
+
+def test_plan_fuse_resample():
+    chain = [effects.Resample(44100, "LQ"), effects.Resample(16000, "HQ")]
+    planned = plan_chain(chain)
+    assert len(planned) == 1
+    assert planned[0].sample_rate == 16000
+    assert planned[0].quality == "HQ"
+    # Input chain is not modified
+    assert len(chain) == 2
+
+
+def test_plan_no_fuse_narrowing_resample():
+    # Intermediate rate below the output rate narrows the bandwidth
+    chain = [effects.Resample(8000), effects.Resample(16000)]
+    assert plan_chain(chain) == chain
+
+
+def test_plan_fuse_pad():
+    chain = [effects.PadSilence(0.5, 0), effects.PadSilence(0.25, 0.5)]
+    planned = plan_chain(chain)
+    assert len(planned) == 1
+    assert (planned[0].start, planned[0].end) == (0.75, 0.5)
+
+
+def test_plan_reorder():
+    # Padding moves after resampling, letting resamples and paddings fuse
+    pad_1, pad_2 = effects.PadSilence(0.5, 0.5), effects.PadSilence(0.1, 0.1)
+    resample_1, resample_2 = effects.Resample(22050), effects.Resample(16000)
+    planned = plan_chain([pad_1, resample_1, pad_2, resample_2])
+    assert [type(effect) for effect in planned] == [
+        effects.Resample,
+        effects.PadSilence,
+    ]
+    assert planned[0].sample_rate == 16000
+    assert (planned[1].start, planned[1].end) == (0.6, 0.6)
+
+
+def test_batch_plan():
+    batch = Batch(["a.wav", "b.wav"], ["a_out.wav", "b_out.wav"])
+    batch.apply(effects.PadSilence(0.5, 0.5), effects.Resample(16000))
+    tasks = batch.tasks
+    # Plan is shared by all tasks
+    assert tasks[0].effects is tasks[1].effects
+    assert [type(effect) for effect in tasks[0].effects] == [
+        effects.Resample,
+        effects.PadSilence,
+    ]
+    # Original chain is kept when not optimizing
+    batch.optimize = False
+    assert batch.plan() is batch.effects
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import io
+import os
+from pathlib import Path
+
+import numpy as np
+import pytest
+from scipy.io import wavfile
+
+from nwave.probe import AudioInfo, estimate_cost, probe
+from nwave.task import ArrayTask, Task
+
+
+def test_probe(data_dir):
+    file = os.path.join(data_dir, "test_0.wav")
+    sample_rate, data = wavfile.read(file)
+    info = probe(Path(file))
+    assert isinstance(info, AudioInfo)
+    assert info.sample_rate == sample_rate
+    assert info.frames == len(data)
+    assert info.channels == (1 if data.ndim == 1 else data.shape[1])
+    assert info.duration == pytest.approx(len(data) / sample_rate)
+    assert (info.file_format, info.subtype) == ("WAV", "PCM_16")
+    with open(file, "rb") as f:
+        assert probe(f) == info
+
+
+def test_estimate_cost(data_dir):
+    file = os.path.join(data_dir, "test_0.wav")
+    task = Task(file, "out.wav", [], False)
+    assert estimate_cost(task) == os.path.getsize(file)
+    assert estimate_cost(task, "duration") == probe(file).duration
+    # Unreadable sources cost nothing
+    missing = Task(os.path.join(data_dir, "missing.wav"), "out.wav", [], False)
+    assert estimate_cost(missing, "duration") == 0.0
+    assert estimate_cost(missing) == 0.0
+    with pytest.raises(ValueError):
+        estimate_cost(task, "frames")
+
+
+def test_estimate_cost_arrays():
+    data = np.zeros((800, 2), dtype=np.int16)
+    task = ArrayTask(data, 8000, [])
+    assert estimate_cost(task) == data.nbytes
+    assert estimate_cost(task, "duration") == 0.1
+    buffer = io.BytesIO()
+    wavfile.write(buffer, 8000, data)
+    for encoded in (buffer.getvalue(), bytearray(buffer.getvalue())):
+        task = ArrayTask(encoded, None, [])
+        assert estimate_cost(task) == len(encoded)
+        assert estimate_cost(task, "duration") == 0.1
+    task = ArrayTask(buffer.getbuffer(), None, [])
+    assert estimate_cost(task) == len(buffer.getvalue())
+    assert estimate_cost(task, "duration") == 0.1
+    # Arrays without a sample rate fail when processed
+    assert estimate_cost(ArrayTask(data, None, []), "duration") == 0.0
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from nwave import scan as scan_module
+from nwave.scan import match, scan
+
+
+@pytest.fixture(scope="function")
+def tree(tmp_path):
+    """
+    Tree of files with sizes equal to their index
+    """
+    files = ["a.wav", "b.WAV", "c.txt", "x/d.wav", "x/y/e.wav", "z/f.flac"]
+    for i, name in enumerate(files):
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"0" * i)
+    return tmp_path
+
+
+def found(root: Path, **kwargs) -> list[str]:
+    return sorted(p.relative_to(root).as_posix() for p in scan(root, **kwargs))
+
+
+@pytest.mark.parametrize(
+    "parts, segments, prefix, expected",
+    [
+        (("a.wav",), ("**", "*.wav"), False, True),
+        (("x", "y", "a.wav"), ("**", "*.wav"), False, True),
+        (("x", "a.wav"), ("*.wav",), False, False),
+        (("x", "a.wav"), ("x", "*.wav"), False, True),
+        (("x", "y", "a.wav"), ("x", "**", "*.wav"), False, True),
+        (("y",), ("x", "*.wav"), True, False),
+        (("x",), ("x", "*.wav"), True, True),
+        (("x", "y"), ("x", "*.wav"), True, False),
+        (("x", "y"), ("**", "*.wav"), True, True),
+    ],
+)
+def test_match(parts, segments, prefix, expected):
+    assert match(parts, segments, prefix) is expected
+
+
+def test_scan(tree):
+    assert found(tree) == [
+        "a.wav",
+        "b.WAV",
+        "c.txt",
+        "x/d.wav",
+        "x/y/e.wav",
+        "z/f.flac",
+    ]
+    assert found(tree, pattern="**/*.wav") == ["a.wav", "x/d.wav", "x/y/e.wav"]
+    assert found(tree, pattern="*") == ["a.wav", "b.WAV", "c.txt"]
+    assert found(tree, pattern="x/*/*.wav", threads=1) == ["x/y/e.wav"]
+
+
+def test_scan_filters(tree):
+    assert found(tree, extensions=[".wav", "flac"]) == [
+        "a.wav",
+        "b.WAV",
+        "x/d.wav",
+        "x/y/e.wav",
+        "z/f.flac",
+    ]
+    assert found(tree, min_size=2, max_size=4) == ["c.txt", "x/d.wav", "x/y/e.wav"]
+    with pytest.raises(ValueError):
+        list(scan(tree, threads=0))
+
+
+def test_scan_onerror(tree):
+    errors = []
+    assert found(tree / "missing", onerror=errors.append) == []
+    assert len(errors) == 1
+    assert isinstance(errors[0], FileNotFoundError)
+
+
+def test_scan_close(tree, monkeypatch):
+    monkeypatch.setattr(scan_module, "SCAN_BUFFER", 1)
+    files = scan(tree, threads=2)
+    assert isinstance(next(files), Path)
+    # Workers blocked on the full buffer stop
+    files.close()
+    for _ in range(50):
+        names = [t.name for t in threading.enumerate()]
+        if "nwave-scan" not in names:
+            break
+        time.sleep(0.02)
+    assert "nwave-scan" not in names
+
+
+def test_scan_failure(tree, monkeypatch):
+    def fail(*_):
+        raise RuntimeError("scan failed")
+
+    monkeypatch.setattr(os, "scandir", fail)
+    with pytest.raises(RuntimeError):
+        list(scan(tree))
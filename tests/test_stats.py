@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import os
+from glob import glob
+
+import pytest
+
+from nwave import Batch, Task, TaskResult, TaskStats, WaveCore, effects
+from nwave.stats import StatsCollector
+
+
+def make_result(name: str, load: float, error: Exception | None = None):
+    task = Task(name, f"{name}_out", [], False)
+    if error is not None:
+        return TaskResult(task, error)
+    stats = TaskStats(load, [("Resample", 0.5)], 0.25, 100, 50, 10, 5)
+    return TaskResult(task, None, stats)
+
+
+def test_stats_collector():
+    collector = StatsCollector(n_slowest=2)
+    for i in range(1, 5):
+        collector.add(make_result(f"f{i}", load=float(i)))
+    collector.add(make_result("bad", 0, error=ValueError()))
+    report = collector.report()
+    assert report.tasks == 5
+    assert report.failed == 1
+    assert report.bytes_read == 400
+    assert report.bytes_written == 200
+    assert (report.samples_in, report.samples_out) == (40, 20)
+    assert list(report.stages) == ["load", "Resample", "write"]
+    load = report.stages["load"]
+    assert load.count == 4
+    assert load.total == 10.0
+    assert load.percentiles["p50"] == 2.5
+    assert report.total_time == pytest.approx(10 + 4 * 0.75)
+    # Slowest first
+    assert [str(file) for _, file in report.slowest] == ["f4", "f3"]
+    assert "Tasks: 5 (1 failed)" in str(report)
+
+
+def test_core_report(data_dir):
+    src_files = glob(os.path.join(data_dir, "*.wav"))
+    out_files = [f.replace(".wav", "_out.wav") for f in src_files]
+    batch = Batch(src_files, out_files).apply(
+        effects.Resample(44100), effects.PadSilence(0.5, 0.5)
+    )
+    with WaveCore() as core:
+        core.schedule(batch)
+        for result in core.yield_all(ordered=False):
+            stats = result.stats
+            assert [name for name, _ in stats.stages()] == [
+                "load",
+                "Resample",
+                "PadSilence",
+                "write",
+            ]
+            assert stats.bytes_read == os.path.getsize(result.task.file_source)
+            assert stats.bytes_written == os.path.getsize(result.task.file_output)
+            assert stats.samples_in == 116125
+            assert stats.samples_out == 232250 + 44100
+        report = core.report()
+    assert report.tasks == len(src_files)
+    assert report.stages["Resample"].count == len(src_files)
+    assert len(report.slowest) == len(src_files)
+
+
+def test_report_passthroughs():
+    collector = StatsCollector()
+    result = make_result("f1", load=1.0)
+    collector.add(result)
+    assert "Unchanged:" not in str(collector.report())
+    result.stats.passthrough = True
+    collector.add(result)
+    report = collector.report()
+    assert report.passthroughs == 1
+    assert "Unchanged: 1 tasks passed through" in str(report)
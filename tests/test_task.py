@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import pickle
 from concurrent.futures import CancelledError
 
 import pytest
@@ -46,3 +47,10 @@ def test_task_exception():
         raise te
     except task.TaskException as e:
         assert str(e) == "During Step-1 -> ValueError: VE"
+
+
+def test_task_exception_pickle():
+    te = task.TaskException(ValueError("VE"), during="Step-1")
+    loaded = pickle.loads(pickle.dumps(te))
+    assert loaded.raising_source == "Step-1"
+    assert str(loaded) == "During Step-1 -> ValueError: VE"
@@ -1,13 +1,15 @@
 from __future__ import annotations
 
-from os import listdir
+import errno
+import os
+from os import listdir, mkdir, stat
 from os.path import exists, join
 from tempfile import TemporaryDirectory
 from unittest.mock import patch
 
 import pytest
 
-from nwave.interlocked.writer import Writer
+from nwave.interlocked.writer import FSYNC_POLICIES, WriteOptions, Writer, sync_dirs
 
 
 # Normal write test
@@ -40,12 +42,114 @@ def test_writer_exceptions():
 
 
 # Test that the temp file is deleted if write fails due to exception
-def test_writer_cleanup():
+@pytest.mark.parametrize("overwrite, move", [(False, "os.link"), (True, "os.replace")])
+def test_writer_cleanup(overwrite, move):
     with TemporaryDirectory() as tmpdir:
-        # Patch os.rename to raise an error
-        with patch("os.rename", side_effect=OSError):
+        # Patch the move into place to raise an error
+        with patch(move, side_effect=OSError):
             with pytest.raises(OSError):
-                with Writer(join(tmpdir, "test.res")) as f:
+                with Writer(join(tmpdir, "test.res"), overwrite) as f:
                     f.write(b"test")
         # Check that the temp file was deleted
         assert len(listdir(tmpdir)) == 0
+
+
+# Test that a hard link can be moved into place instead of writing
+def test_writer_link():
+    with TemporaryDirectory() as tmpdir:
+        source = join(tmpdir, "source.res")
+        open(source, "wb").write(b"linked")
+        writer = Writer(join(tmpdir, "target.res"))
+        with writer:
+            writer.link(source)
+        assert open(join(tmpdir, "target.res"), "rb").read() == b"linked"
+        assert stat(join(tmpdir, "target.res")).st_ino == stat(source).st_ino
+        assert sorted(listdir(tmpdir)) == ["source.res", "target.res"]
+
+
+# Test that nothing is moved into place if the block raises
+def test_writer_block_error():
+    with TemporaryDirectory() as tmpdir:
+        with pytest.raises(RuntimeError):
+            with Writer(join(tmpdir, "test.res")) as f:
+                f.write(b"partial")
+                raise RuntimeError()
+        assert listdir(tmpdir) == []
+
+
+@pytest.mark.parametrize("tmpfile", [False, True])
+@pytest.mark.parametrize("fsync", FSYNC_POLICIES)
+def test_writer_options(tmpfile, fsync):
+    with TemporaryDirectory() as tmpdir:
+        temp_dir = join(tmpdir, "temp")
+        mkdir(temp_dir)
+        options = WriteOptions(temp_dir=temp_dir, fsync=fsync, tmpfile=tmpfile)
+        target = join(tmpdir, "test.res")
+        for overwrite, data in ((False, b"first"), (True, b"second")):
+            with Writer(target, overwrite, options) as f:
+                f.write(data)
+            assert open(target, "rb").read() == data
+        with pytest.raises(FileExistsError):
+            with Writer(target, False, options) as f:
+                f.write(b"third")
+        assert open(target, "rb").read() == b"second"
+        assert listdir(temp_dir) == []
+        assert sorted(listdir(tmpdir)) == ["temp", "test.res"]
+        sync_dirs([target])
+
+
+def test_writer_tmpfile_fallback():
+    with TemporaryDirectory() as tmpdir:
+        options = WriteOptions(tmpfile=True)
+        # Unnamed temp files that fail to link are copied to named ones
+        with patch.object(Writer, "tmpfile_supported", True):
+            with patch("os.link", side_effect=OSError(errno.EXDEV, "")):
+                with Writer(join(tmpdir, "test.res"), True, options) as f:
+                    f.write(b"test")
+            assert not Writer.tmpfile_supported
+            writer = Writer(join(tmpdir, "other.res"), options=options)
+            assert writer.temp_name is not None
+            with writer as f:
+                f.write(b"other")
+        assert open(join(tmpdir, "test.res"), "rb").read() == b"test"
+        assert sorted(listdir(tmpdir)) == ["other.res", "test.res"]
+
+
+@pytest.mark.parametrize("code", [errno.EPERM, errno.ENOSYS])
+def test_writer_no_links(code):
+    with TemporaryDirectory() as tmpdir:
+        # Filesystems without hard links fall back to a checked rename
+        with patch("os.link", side_effect=OSError(code, "")):
+            with Writer(join(tmpdir, "test.res")) as f:
+                f.write(b"test")
+            with pytest.raises(FileExistsError):
+                with Writer(join(tmpdir, "test.res")) as f:
+                    f.write(b"other")
+        assert open(join(tmpdir, "test.res"), "rb").read() == b"test"
+        assert listdir(tmpdir) == ["test.res"]
+
+
+@pytest.mark.parametrize("overwrite", [False, True])
+def test_writer_closes_before_move(overwrite):
+    with TemporaryDirectory() as tmpdir:
+        writer = Writer(join(tmpdir, "test.res"), overwrite)
+        closed = []
+
+        def check(move):
+            def wrapper(*args, **kwargs):
+                # Windows cannot move or link an open file
+                closed.append(writer.temp.closed)
+                return move(*args, **kwargs)
+
+            return wrapper
+
+        with patch("os.link", check(os.link)), patch("os.replace", check(os.replace)):
+            with writer as f:
+                f.write(b"test")
+        assert closed == [True]
+        assert open(join(tmpdir, "test.res"), "rb").read() == b"test"
+
+
+def test_write_options_exceptions():
+    with pytest.raises(ValueError):
+        WriteOptions(fsync="always")
@@ -112,6 +112,8 @@ def pa_nwave(n_files: int, fx, threads: int, batch_num: int):
                 in_files, out_files = zip(*batch)
                 wave_batch = Batch(in_files, out_files, overwrite=True).apply(*fx)
                 core.schedule(wave_batch)
+                # Wait for results before stopping the timer
+                core.wait_all()
 
 
 def pa_nwave_run(n_files: int, fx, threads: int, batch_num: int):
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from colorama import Fore
+
+from nwave import Batch, effects
+from tests_profile import data
+from tests_profile.profile_nwave import Time, clean_up
+
+QUALITIES = ("QQ", "LQ", "MQ", "HQ", "VHQ")
+
+
+def profile_quality(n_files: int, quality: str, threads: int, sample_rate: int):
+    in_files, out_files = zip(*data.enum(n_files))
+    batch = Batch(in_files, out_files, overwrite=True).apply(
+        effects.Resample(sample_rate, quality=quality)
+    )
+    with Time() as timer:
+        results = batch.run(threads)
+    failed = sum(not result.success for result in results)
+    if failed:
+        raise RuntimeError(f"{failed} tasks failed for quality {quality}")
+    return timer
+
+
+def main():
+    n_files = 900
+    threads = 20
+    sample_rate = 16000
+    print(f"{n_files} files, resample to {sample_rate} Hz")
+
+    for quality in QUALITIES:
+        timer = profile_quality(n_files, quality, threads, sample_rate)
+        rate = n_files / timer.delta()
+        print(
+            f"{Fore.BLUE}[{quality}]{Fore.RESET} {timer.delta_f()}"
+            f" -> {Fore.YELLOW}{rate:.1f} files/s{Fore.RESET}"
+        )
+        clean_up()
+
+
+if __name__ == "__main__":
+    main()